@@ -5,6 +5,7 @@ from rest_framework import status
 from django.contrib.auth import get_user_model
 from .serialiser import UserDetails
 from rest_framework.permissions import IsAuthenticated
+from social_scheduler.conditional import conditional_get, etag_for
 
 
 # Create your views here.
@@ -13,8 +14,12 @@ from rest_framework.permissions import IsAuthenticated
 class UserDetailsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def get_etag(self, request, *args, **kwargs):
+        # The user is already loaded by authentication, so this costs no query.
+        return etag_for(*(getattr(request.user, field) for field in UserDetails.Meta.fields))
+
+    @conditional_get
     def get(self,request,*args, **kwargs):
-        print(request)
         user = request.user
         user_data =UserDetails(user)
         return Response(data=user_data.data,status=status.HTTP_200_OK)
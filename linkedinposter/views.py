@@ -1,3 +1,5 @@
+import logging
+
 from django.shortcuts import render
 from allauth.socialaccount.providers.openid_connect.views import OpenIDConnectOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.views import OAuth2Client
@@ -8,6 +10,8 @@ from allauth.socialaccount.helpers import complete_social_login
 from django.shortcuts import redirect
 from allauth.socialaccount.models import SocialApp,SocialToken,SocialAccount
 
+logger = logging.getLogger(__name__)
+
 class LinkedINOidcAdapter(OpenIDConnectOAuth2Adapter):
     provider_id = "linkedin"
 
@@ -83,7 +87,5 @@ class linkedinCallbackView(APIView):
             return response
             
         except Exception as e:
-            import traceback
-            print("Full error traceback:")
-            print(traceback.format_exc())
+            logger.exception("LinkedIn callback failed")
             return HttpResponse(f"An error occurred: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.cache import caches
+from allauth.socialaccount.models import SocialAccount
+
+from social_scheduler.conditional import etag_for
+
+
+def _cache():
+    return caches[settings.CONNECTED_ACCOUNTS_CACHE_ALIAS]
+
+
+def _key(user_id) -> str:
+    return f"connected-accounts:{user_id}"
+
+
+def _entry(user) -> dict:
+    key = _key(user.pk)
+    entry = _cache().get(key)
+    if entry is None:
+        # Imported here: the signals import this module for invalidation,
+        # and workers should not pay for DRF to do that.
+        from .searialisers import SocialAccountSerializer
+
+        accounts = SocialAccount.objects.filter(user=user).select_related('user')
+        data = list(SocialAccountSerializer(accounts, many=True).data)
+        entry = {'etag': etag_for(user.pk, data), 'data': data}
+        _cache().set(key, entry, timeout=settings.CONNECTED_ACCOUNTS_CACHE_TTL)
+    return entry
+
+
+def connected_accounts(user) -> list:
+    """
+    The serialized connected-accounts payload for `user`.
+
+    Served from the cache until a SocialAccount or SocialToken of the user
+    changes (see poster.signals), so repeat calls do not touch the database.
+    """
+    return _entry(user)['data']
+
+
+def connected_accounts_etag(user) -> str:
+    """ETag of the payload connected_accounts() returns, from the same cache entry."""
+    return _entry(user)['etag']
+
+
+def invalidate_connected_accounts(user_id):
+    _cache().delete(_key(user_id))
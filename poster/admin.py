@@ -1,3 +1,58 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
-# Register your models here.
+from .models import PublishAttempt, RecurringSchedule, SchedulePost, Status
+from .recurrence import rematerialize
+
+
+class PublishAttemptInline(admin.TabularInline):
+    model = PublishAttempt
+    fields = ['idempotency_key', 'state', 'linkedin_post_urn', 'error_message', 'started_at', 'finished_at']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(SchedulePost)
+class SchedulePostAdmin(admin.ModelAdmin):
+    list_display = ['id', 'author', 'status', 'scheduled_time', 'failed_attempts', 'next_attempt_at', 'published_at']
+    list_filter = ['status']
+    search_fields = ['content', 'author__username', 'error_message']
+    raw_id_fields = ['author', 'social_account']
+    readonly_fields = ['failed_attempts', 'next_attempt_at', 'linkedin_post_urn', 'claimed_by', 'published_at']
+    inlines = [PublishAttemptInline]
+    actions = ['redrive']
+
+    @admin.action(description="Re-drive selected failed or dead-lettered posts")
+    def redrive(self, request, queryset):
+        """
+        Puts FAILED and DEAD posts back on the schedule with a fresh retry
+        budget, in one UPDATE. Their scheduled_time has passed, so the
+        dispatcher picks them up on its next pass; the publish ledger keeps
+        any that did reach LinkedIn from being posted twice.
+        """
+        count = queryset.filter(status__in=[Status.FAILED, Status.DEAD]).update(
+            status=Status.SCHEDULED,
+            failed_attempts=0,
+            next_attempt_at=None,
+            error_message=None,
+            updated_at=timezone.now(),
+        )
+        skipped = queryset.count() - count
+        self.message_user(request, f"Re-drove {count} posts.", messages.SUCCESS)
+        if skipped:
+            self.message_user(request, f"Skipped {skipped} posts that were not failed or dead-lettered.", messages.WARNING)
+
+
+@admin.register(RecurringSchedule)
+class RecurringScheduleAdmin(admin.ModelAdmin):
+    list_display = ['id', 'author', 'rrule', 'tzname', 'active', 'materialized_until']
+    list_filter = ['active']
+    search_fields = ['content', 'author__username']
+    raw_id_fields = ['author', 'social_account']
+    readonly_fields = ['materialized_until', 'last_occurrence']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Replace the posts already materialized from the previous version.
+        rematerialize(obj)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PosterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'poster'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,69 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import MediaAsset
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(media_path: str) -> str:
+    """SHA-256 of a file, read in fixed-size chunks so memory use stays flat."""
+    digest = hashlib.sha256()
+    with open(media_path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cutoff():
+    return timezone.now() - timedelta(seconds=settings.LINKEDIN_ASSET_CACHE_TTL)
+
+
+def lookup_asset(owner_urn: str, content_hash: str):
+    """Returns the cached asset URN for these bytes, or None if absent or expired."""
+    return (
+        MediaAsset.objects
+        .filter(owner_urn=owner_urn, content_hash=content_hash, uploaded_at__gt=_cutoff())
+        .values_list('asset_urn', flat=True)
+        .first()
+    )
+
+
+def remember_asset(owner_urn: str, content_hash: str, asset_urn: str):
+    MediaAsset.objects.update_or_create(
+        owner_urn=owner_urn,
+        content_hash=content_hash,
+        defaults={'asset_urn': asset_urn, 'uploaded_at': timezone.now()},
+    )
+    # Evict this member's expired entries while we are here.
+    MediaAsset.objects.filter(owner_urn=owner_urn, uploaded_at__lte=_cutoff()).delete()
+
+
+def forget_asset(owner_urn: str, asset_urn: str):
+    """Drops an asset LinkedIn no longer accepts."""
+    MediaAsset.objects.filter(owner_urn=owner_urn, asset_urn=asset_urn).delete()
+
+
+async def alookup_asset(owner_urn: str, content_hash: str):
+    return await (
+        MediaAsset.objects
+        .filter(owner_urn=owner_urn, content_hash=content_hash, uploaded_at__gt=_cutoff())
+        .values_list('asset_urn', flat=True)
+        .afirst()
+    )
+
+
+async def aremember_asset(owner_urn: str, content_hash: str, asset_urn: str):
+    await MediaAsset.objects.aupdate_or_create(
+        owner_urn=owner_urn,
+        content_hash=content_hash,
+        defaults={'asset_urn': asset_urn, 'uploaded_at': timezone.now()},
+    )
+    await MediaAsset.objects.filter(owner_urn=owner_urn, uploaded_at__lte=_cutoff()).adelete()
+
+
+async def aforget_asset(owner_urn: str, asset_urn: str):
+    await MediaAsset.objects.filter(owner_urn=owner_urn, asset_urn=asset_urn).adelete()
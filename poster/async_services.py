@@ -0,0 +1,257 @@
+import asyncio
+import os
+import weakref
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from allauth.socialaccount.models import SocialToken, SocialAccount
+
+from social_scheduler.metrics import span
+
+from .assets import aforget_asset, alookup_asset, aremember_asset, file_digest
+from .http_client import parse_retry_after, retry_delay, should_retry
+from .tokens import token_cache
+from .services import (
+    REFRESHED_TOKEN_FIELDS,
+    LinkedInAPIError,
+    PreparedPost,
+    _api_headers,
+    _api_url,
+    _apply_refresh_response,
+    _asset_rejected,
+    _author_urn,
+    _check_auth,
+    _check_upload_response,
+    _get_social_app,
+    _media_category,
+    _media_content_type,
+    _media_recipe,
+    _needs_multipart,
+    _parse_post_response,
+    _parse_register_upload,
+    _refresh_request_data,
+    _record_quota,
+    _register_upload_payload,
+    _reserve_quota,
+    _token_needs_refresh,
+    validate_post,
+)
+
+# Size of the reads used to stream media files into upload requests.
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+# --- Async HTTP client ---
+
+# httpx clients are bound to the event loop they were first used on.
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the pooled keep-alive client for the running event loop, sized
+    and timed out with the same settings as the sync session.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.LINKEDIN_HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=settings.LINKEDIN_HTTP_POOL_MAXSIZE,
+            ),
+            timeout=httpx.Timeout(
+                settings.LINKEDIN_HTTP_READ_TIMEOUT,
+                connect=settings.LINKEDIN_HTTP_CONNECT_TIMEOUT,
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def _asend(method: str, url: str, content_factory=None, **kwargs) -> httpx.Response:
+    """
+    Async counterpart of services._send, applying the same retry policy.
+
+    Streamed bodies cannot be replayed, so callers pass `content_factory`,
+    which is called once per attempt to produce a fresh body.
+    """
+    client = get_async_client()
+    max_retries = settings.LINKEDIN_HTTP_MAX_RETRIES
+    throttled = False
+    for attempt in range(max_retries + 1):
+        if content_factory is not None:
+            kwargs['content'] = content_factory()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # Nothing reached LinkedIn, so any method is safe to retry.
+            if attempt == max_retries:
+                raise LinkedInAPIError(f"{method} {url} failed: {e}") from e
+            retry_after = None
+        except httpx.HTTPError as e:
+            raise LinkedInAPIError(f"{method} {url} failed: {e}") from e
+        else:
+            if attempt == max_retries or not should_retry(method, response.status_code):
+                if throttled:
+                    # Lets http_client.was_throttled see 429s that were retried away.
+                    response.extensions['throttled'] = True
+                return response
+            throttled = throttled or response.status_code == 429
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        await asyncio.sleep(retry_delay(attempt, retry_after))
+
+
+async def _alimited_send(social_account: SocialAccount, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Async counterpart of services._limited_send: waits for the account's and
+    app's rate-limit slot without blocking the event loop.
+    """
+    wait = await sync_to_async(_reserve_quota)(social_account)
+    if wait > 0:
+        with span('rate_limit_wait'):
+            await asyncio.sleep(wait)
+    response = await _asend(method, url, **kwargs)
+    await sync_to_async(_record_quota)(social_account, response)
+    return response
+
+
+async def _aread_file(media_path: str):
+    """Streams a file in UPLOAD_CHUNK_SIZE pieces without blocking the event loop."""
+    with open(media_path, 'rb') as f:
+        while chunk := await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+
+# --- Async publish pipeline ---
+
+async def _arefresh_linkedin_token(social_account: SocialAccount) -> SocialToken:
+    """
+    Async variant of services._refresh_linkedin_token.
+    """
+    try:
+        with span('token_read'):
+            social_token = await SocialToken.objects.aget(account=social_account)
+    except SocialToken.DoesNotExist:
+        raise LinkedInAPIError(f"No SocialToken found for account {social_account.uid}.")
+
+    if _token_needs_refresh(social_token):
+        with span('oauth_refresh'):
+            social_app = await sync_to_async(_get_social_app)(social_account)
+            response = await _asend('POST', settings.LINKEDIN_OAUTH_TOKEN_URL, data=_refresh_request_data(social_token, social_app))
+            _apply_refresh_response(social_token, response)
+            await social_token.asave(update_fields=REFRESHED_TOKEN_FIELDS)
+
+    return social_token
+
+
+async def _aget_linkedin_api_headers(social_account: SocialAccount) -> dict:
+    valid_token = await token_cache.aget(social_account.pk, lambda: _arefresh_linkedin_token(social_account))
+    return _api_headers(valid_token.access_token)
+
+
+async def _aupload_media_to_linkedin(social_account: SocialAccount, media_path: str, author_urn: str) -> str:
+    """
+    Async variant of services._upload_media_to_linkedin. The file is streamed
+    from disk, so memory use does not depend on its size. Multi-part video
+    uploads run the sync engine in poster.media on a worker thread.
+    """
+    if _needs_multipart(media_path):
+        from .media import upload_multipart
+        return await sync_to_async(upload_multipart, thread_sensitive=False)(social_account, media_path, author_urn)
+
+    headers = await _aget_linkedin_api_headers(social_account)
+
+    with span('register_upload'):
+        reg_response = await _alimited_send(social_account, 'POST', _api_url("/assets?action=registerUpload"), json=_register_upload_payload(author_urn, _media_recipe(media_path)), headers=headers)
+    _check_auth(social_account, reg_response)
+    upload_url, asset_urn = _parse_register_upload(reg_response)
+
+    upload_headers = {
+        'Content-Type': _media_content_type(media_path),
+        'Content-Length': str(os.path.getsize(media_path)),
+    }
+    with span('media_put'):
+        upload_response = await _asend('PUT', upload_url, content_factory=lambda: _aread_file(media_path), headers=upload_headers)
+
+    _check_upload_response(upload_response)
+    return asset_urn
+
+
+async def _aget_or_upload_media(social_account: SocialAccount, media_path: str, author_urn: str) -> tuple:
+    """
+    Async variant of services._get_or_upload_media.
+    """
+    content_hash = await asyncio.to_thread(file_digest, media_path)
+    asset_urn = await alookup_asset(author_urn, content_hash)
+    if asset_urn:
+        return asset_urn, True
+
+    asset_urn = await _aupload_media_to_linkedin(social_account, media_path, author_urn)
+    await aremember_asset(author_urn, content_hash, asset_urn)
+    return asset_urn, False
+
+
+async def aprepare_linkedin_post(
+    social_account: SocialAccount, text: str, media_path: str = None, asset_urn: str = None, compiled: bytes = None,
+) -> PreparedPost:
+    """
+    Async variant of services.prepare_linkedin_post.
+    """
+    if compiled is None:
+        validate_post(social_account.provider, text, media_path)
+    prepared = PreparedPost(_author_urn(social_account), text, media_path, asset_urn, from_cache=bool(asset_urn), compiled=compiled)
+    if media_path:
+        if not asset_urn:
+            prepared.asset_urn, prepared.from_cache = await _aget_or_upload_media(social_account, media_path, prepared.author_urn)
+        prepared.media_category = _media_category(media_path)
+    return prepared
+
+
+async def asend_linkedin_post(social_account: SocialAccount, prepared: PreparedPost) -> dict:
+    """
+    Async variant of services.send_linkedin_post.
+    """
+    headers = {**await _aget_linkedin_api_headers(social_account), 'Content-Type': 'application/json'}
+    with span('ugc_post'):
+        response = await _alimited_send(social_account, 'POST', _api_url("/ugcPosts"), content=prepared.body(), headers=headers)
+    _check_auth(social_account, response)
+
+    if prepared.from_cache and prepared.media_path and _asset_rejected(response):
+        await aforget_asset(prepared.author_urn, prepared.asset_urn)
+        prepared.replace_asset(*await _aget_or_upload_media(social_account, prepared.media_path, prepared.author_urn))
+        with span('ugc_post', retry=True):
+            response = await _alimited_send(social_account, 'POST', _api_url("/ugcPosts"), content=prepared.body(), headers=headers)
+        _check_auth(social_account, response)
+
+    return _parse_post_response(response)
+
+
+async def apost_to_linkedin(social_account: SocialAccount, text: str, media_path: str = None, asset_urn: str = None):
+    """
+    Async variant of services.post_to_linkedin, for event-loop based dispatchers.
+
+    Args:
+        social_account: The SocialAccount instance for the target LinkedIn profile.
+        text: The text content of the post.
+        media_path (optional): The full local path to an image or video file to be attached.
+        asset_urn (optional): An asset already uploaded for `media_path`; the upload step is skipped.
+
+    Returns:
+        The JSON response from the LinkedIn API upon successful post creation.
+
+    Raises:
+        ValueError: If the provided social_account is not for LinkedIn.
+        LinkedInRateLimited: If the account or app is out of quota for longer than
+            LINKEDIN_RATE_LIMIT_MAX_WAIT; nothing was published.
+        LinkedInAPIError: For any API-related failures.
+    """
+    prepared = await aprepare_linkedin_post(social_account, text, media_path, asset_urn)
+    return await asend_linkedin_post(social_account, prepared)
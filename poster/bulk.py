@@ -0,0 +1,125 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from allauth.socialaccount.models import SocialAccount
+
+from .models import SchedulePost
+from .payloads import compile_post
+from .searialisers import BulkSchedulePostRowSerializer
+from .services import LinkedInPostInvalid
+
+
+def iter_rows(source, fmt: str):
+    """
+    Lazily yields rows from a CSV or NDJSON byte stream, one line at a time,
+    so the whole upload is never held in memory.
+
+    NDJSON lines that are not JSON objects are yielded as strings; the
+    importer reports them as invalid rows.
+    """
+    lines = codecs.iterdecode(iter(source), 'utf-8-sig')
+    if fmt == 'csv':
+        for row in csv.DictReader(lines):
+            # Blank cells mean "not given", so optional columns fall back to their defaults.
+            yield {key: value for key, value in row.items() if value not in ('', None)}
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = line
+        yield row
+
+
+def _chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_posts(user, rows, chunk_size: int = None) -> dict:
+    """
+    Validates and inserts scheduled posts in chunks.
+
+    Each chunk costs one query to check social_account ownership and one
+    bulk_create, independent of how many rows it holds.
+
+    Rows beyond BULK_SCHEDULE_MAX_ROWS are not read. Chunks are committed as
+    they go, so if the stream turns out to be undecodable part-way the rows
+    before it stay imported and the report carries an `error`.
+
+    Returns:
+        A report with created/failed counts and a per-row result list, where
+        rows are numbered from 1 in upload order.
+    """
+    chunk_size = chunk_size or settings.BULK_SCHEDULE_CHUNK_SIZE
+    max_rows = settings.BULK_SCHEDULE_MAX_ROWS
+    report = {'created': 0, 'failed': 0, 'results': []}
+    try:
+        _import_chunks(user, islice(rows, max_rows + 1), chunk_size, max_rows, report)
+    except (UnicodeDecodeError, csv.Error) as e:
+        report['error'] = f"Could not read the upload: {e}"
+    report['results'].sort(key=lambda result: result['row'])
+    return report
+
+
+def _import_chunks(user, rows, chunk_size: int, max_rows: int, report: dict):
+    results = report['results']
+    row_number = 0
+
+    for chunk in _chunks(rows, chunk_size):
+        valid = []
+        for row in chunk:
+            row_number += 1
+            if row_number > max_rows:
+                report['error'] = f"Uploads are limited to {max_rows} rows; the rest were ignored."
+                break
+            if not isinstance(row, dict):
+                results.append({'row': row_number, 'errors': {'non_field_errors': ["Row is not a JSON object."]}})
+                report['failed'] += 1
+                continue
+            serializer = BulkSchedulePostRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((row_number, serializer.validated_data))
+            else:
+                results.append({'row': row_number, 'errors': serializer.errors})
+                report['failed'] += 1
+
+        account_ids = {data['social_account'] for _, data in valid}
+        owned = {
+            account.pk: account
+            for account in SocialAccount.objects.filter(user=user, pk__in=account_ids).only('pk', 'provider', 'uid')
+        }
+
+        to_create = []
+        for number, data in valid:
+            if data['social_account'] not in owned:
+                results.append({'row': number, 'errors': {'social_account': ["Not one of your connected accounts."]}})
+                report['failed'] += 1
+                continue
+            post = SchedulePost(
+                author=user,
+                social_account_id=data['social_account'],
+                content=data['content'],
+                scheduled_time=data['scheduled_time'],
+                status=data['status'],
+            )
+            try:
+                compile_post(post, owned[data['social_account']])
+            except LinkedInPostInvalid as e:
+                results.append({'row': number, 'errors': {'content': [str(e)]}})
+                report['failed'] += 1
+                continue
+            to_create.append((number, post))
+
+        with transaction.atomic():
+            SchedulePost.objects.bulk_create([post for _, post in to_create])
+        for number, post in to_create:
+            results.append({'row': number, 'id': post.pk})
+        report['created'] += len(to_create)
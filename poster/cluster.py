@@ -0,0 +1,151 @@
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, transaction
+from django.db.models import F
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from .ledger import requeue_in_flight
+from .models import DispatcherNode
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+def default_node_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class HashRing:
+    """
+    Consistent hash ring of dispatcher nodes, each placed at `vnodes` points.
+
+    A key belongs to the first node point at or after its hash. When a node
+    joins or leaves only the keys next to its points move, about 1/N of
+    them, so the other nodes keep their accounts (and warm token caches).
+    """
+
+    def __init__(self, nodes, vnodes: int = 256):
+        self.nodes = sorted(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key) -> str:
+        if not self._hashes:
+            return None
+        i = bisect.bisect(self._hashes, _hash(str(key))) % len(self._hashes)
+        return self._owners[i]
+
+
+def in_partitions(queryset, partitions):
+    """
+    Narrows a SchedulePost queryset to posts of accounts in `partitions`.
+    An account's partition is its id modulo SCHEDULER_PARTITIONS, so all of
+    its posts are dispatched by one node.
+    """
+    return queryset.alias(
+        partition=Mod(F('social_account_id'), settings.SCHEDULER_PARTITIONS),
+    ).filter(partition__in=partitions)
+
+
+class Membership:
+    """
+    This node's lease in the DispatcherNode table and the partitions it owns.
+
+    A background thread renews the lease every SCHEDULER_HEARTBEAT_INTERVAL
+    seconds, however long publishing takes. On each renewal it re-reads the
+    live nodes and recomputes its share of the SCHEDULER_PARTITIONS account
+    partitions from a HashRing over them, so partitions rebalance on their own as nodes join or die. Leases not
+    renewed within SCHEDULER_LEASE_TTL are reaped by whichever node notices
+    first: the dead node's PUBLISHING posts go back to SCHEDULED and are
+    claimed by the partition's new owner, whose publish ledger settles any
+    attempt the dead node left in flight.
+
+    The TTL must exceed the longest publish call, or a slow node may be
+    taken for dead while its request is still out.
+    """
+
+    def __init__(self, name: str = None):
+        self.name = name or default_node_name()
+        self.partitions = frozenset()
+        self.peers = ()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Takes the lease and starts renewing it in the background."""
+        self.heartbeat()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(settings.SCHEDULER_HEARTBEAT_INTERVAL):
+            close_old_connections()
+            try:
+                self.heartbeat()
+            except OperationalError as e:
+                # Typically "database is locked"; the lease survives a few missed beats.
+                logger.warning("Heartbeat of node %s failed: %s", self.name, e)
+
+    def heartbeat(self, now=None):
+        now = now or timezone.now()
+        DispatcherNode.objects.update_or_create(name=self.name, defaults={'heartbeat_at': now})
+        self.reap(now)
+
+        peers = tuple(DispatcherNode.objects.order_by('name').values_list('name', flat=True))
+        if peers != self.peers:
+            ring = HashRing(peers, vnodes=settings.SCHEDULER_VNODES)
+            self.partitions = frozenset(
+                p for p in range(settings.SCHEDULER_PARTITIONS) if ring.owner(p) == self.name
+            )
+            logger.info(
+                "Node %s owns %d of %d partitions (%d nodes)",
+                self.name, len(self.partitions), settings.SCHEDULER_PARTITIONS, len(peers),
+            )
+            self.peers = peers
+
+    def reap(self, now=None) -> int:
+        """
+        Removes expired leases and returns their in-flight posts to the schedule.
+
+        Returns:
+            How many posts were handed back.
+        """
+        now = now or timezone.now()
+        expired = DispatcherNode.objects.filter(
+            heartbeat_at__lt=now - timedelta(seconds=settings.SCHEDULER_LEASE_TTL),
+        ).values_list('name', 'heartbeat_at')
+        released = 0
+        for name, heartbeat_at in expired:
+            with transaction.atomic():
+                # Matching the heartbeat makes sure only one reaper wins, and
+                # not against a node that has just come back.
+                deleted, _ = DispatcherNode.objects.filter(name=name, heartbeat_at=heartbeat_at).delete()
+                if not deleted:
+                    continue
+                count = requeue_in_flight(name)
+            logger.warning("Lease of node %s expired; %d in-flight posts handed back", name, count)
+            released += count
+        return released
+
+    def leave(self):
+        """Drops the lease so the remaining nodes take over the partitions right away."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        DispatcherNode.objects.filter(name=self.name).delete()
+        self.partitions = frozenset()
+        self.peers = ()
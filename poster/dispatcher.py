@@ -0,0 +1,589 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction, OperationalError
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from social_scheduler import metrics
+
+from .models import SchedulePost, Status
+from .async_services import close_async_client
+from .cluster import in_partitions
+from .fairness import fair_candidates, fair_scheduler
+from .ledger import AttemptInProgress, apublish_once, complete_post, publish_once, requeue_in_flight
+from .results import ResultBuffer
+from .retries import is_retryable, retry_backoff
+from .services import LinkedInRateLimited
+from .timers import due_timer
+from .warmup import (
+    WarmupReport, accounts_due_soon, awarm_http, awarm_tokens, warm_database, warm_threads, warm_tokens,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# --- Stats ---
+
+@dataclass
+class DispatchStats:
+    """Throughput and schedule-lag figures for one dispatcher run."""
+    published: int = 0
+    failed: int = 0
+    deferred: int = 0
+    elapsed: float = 0.0
+    lags: list = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.published + self.failed + self.deferred
+
+    @property
+    def posts_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def max_lag(self) -> timedelta:
+        return max(self.lags, default=timedelta(0))
+
+    def record(self, post: SchedulePost):
+        if post.status == Status.PUBLISHED:
+            self.published += 1
+            self.lags.append(post.published_at - post.scheduled_time)
+        elif post.status == Status.SCHEDULED:
+            self.deferred += 1
+        elif post.status in (Status.FAILED, Status.DEAD):
+            self.failed += 1
+
+    def __str__(self):
+        return (
+            f"{self.published} published, {self.failed} failed, {self.deferred} deferred in {self.elapsed:.2f}s "
+            f"({self.posts_per_second:.1f} posts/s, max lag {self.max_lag.total_seconds():.1f}s)"
+        )
+
+
+# --- Claiming and publishing ---
+
+def claim_due_posts(batch_size: int, now=None, fair: bool = None, partitions=None, node: str = '') -> list:
+    """
+    Claims up to `batch_size` due SCHEDULED posts by flipping them to PUBLISHING.
+
+    With `partitions` only posts of accounts in those partitions are claimed,
+    and the rows are marked as held by `node` (see poster.cluster).
+
+    With `fair` (SCHEDULER_FAIR_DISPATCH by default) the batch is shared
+    between authors by deficit round-robin (see poster.fairness), so one
+    user's huge backlog cannot hold up everyone else's posts. Otherwise
+    posts are claimed oldest first.
+
+    Posts that were put off (rate-limited, or retrying after a failure) are
+    only claimed once their next_attempt_at has come. Oldest first, each half
+    of the due set is a range scan on poster_status_retry_idx, so rows waiting
+    for a retry cost nothing however many there are.
+
+    The select and the status flip run in one transaction; on backends with
+    SKIP LOCKED, concurrent workers skip each other's rows instead of blocking.
+
+    Returns:
+        The claimed SchedulePost objects, oldest first, with social_account loaded.
+    """
+    now = now or timezone.now()
+    fair = settings.SCHEDULER_FAIR_DISPATCH if fair is None else fair
+    with transaction.atomic():
+        scheduled = SchedulePost.objects.filter(status=Status.SCHEDULED, scheduled_time__lte=now)
+        if partitions is not None:
+            scheduled = in_partitions(scheduled, partitions)
+        if fair:
+            # Due or retry time come, as one condition on the row: fair_candidates
+            # reads per account, and an OR over next_attempt_at would draw the
+            # planner onto poster_status_retry_idx and through the whole backlog.
+            ready = scheduled.alias(due_at=Coalesce('next_attempt_at', 'scheduled_time')).filter(due_at__lte=now)
+            picked = fair_candidates(ready, batch_size, fair_scheduler)
+        else:
+            fresh = scheduled.filter(next_attempt_at__isnull=True)
+            retries = scheduled.filter(next_attempt_at__lte=now)
+            picked = _oldest_due(fresh, retries, batch_size)
+        # Window functions (fair) and merged queries cannot be combined with
+        # FOR UPDATE, so the picked rows are locked in a second, plain query.
+        due = SchedulePost.objects.filter(id__in=picked, status=Status.SCHEDULED)
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True))
+        if not ids:
+            return []
+        SchedulePost.objects.filter(id__in=ids, status=Status.SCHEDULED).update(
+            status=Status.PUBLISHING, claimed_by=node, updated_at=now
+        )
+
+    return list(
+        SchedulePost.objects
+        .filter(id__in=ids, status=Status.PUBLISHING, claimed_by=node)
+        .select_related('social_account')
+        .order_by('scheduled_time', 'id')
+    )
+
+
+def _oldest_due(fresh, retries, batch_size: int) -> list:
+    """
+    Ids of the `batch_size` oldest posts out of both halves of the due set,
+    each read in index order with a LIMIT.
+    """
+    candidates = list(fresh.order_by('scheduled_time', 'id').values_list('scheduled_time', 'id')[:batch_size])
+    candidates += retries.order_by('next_attempt_at').values_list('scheduled_time', 'id')[:batch_size]
+    return [post_id for _, post_id in sorted(candidates)[:batch_size]]
+
+
+def _defer(post: SchedulePost, error: LinkedInRateLimited):
+    """Hands a post that ran out of quota back to the schedule, to be claimed again once quota frees up."""
+    logger.info("Deferring post %s by %.0fs: %s", post.pk, error.retry_after, error)
+    post.status = Status.SCHEDULED
+    post.next_attempt_at = timezone.now() + timedelta(seconds=error.retry_after)
+    post.error_message = str(error)
+
+
+def _fail(post: SchedulePost, error: Exception):
+    """
+    Schedules a retry with backoff for a retryable error. Permanent errors
+    fail the post; retryable ones dead-letter it after SCHEDULER_RETRY_MAX_ATTEMPTS.
+    """
+    post.failed_attempts += 1
+    post.error_message = str(error)
+    if not is_retryable(error):
+        logger.warning("Publishing post %s failed: %s", post.pk, error)
+        post.status = Status.FAILED
+    elif post.failed_attempts >= settings.SCHEDULER_RETRY_MAX_ATTEMPTS:
+        logger.warning("Publishing post %s failed %d times, dead-lettering it: %s", post.pk, post.failed_attempts, error)
+        post.status = Status.DEAD
+    else:
+        delay = retry_backoff(post.failed_attempts)
+        logger.warning(
+            "Publishing post %s failed (attempt %d), retrying in %.0fs: %s", post.pk, post.failed_attempts, delay, error,
+        )
+        post.status = Status.SCHEDULED
+        post.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+
+
+def _succeed(post: SchedulePost, urn: str):
+    post.status = Status.PUBLISHED
+    post.published_at = timezone.now()
+    post.error_message = None
+    post.linkedin_post_urn = urn or ''
+
+
+def _record(post: SchedulePost, results: ResultBuffer = None) -> SchedulePost:
+    """Writes the outcome now, or hands it to the write-behind buffer."""
+    if results is not None:
+        if results.add(post):
+            results.flush()
+    elif complete_post(post) and post.status == Status.SCHEDULED:
+        due_timer.schedule(post.pk, post.due_at)
+    return post
+
+
+# Metric label for each status a publish can leave the post in.
+_OUTCOMES = {
+    Status.PUBLISHED: 'published',
+    Status.FAILED: 'failed',
+    Status.DEAD: 'dead',
+    Status.SCHEDULED: 'deferred',
+    Status.PUBLISHING: 'skipped',
+}
+
+
+def _observe(post: SchedulePost, info: dict):
+    """Records a finished publish (timed by metrics.trace) in the scheduler metrics."""
+    metrics.publish_seconds.observe(info['seconds'], info['outcome'])
+    if 'queries' in info:
+        metrics.publish_queries.observe(info['queries'])
+    if post.status == Status.PUBLISHED:
+        metrics.schedule_lag_seconds.observe((post.published_at - post.scheduled_time).total_seconds())
+
+
+def publish_post(post: SchedulePost, results: ResultBuffer = None) -> SchedulePost:
+    """
+    Publishes a claimed post through the publish ledger and records the
+    outcome on the row. Runs on a pool thread; API failures are stored as
+    FAILED, not raised. Posts that are out of rate-limit quota go back to
+    SCHEDULED instead.
+
+    With `results` the row is written later, in a batch with other outcomes.
+    """
+    close_old_connections()
+    with metrics.trace('publish', post=post.pk) as info:
+        _publish(post, results)
+        if info is not None:
+            info['outcome'] = _OUTCOMES[post.status]
+    if info is not None:
+        _observe(post, info)
+    return post
+
+
+def _publish(post: SchedulePost, results: ResultBuffer = None) -> SchedulePost:
+    try:
+        urn = publish_once(post)
+    except LinkedInRateLimited as e:
+        _defer(post, e)
+    except AttemptInProgress as e:
+        logger.info("Skipping post %s: %s", post.pk, e)
+        return post
+    except Exception as e:
+        _fail(post, e)
+    else:
+        _succeed(post, urn)
+    return _record(post, results)
+
+
+async def apublish_post(post: SchedulePost, results: ResultBuffer = None) -> SchedulePost:
+    """
+    Async variant of publish_post, run as a task on the dispatcher's event loop.
+    """
+    with metrics.trace('publish', count_queries=False, post=post.pk) as info:
+        await _apublish(post, results)
+        if info is not None:
+            info['outcome'] = _OUTCOMES[post.status]
+    if info is not None:
+        _observe(post, info)
+    return post
+
+
+async def _apublish(post: SchedulePost, results: ResultBuffer = None) -> SchedulePost:
+    try:
+        urn = await apublish_once(post)
+    except LinkedInRateLimited as e:
+        _defer(post, e)
+    except AttemptInProgress as e:
+        logger.info("Skipping post %s: %s", post.pk, e)
+        return post
+    except Exception as e:
+        _fail(post, e)
+    else:
+        _succeed(post, urn)
+    if results is None:
+        return await sync_to_async(_record)(post)
+    # Only the flush touches the database; queue without leaving the loop.
+    if results.add(post):
+        await sync_to_async(results.flush)()
+    return post
+
+
+# --- Dispatchers ---
+
+class BaseDispatcher:
+    """
+    Dispatch loop shared by the thread-pool and asyncio dispatchers.
+
+    Subclasses implement run_once(), which publishes everything due right now.
+    When idle the loop sleeps on the in-memory NextDueTimer rather than
+    polling the table; creating a dispatcher turns on the signals that keep
+    the timer up to date with saves in this process.
+
+    Given a poster.cluster.Membership, the dispatcher takes a lease and only
+    claims posts of the account partitions the membership currently owns.
+
+    Outcomes are written behind, in batches, through a ResultBuffer. Posts a
+    previous run left PUBLISHING (it died with outcomes still buffered) are
+    handed back on startup and replayed from the publish ledger.
+    """
+
+    def __init__(self, batch_size: int = None, resync_interval: float = None, membership=None):
+        self.batch_size = batch_size or settings.SCHEDULER_BATCH_SIZE
+        self.resync_interval = resync_interval or settings.SCHEDULER_RESYNC_INTERVAL
+        self.timer = due_timer
+        self.timer.tracking = True
+        self.timer_truncated = False
+        self.membership = membership
+        self.synced_peers = None
+        self.results = ResultBuffer()
+        self.requeue_abandoned()
+        if membership:
+            membership.start()
+
+    def run_once(self) -> DispatchStats:
+        raise NotImplementedError
+
+    def warm_up(self) -> WarmupReport:
+        """
+        Readies what the first publishes need before any work is claimed: the
+        database and LinkedIn connections they will use, and the tokens of
+        the accounts with posts due within SCHEDULER_WARMUP_LOOKAHEAD seconds.
+        Best effort; whatever fails is done again by the publish itself.
+        """
+        started = time.monotonic()
+        report = WarmupReport()
+        scheduled = SchedulePost.objects.filter(status=Status.SCHEDULED)
+        if self.membership:
+            scheduled = in_partitions(scheduled, self.membership.partitions)
+        accounts = accounts_due_soon(scheduled, timezone.now() + timedelta(seconds=settings.SCHEDULER_WARMUP_LOOKAHEAD))
+        self._warm_up(report, accounts)
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def _warm_up(self, report: WarmupReport, accounts: list):
+        raise NotImplementedError
+
+    def claim(self, batch_size: int) -> list:
+        if not self.membership:
+            return claim_due_posts(batch_size)
+        partitions = self.membership.partitions
+        if not partitions:
+            return []
+        return claim_due_posts(batch_size, partitions=partitions, node=self.membership.name)
+
+    def resync_timer(self, now=None):
+        """
+        Reloads the timer with the next `SCHEDULER_TIMER_PRELOAD` due times.
+        This is a LIMITed range scan on poster_status_due_idx, so its cost does
+        not grow with the number of historical rows.
+        """
+        now = now or timezone.now()
+        limit = settings.SCHEDULER_TIMER_PRELOAD
+        scheduled = SchedulePost.objects.filter(status=Status.SCHEDULED)
+        if self.membership:
+            self.synced_peers = self.membership.peers
+            scheduled = in_partitions(scheduled, self.membership.partitions)
+        upcoming = list(scheduled.filter(scheduled_time__gt=now).order_by('scheduled_time').values_list('id', 'scheduled_time')[:limit])
+        # Posts put off past their scheduled_time, on poster_status_retry_idx.
+        retries = list(scheduled.filter(next_attempt_at__gt=now).order_by('next_attempt_at').values_list('id', 'next_attempt_at')[:limit])
+        self.timer.load(upcoming + retries)
+        self.timer_truncated = len(upcoming) == limit or len(retries) == limit
+
+    def has_due_posts(self, now=None) -> bool:
+        """
+        Whether any post is due, whether or not the timer knows of it. Two
+        LIMIT 1 range scans on poster_status_retry_idx, cheap enough to poll.
+        """
+        now = now or timezone.now()
+        scheduled = SchedulePost.objects.filter(status=Status.SCHEDULED)
+        if self.membership:
+            scheduled = in_partitions(scheduled, self.membership.partitions)
+        return (
+            scheduled.filter(next_attempt_at__isnull=True, scheduled_time__lte=now).exists()
+            or scheduled.filter(next_attempt_at__lte=now).exists()
+        )
+
+    def due_again(self, short_since: float) -> bool:
+        """
+        Whether to claim again during a pass after a claim came back short at
+        `short_since` (monotonic): the timer has a post due, or the table has,
+        asked at most every SCHEDULER_POLL_INTERVAL seconds.
+        """
+        next_due = self.timer.next_due()
+        if next_due is not None and next_due <= timezone.now():
+            return True
+        return time.monotonic() - short_since >= settings.SCHEDULER_POLL_INTERVAL and self.has_due_posts()
+
+    def requeue_abandoned(self):
+        """
+        Hands back posts an earlier run left PUBLISHING under this node's claim.
+
+        Node names are unique among live nodes, so in a cluster everything
+        still claimed under ours is abandoned (other nodes' posts are handed
+        back by the reaper). Without a cluster there is no lease to expire, so
+        posts claimed more than SCHEDULER_LEASE_TTL ago are taken as abandoned.
+        """
+        if self.membership:
+            count = requeue_in_flight(self.membership.name)
+        else:
+            count = requeue_in_flight(claimed_before=timezone.now() - timedelta(seconds=settings.SCHEDULER_LEASE_TTL))
+        if count:
+            logger.warning("Handed back %d posts left PUBLISHING by an earlier run", count)
+
+    def rebalanced(self) -> bool:
+        """Whether the partitions changed hands since the timer was last loaded."""
+        return bool(self.membership) and self.membership.peers != self.synced_peers
+
+    def run_forever(self, on_batch=None):
+        """
+        Runs the dispatch loop until interrupted.
+
+        Between passes it sleeps until the timer's next due time. Posts saved in
+        this process update the timer through signals; posts saved by other
+        processes are caught by polling has_due_posts() every
+        SCHEDULER_POLL_INTERVAL seconds, and enter the timer when it is
+        resynced, at most every `resync_interval` seconds or as soon as a
+        truncated preload runs dry. In a cluster the loop also wakes every
+        heartbeat interval, and resyncs when nodes joined or left.
+        """
+        next_resync = 0.0
+        while True:
+            try:
+                stats = self.run_once()
+                self.timer.discard_due()
+                if (
+                    time.monotonic() >= next_resync
+                    or (self.timer_truncated and not len(self.timer))
+                    or self.rebalanced()
+                ):
+                    if not self.membership:
+                        self.requeue_abandoned()
+                    self.resync_timer()
+                    next_resync = time.monotonic() + self.resync_interval
+            except OperationalError as e:
+                # Typically "database is locked" while another writer holds it.
+                logger.warning("Dispatch pass aborted: %s", e)
+                time.sleep(1)
+                continue
+            if stats.total:
+                if on_batch:
+                    on_batch(stats)
+                continue
+            timeout = next_resync - time.monotonic()
+            if self.membership:
+                timeout = min(timeout, settings.SCHEDULER_HEARTBEAT_INTERVAL)
+            self._sleep(timeout)
+
+    def _sleep(self, timeout: float):
+        """Waits on the timer for up to `timeout` seconds, polling the table meanwhile."""
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > settings.SCHEDULER_POLL_INTERVAL:
+            self.timer.wait(settings.SCHEDULER_POLL_INTERVAL)
+            next_due = self.timer.next_due()
+            if next_due is not None and next_due <= timezone.now():
+                return
+            try:
+                if self.has_due_posts():
+                    return
+            except OperationalError:
+                # The next pass reports it, if it persists.
+                return
+        self.timer.wait(remaining)
+
+    def shutdown(self):
+        self.results.flush()
+        if len(self.results):
+            # Keep the lease: when it expires, the survivors hand these posts back.
+            logger.error("%d publish outcomes could not be recorded; their posts will be replayed", len(self.results))
+        elif self.membership:
+            self.membership.leave()
+
+
+class Dispatcher(BaseDispatcher):
+    """
+    Claims due posts in batches and publishes them on a bounded thread pool.
+
+    New batches are claimed as soon as there is room in the pool, so a large
+    backlog keeps every worker busy instead of waiting on the slowest post
+    of each batch.
+    """
+
+    def __init__(self, batch_size: int = None, max_workers: int = None, resync_interval: float = None, membership=None):
+        super().__init__(batch_size=batch_size, resync_interval=resync_interval, membership=membership)
+        self.max_workers = max_workers or settings.SCHEDULER_MAX_WORKERS
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='dispatcher')
+
+    def _warm_up(self, report: WarmupReport, accounts: list):
+        report.database, report.http = warm_threads(self.executor, self.max_workers)
+        report.tokens = warm_tokens(self.executor, accounts)
+
+    def run_once(self) -> DispatchStats:
+        """
+        Publishes everything that is due, including posts that come due while
+        the pass runs, and returns the run's stats.
+        """
+        stats = DispatchStats()
+        started = time.monotonic()
+        in_flight = set()
+        short_since = None
+
+        while True:
+            # Keep roughly one batch queued behind the running workers. After a
+            # short claim, claim again once more posts are due.
+            if len(in_flight) < self.max_workers and (short_since is None or self.due_again(short_since)):
+                claimed_at = timezone.now()
+                posts = self.claim(self.batch_size)
+                if len(posts) < self.batch_size:
+                    # Everything due by claimed_at was claimed.
+                    self.timer.discard_due(claimed_at)
+                    short_since = time.monotonic()
+                else:
+                    short_since = None
+                in_flight.update(self.executor.submit(publish_post, post, self.results) for post in posts)
+
+            if not in_flight:
+                break
+
+            done, in_flight = wait(in_flight, timeout=self.results.max_delay or None, return_when=FIRST_COMPLETED)
+            for future in done:
+                stats.record(future.result())
+            if self.results.due():
+                self.results.flush()
+
+        self.results.flush()
+        stats.elapsed = time.monotonic() - started
+        return stats
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        super().shutdown()
+
+
+class AsyncDispatcher(BaseDispatcher):
+    """
+    Publishes due posts as tasks on a private event loop, keeping up to
+    `concurrency` posts in flight from a single thread.
+
+    The loop persists across passes so the async client's keep-alive
+    connections are reused.
+    """
+
+    def __init__(self, batch_size: int = None, concurrency: int = None, resync_interval: float = None, membership=None):
+        super().__init__(batch_size=batch_size, resync_interval=resync_interval, membership=membership)
+        self.concurrency = concurrency or settings.SCHEDULER_ASYNC_CONCURRENCY
+        self.loop = asyncio.new_event_loop()
+
+    def run_once(self) -> DispatchStats:
+        return self.loop.run_until_complete(self.arun_once())
+
+    def _warm_up(self, report: WarmupReport, accounts: list):
+        self.loop.run_until_complete(self._awarm_up(report, accounts))
+
+    async def _awarm_up(self, report: WarmupReport, accounts: list):
+        # claim() and flush() run on the thread sync_to_async uses.
+        report.database = int(await sync_to_async(warm_database)())
+        report.http, report.tokens = await asyncio.gather(awarm_http(self.concurrency), awarm_tokens(accounts))
+
+    async def arun_once(self) -> DispatchStats:
+        stats = DispatchStats()
+        started = time.monotonic()
+        in_flight = set()
+        short_since = None
+        claim = sync_to_async(self.claim)
+        due_again = sync_to_async(self.due_again)
+        flush = sync_to_async(self.results.flush)
+
+        while True:
+            if len(in_flight) < self.concurrency and (short_since is None or await due_again(short_since)):
+                wanted = min(self.batch_size, self.concurrency - len(in_flight))
+                claimed_at = timezone.now()
+                posts = await claim(wanted)
+                if len(posts) < wanted:
+                    self.timer.discard_due(claimed_at)
+                    short_since = time.monotonic()
+                else:
+                    short_since = None
+                in_flight.update(asyncio.create_task(apublish_post(post, self.results)) for post in posts)
+
+            if not in_flight:
+                break
+
+            done, in_flight = await asyncio.wait(
+                in_flight, timeout=self.results.max_delay or None, return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                stats.record(task.result())
+            if self.results.due():
+                await flush()
+
+        await flush()
+        stats.elapsed = time.monotonic() - started
+        return stats
+
+    def shutdown(self):
+        self.loop.run_until_complete(close_async_client())
+        self.loop.close()
+        super().shutdown()
@@ -0,0 +1,152 @@
+import threading
+from collections import Counter, defaultdict, deque
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Subquery
+from allauth.socialaccount.models import SocialAccount
+
+# Accounts with few due posts whose posts are read per query, to stay under
+# the query parameter limit of SQLite.
+ACCOUNTS_PER_QUERY = 500
+
+
+class DeficitRoundRobin:
+    """
+    Splits claim batches between authors by deficit round-robin.
+
+    Every round, each author with due posts earns `quantum * weight` credit
+    and may take that many slots. Credit left over when a batch fills up
+    carries into the next claim, and the rotation resumes where it stopped,
+    so an author's share of the throughput depends on their weight, not on
+    how many posts they have queued.
+    """
+
+    def __init__(self, quantum: float = 1.0):
+        self.quantum = quantum
+        self._deficits = {}
+        self._order = deque()
+        self._lock = threading.Lock()
+
+    def allocate(self, backlogs: dict, weights: dict, slots: int) -> Counter:
+        """
+        Args:
+            backlogs: {author_id: posts due}. Authors not listed are idle.
+            weights: {author_id: weight}; missing authors weigh 1. Authors
+                weighing 0 or less never earn credit, so they are left idle.
+            slots: How many posts to hand out.
+
+        Returns:
+            {author_id: posts to claim}, summing to at most `slots`.
+        """
+        with self._lock:
+            backlogs = {a: backlog for a, backlog in backlogs.items() if weights.get(a, 1.0) > 0}
+            # Idle authors leave the rotation and lose their credit, as in DRR.
+            for author_id in [a for a in self._deficits if not backlogs.get(a)]:
+                del self._deficits[author_id]
+            self._order = deque(a for a in self._order if a in self._deficits)
+            for author_id, backlog in backlogs.items():
+                if backlog and author_id not in self._deficits:
+                    self._deficits[author_id] = 0.0
+                    self._order.append(author_id)
+
+            allocation = Counter()
+            remaining = {a: backlogs[a] for a in self._order}
+            while slots > 0 and any(remaining.values()):
+                for _ in range(len(self._order)):
+                    author_id = self._order[0]
+                    self._order.rotate(-1)
+                    if not remaining[author_id]:
+                        continue
+                    self._deficits[author_id] += self.quantum * weights.get(author_id, 1.0)
+                    take = min(int(self._deficits[author_id]), remaining[author_id], slots)
+                    allocation[author_id] += take
+                    self._deficits[author_id] -= take
+                    remaining[author_id] -= take
+                    slots -= take
+                    if not remaining[author_id]:
+                        self._deficits[author_id] = 0.0
+                    if not slots:
+                        break
+            return allocation
+
+
+def tier_weights(author_ids) -> dict:
+    """
+    Dispatch weight per author, from SCHEDULER_TIER_WEIGHTS ({group name:
+    weight}). An author in several tier groups gets the largest weight.
+    """
+    tiers = settings.SCHEDULER_TIER_WEIGHTS
+    if not tiers:
+        return {}
+    memberships = (
+        get_user_model().objects
+        .filter(pk__in=author_ids, groups__name__in=tiers)
+        .values_list('pk', 'groups__name')
+    )
+    weights = {}
+    for author_id, group in memberships:
+        weights[author_id] = max(weights.get(author_id, 0.0), tiers[group])
+    return weights
+
+
+def fair_candidates(due, batch_size: int, scheduler: DeficitRoundRobin) -> list:
+    """
+    Picks up to `batch_size` ids from the `due` queryset, shared fairly
+    between authors and, within an author, round-robin between accounts.
+
+    Reads at most `batch_size` of the oldest due posts per social account,
+    however deep any one backlog is: see _account_heads.
+    """
+    by_author = defaultdict(list)
+    for account_rank, (post_id, author_id, scheduled_time) in _account_heads(due, batch_size):
+        by_author[author_id].append((account_rank, scheduled_time, post_id))
+
+    allocation = scheduler.allocate(
+        {author_id: len(posts) for author_id, posts in by_author.items()},
+        tier_weights(list(by_author)),
+        batch_size,
+    )
+    ids = []
+    for author_id, take in allocation.items():
+        # Lowest rank first interleaves the author's accounts.
+        ids.extend(post_id for _, _, post_id in sorted(by_author[author_id])[:take])
+    return ids
+
+
+def _account_heads(due, batch_size: int):
+    """
+    Yields (rank within its account, (id, author_id, scheduled_time)) for
+    the `batch_size` oldest posts of each account in `due`.
+
+    A first query finds the accounts with due posts, and which of them have
+    more than `batch_size`. The others' posts are read in one query, and each
+    busier account's oldest posts by a query with a LIMIT, all range scans on
+    poster_account_due_idx, so the cost follows the number of accounts and
+    the batch size, never the depth of any one backlog.
+    """
+    oldest = due.filter(social_account=OuterRef('pk')).order_by('scheduled_time', 'id')
+    accounts = list(
+        SocialAccount.objects
+        .filter(Exists(oldest))
+        .annotate(overflow=Subquery(oldest.values('id')[batch_size - 1:batch_size]))
+        .values_list('pk', 'overflow')
+    )
+    heads = due.order_by().values_list('social_account_id', 'id', 'author_id', 'scheduled_time')
+    light = [pk for pk, overflow in accounts if overflow is None]
+    # Unordered, or the planner may walk the (status, scheduled_time) index
+    # through the whole backlog to skip the sort.
+    queries = [heads.filter(social_account_id__in=light[i:i + ACCOUNTS_PER_QUERY]) for i in range(0, len(light), ACCOUNTS_PER_QUERY)]
+    queries += [
+        heads.filter(social_account_id=pk).order_by('scheduled_time', 'id')[:batch_size]
+        for pk, overflow in accounts if overflow is not None
+    ]
+    for rows in queries:
+        ranks = Counter()
+        for account_id, post_id, author_id, scheduled_time in sorted(rows, key=lambda row: (row[3], row[1])):
+            ranks[account_id] += 1
+            yield ranks[account_id], (post_id, author_id, scheduled_time)
+
+
+# Shared by every claim in this process, so credit carries across batches.
+fair_scheduler = DeficitRoundRobin()
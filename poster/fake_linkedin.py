@@ -0,0 +1,234 @@
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+IMAGE_MECHANISM = 'com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest'
+MULTIPART_MECHANISM = 'com.linkedin.digitalmedia.uploading.MultipartUpload'
+PART_SIZE = 4 * 1024 * 1024
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connects when a worker pool opens its
+    # connections at once, and the client only retries a second later.
+    request_queue_size = 128
+
+
+@dataclass
+class Faults:
+    """How the stand-in misbehaves. Rates are fractions of calls, 0 to 1."""
+    latency: float = 0.0
+    # Extra latency, uniform between 0 and `jitter` seconds.
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    # Retry-After sent with injected 429s.
+    retry_after: float = 1.0
+    # expires_in of the access tokens the OAuth endpoint hands out.
+    token_lifetime: int = 3600
+    # Extra latency on the first call of every connection, standing in for
+    # the TCP and TLS handshakes with the real API.
+    connect_latency: float = 0.0
+    seed: int = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        if self.server.fake.faults.connect_latency:
+            time.sleep(self.server.fake.faults.connect_latency)
+
+    def do_GET(self):
+        self.server.fake.handle(self, 'GET')
+
+    def do_POST(self):
+        self.server.fake.handle(self, 'POST')
+
+    def do_PUT(self):
+        self.server.fake.handle(self, 'PUT')
+
+
+class FakeLinkedIn:
+    """
+    In-process stand-in for the LinkedIn endpoints the publish path calls:
+    the OAuth accessToken grant, assets?action=registerUpload (single and
+    multi-part), the upload URLs, completeMultiPartUpload, and ugcPosts
+    (create and the authored-posts listing used by poster.ledger).
+
+    Every call can be delayed and, at the configured rates, answered with a
+    500 or a 429 instead (see Faults). Calls are counted per endpoint in
+    `calls`, and created posts are kept in `posts`.
+
+    Usage:
+        with FakeLinkedIn(Faults(latency=0.05)) as fake, override_settings(**fake.settings()):
+            post_to_linkedin(account, "Hello")
+    """
+
+    def __init__(self, faults: Faults = None, host: str = '127.0.0.1', port: int = 0):
+        self.faults = faults or Faults()
+        self.calls = Counter()
+        self.posts = []
+        self._random = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def settings(self) -> dict:
+        """Settings that point the services at this server, for override_settings()."""
+        return {
+            'LINKEDIN_API_BASE_URL': f"{self.url}/v2",
+            'LINKEDIN_OAUTH_TOKEN_URL': f"{self.url}/oauth/v2/accessToken",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-linkedin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.posts.clear()
+
+    # --- request handling ---
+
+    def _roll(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self._random.random() < rate
+
+    def _delay(self):
+        delay = self.faults.latency
+        if self.faults.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.faults.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def _reply(self, request, status: int, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        request.send_response(status)
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        if payload:
+            request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def handle(self, request, method: str):
+        url = urlsplit(request.path)
+        length = int(request.headers.get('Content-Length') or 0)
+        body = request.rfile.read(length) if length else b''
+        query = parse_qs(url.query)
+        endpoint = self._endpoint(method, url.path, query)
+        with self._lock:
+            self.calls[endpoint] += 1
+
+        self._delay()
+        if self._roll(self.faults.throttle_rate):
+            return self._reply(request, 429, {'message': 'Throttled'}, {'Retry-After': f"{self.faults.retry_after:g}"})
+        if self._roll(self.faults.error_rate):
+            return self._reply(request, 500, {'message': 'Injected failure'})
+
+        if endpoint == 'accessToken':
+            return self._access_token(request, parse_qs(body.decode()))
+        if endpoint == 'upload':
+            return self._reply(request, 201, headers={'ETag': secrets.token_hex(8)})
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return self._reply(request, 401, {'message': 'Missing access token'})
+        if endpoint == 'registerUpload':
+            return self._register_upload(request, json.loads(body))
+        if endpoint == 'completeMultiPartUpload':
+            return self._reply(request, 200)
+        if endpoint == 'createPost':
+            return self._create_post(request, json.loads(body))
+        if endpoint == 'listPosts':
+            return self._list_posts(request, query)
+        return self._reply(request, 404, {'message': f"No fake for {method} {url.path}"})
+
+    @staticmethod
+    def _endpoint(method: str, path: str, query: dict) -> str:
+        if path == '/oauth/v2/accessToken':
+            return 'accessToken'
+        if path.startswith('/upload/'):
+            return 'upload'
+        if path == '/v2/assets':
+            return query.get('action', [''])[0]
+        if path == '/v2/ugcPosts':
+            return 'listPosts' if method == 'GET' else 'createPost'
+        return path
+
+    def _access_token(self, request, form: dict):
+        if form.get('grant_type', [''])[0] == 'refresh_token' and not form.get('refresh_token'):
+            return self._reply(request, 400, {'error': 'invalid_grant'})
+        return self._reply(request, 200, {
+            'access_token': secrets.token_urlsafe(24),
+            'expires_in': self.faults.token_lifetime,
+            'refresh_token': secrets.token_urlsafe(24),
+            'refresh_token_expires_in': 365 * 86400,
+        })
+
+    def _register_upload(self, request, payload: dict):
+        upload_request = payload['registerUploadRequest']
+        asset_id = secrets.token_hex(8)
+        value = {'asset': f"urn:li:digitalmediaAsset:{asset_id}"}
+        if 'MULTIPART_UPLOAD' in upload_request.get('supportedUploadMechanism', []):
+            size = upload_request['fileSize']
+            expires = int((time.time() + 3600) * 1000)
+            value['mediaArtifact'] = f"urn:li:digitalmediaMediaArtifact:{asset_id}"
+            value['uploadMechanism'] = {MULTIPART_MECHANISM: {
+                'metadata': asset_id,
+                'partUploadRequests': [
+                    {
+                        'url': f"{self.url}/upload/{asset_id}/{index}",
+                        'byteRange': {'firstByte': first, 'lastByte': min(first + PART_SIZE, size) - 1},
+                        'urlExpiresAt': expires,
+                        'headers': {'Content-Type': 'application/octet-stream'},
+                    }
+                    for index, first in enumerate(range(0, size, PART_SIZE))
+                ],
+            }}
+        else:
+            value['uploadMechanism'] = {IMAGE_MECHANISM: {'uploadUrl': f"{self.url}/upload/{asset_id}"}}
+        return self._reply(request, 200, {'value': value})
+
+    def _create_post(self, request, payload: dict):
+        urn = f"urn:li:share:{secrets.randbelow(10 ** 18)}"
+        with self._lock:
+            self.posts.append({'id': urn, 'created': {'time': int(time.time() * 1000)}, **payload})
+        return self._reply(request, 201, headers={'X-RestLi-Id': urn})
+
+    def _list_posts(self, request, query: dict):
+        # authors=List(urn%3Ali%3Aperson%3A...)
+        author = unquote(query.get('authors', [''])[0].removeprefix('List(').removesuffix(')'))
+        count = int(query.get('count', ['10'])[0])
+        with self._lock:
+            elements = [post for post in reversed(self.posts) if post.get('author') == author][:count]
+        return self._reply(request, 200, {'elements': elements})
@@ -0,0 +1,136 @@
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+
+RETRY_STATUS_CODES = frozenset([500, 502, 503, 504])
+
+
+class LinkedInRetry(Retry):
+    """
+    Retry policy for LinkedIn calls: exponential backoff with jitter, honouring
+    Retry-After on 429 and 5xx responses.
+
+    Idempotent methods (GET, PUT, ...) are retried on 429 and 5xx. POST is only
+    retried on 429, where LinkedIn rejected the request without processing it;
+    a 5xx on POST may already have created a post.
+    """
+    RETRY_AFTER_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, settings.LINKEDIN_HTTP_MAX_RETRY_AFTER)
+
+
+class LinkedInSession(requests.Session):
+    """A requests.Session that applies a default (connect, read) timeout to every call."""
+
+    def __init__(self, timeout: tuple):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def build_session() -> LinkedInSession:
+    """
+    Creates a session with keep-alive connection pools sized from settings.
+    """
+    retry = LinkedInRetry(
+        total=settings.LINKEDIN_HTTP_MAX_RETRIES,
+        backoff_factor=settings.LINKEDIN_HTTP_BACKOFF_FACTOR,
+        backoff_jitter=settings.LINKEDIN_HTTP_BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUS_CODES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.LINKEDIN_HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.LINKEDIN_HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = LinkedInSession(
+        timeout=(settings.LINKEDIN_HTTP_CONNECT_TIMEOUT, settings.LINKEDIN_HTTP_READ_TIMEOUT)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> LinkedInSession:
+    """
+    Returns the process-wide LinkedIn session.
+
+    The session is shared by all threads: urllib3's connection pools are
+    thread-safe, and the LinkedIn API does not rely on cookies, so the
+    session carries no per-call state.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+# The same policy for clients that retry by hand (see poster.async_services).
+
+def should_retry(method: str, status_code: int) -> bool:
+    if status_code == 429:
+        return True
+    return status_code in RETRY_STATUS_CODES and method.upper() != 'POST'
+
+
+def parse_retry_after(value: str):
+    """Returns the Retry-After header value in seconds, or None if absent or malformed."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def was_throttled(response) -> bool:
+    """
+    Whether LinkedIn answered 429 to this call, including attempts the
+    transport already retried: urllib3 keeps them in the retry history, and
+    poster.async_services marks them in the response's extensions.
+    """
+    if response.status_code == 429:
+        return True
+    retries = getattr(getattr(response, 'raw', None), 'retries', None)
+    if retries is not None:
+        return any(entry.status == 429 for entry in retries.history)
+    return bool(getattr(response, 'extensions', {}).get('throttled'))
+
+
+def retry_delay(attempt: int, retry_after: float = None) -> float:
+    """Seconds to wait before retry number `attempt` (0-based)."""
+    if retry_after is not None:
+        return min(retry_after, settings.LINKEDIN_HTTP_MAX_RETRY_AFTER)
+    backoff = settings.LINKEDIN_HTTP_BACKOFF_FACTOR * (2 ** attempt)
+    return backoff + random.uniform(0, settings.LINKEDIN_HTTP_BACKOFF_JITTER)
@@ -0,0 +1,282 @@
+import logging
+from datetime import timedelta
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .async_services import aprepare_linkedin_post, asend_linkedin_post
+from .models import AttemptState, MediaStatus, PublishAttempt, SchedulePost, Status
+from .payloads import compiled_payload
+from .services import (
+    LinkedInRateLimited,
+    find_published_post,
+    prepare_linkedin_post,
+    send_linkedin_post,
+)
+
+logger = logging.getLogger(__name__)
+
+# Allowance for our clock running ahead of LinkedIn's when matching created times.
+CLOCK_SKEW = timedelta(minutes=5)
+# Transport errors raised before the request left, so LinkedIn cannot have seen it.
+_NOT_SENT = (requests.ConnectTimeout, httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class AttemptInProgress(Exception):
+    """Raised when another worker already has a request in flight for the post."""
+    pass
+
+
+class AlreadyPublished(Exception):
+    """Raised when another worker's attempt for the post has already succeeded."""
+    def __init__(self, urn: str):
+        super().__init__(f"Already published as {urn}.")
+        self.urn = urn
+
+
+def _media_kwargs(post: SchedulePost) -> dict:
+    """
+    Media arguments for the publish call. A post whose media was staged ahead
+    of time passes its asset URN, so publishing is just the ugcPosts create.
+    """
+    if not post.media_file:
+        return {}
+    kwargs = {'media_path': post.media_file.path}
+    if post.media_status == MediaStatus.READY:
+        kwargs['asset_urn'] = post.media_asset_urn
+    return kwargs
+
+
+def _outcome_unknown(error: Exception) -> bool:
+    """
+    Whether a failed ugcPosts call may still have created the post: a 5xx,
+    or a transport error (e.g. a read timeout) after the request was sent.
+    """
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return status_code >= 500
+    cause = error.__cause__
+    return isinstance(cause, (requests.RequestException, httpx.HTTPError)) and not isinstance(cause, _NOT_SENT)
+
+
+def _finish(attempt: PublishAttempt, state: str, urn: str = '', error: str = ''):
+    attempt.state = state
+    attempt.linkedin_post_urn = urn or ''
+    attempt.error_message = error
+    attempt.finished_at = timezone.now()
+    attempt.save(update_fields=['state', 'linkedin_post_urn', 'error_message', 'finished_at'])
+
+
+def _record_success(attempt: PublishAttempt, urn: str):
+    """
+    Marks the attempt SUCCEEDED. Should another attempt have become live
+    meanwhile (ours was settled as dead), the post is still out: log it
+    rather than fail the post.
+    """
+    try:
+        with transaction.atomic():
+            _finish(attempt, AttemptState.SUCCEEDED, urn=urn)
+    except IntegrityError:
+        logger.error("Post %s went out as %s while another attempt was live; attempt %s not recorded",
+                     attempt.post_id, urn, attempt.idempotency_key)
+
+
+def settle_attempts(post: SchedulePost) -> str:
+    """
+    Resolves the post's earlier attempts before anything is sent again.
+
+    A SUCCEEDED attempt means the post is already out. A PENDING or UNKNOWN
+    one (the worker died mid-request, or the request timed out) is looked up
+    among the member's recent posts and marked SUCCEEDED or FAILED. A PENDING
+    attempt younger than SCHEDULER_LEASE_TTL may still be in flight, so it is
+    left alone.
+
+    Returns:
+        The URN of the post if it is already on LinkedIn, else None.
+
+    Raises:
+        AttemptInProgress: If a PENDING attempt is too recent to settle.
+        LinkedInAPIError: If LinkedIn could not be asked; the attempt stays unsettled.
+    """
+    unsettled = list(post.attempts.exclude(state=AttemptState.FAILED).order_by('started_at'))
+    for attempt in unsettled:
+        if attempt.state == AttemptState.SUCCEEDED:
+            return attempt.linkedin_post_urn
+    live_since = timezone.now() - timedelta(seconds=settings.SCHEDULER_LEASE_TTL)
+    if any(a.state == AttemptState.PENDING and a.started_at > live_since for a in unsettled):
+        raise AttemptInProgress(f"Post {post.pk} has a publish attempt that may still be in flight.")
+    for attempt in unsettled:
+        urn = find_published_post(post.social_account, post.content, since=attempt.started_at - CLOCK_SKEW)
+        if urn:
+            logger.info("Attempt %s for post %s did publish, as %s", attempt.idempotency_key, post.pk, urn)
+            _record_success(attempt, urn)
+            return urn
+        _finish(attempt, AttemptState.FAILED, error="Not found on LinkedIn when reconciled.")
+    return None
+
+
+def begin_attempt(post: SchedulePost) -> PublishAttempt:
+    """
+    Records a PENDING attempt. The database allows one PENDING or SUCCEEDED
+    attempt per post, so the check and the insert are one step: an attempt
+    that went in since settle_attempts() ran makes this fail.
+
+    Raises:
+        AlreadyPublished: If another attempt for the post has SUCCEEDED.
+        AttemptInProgress: If another attempt for the post is PENDING.
+    """
+    try:
+        with transaction.atomic():
+            return PublishAttempt.objects.create(post=post)
+    except IntegrityError:
+        succeeded = post.attempts.filter(state=AttemptState.SUCCEEDED).first()
+        if succeeded is not None:
+            raise AlreadyPublished(succeeded.linkedin_post_urn)
+        raise AttemptInProgress(f"Post {post.pk} already has a publish attempt in flight.")
+
+
+def publish_once(post: SchedulePost) -> str:
+    """
+    Publishes a claimed post so that it appears on LinkedIn at most once, no
+    matter how often this is retried or how many workers run it.
+
+    Returns:
+        The URN of the LinkedIn post.
+
+    Raises:
+        LinkedInRateLimited: Out of quota; nothing was sent.
+        AttemptInProgress: Another worker is publishing the post.
+        LinkedInAPIError: The attempt failed; if it may have gone through it
+            is left UNKNOWN and reconciled on the next try.
+    """
+    urn = settle_attempts(post)
+    if urn:
+        return urn
+
+    prepared = prepare_linkedin_post(post.social_account, post.content, compiled=compiled_payload(post), **_media_kwargs(post))
+    try:
+        attempt = begin_attempt(post)
+    except AlreadyPublished as e:
+        return e.urn
+    try:
+        result = send_linkedin_post(post.social_account, prepared)
+    except LinkedInRateLimited:
+        attempt.delete()
+        raise
+    except Exception as e:
+        _finish(attempt, AttemptState.UNKNOWN if _outcome_unknown(e) else AttemptState.FAILED, error=str(e))
+        raise
+    _record_success(attempt, result['id'])
+    return result['id']
+
+
+async def apublish_once(post: SchedulePost) -> str:
+    """
+    Async variant of publish_once.
+    """
+    urn = await sync_to_async(settle_attempts)(post)
+    if urn:
+        return urn
+
+    prepared = await aprepare_linkedin_post(
+        post.social_account, post.content, compiled=compiled_payload(post), **_media_kwargs(post),
+    )
+    try:
+        attempt = await sync_to_async(begin_attempt)(post)
+    except AlreadyPublished as e:
+        return e.urn
+    try:
+        result = await asend_linkedin_post(post.social_account, prepared)
+    except LinkedInRateLimited:
+        await attempt.adelete()
+        raise
+    except Exception as e:
+        state = AttemptState.UNKNOWN if _outcome_unknown(e) else AttemptState.FAILED
+        await sync_to_async(_finish)(attempt, state, error=str(e))
+        raise
+    await sync_to_async(_record_success)(attempt, result['id'])
+    return result['id']
+
+
+# Columns a publish outcome writes, see complete_post().
+OUTCOME_FIELDS = [
+    'status', 'claimed_by', 'published_at', 'error_message', 'next_attempt_at', 'failed_attempts', 'linkedin_post_urn',
+    'updated_at',
+]
+
+
+def complete_post(post: SchedulePost) -> bool:
+    """
+    Moves a claimed post from PUBLISHING to the outcome set on `post`
+    (PUBLISHED, FAILED, DEAD, or back to SCHEDULED), as one compare-and-set.
+
+    Returns:
+        False if the post was no longer PUBLISHING under this node's claim,
+        e.g. because its lease expired and another node took it over; the row
+        is then left alone.
+    """
+    updated = SchedulePost.objects.filter(pk=post.pk, status=Status.PUBLISHING, claimed_by=post.claimed_by).update(
+        status=post.status,
+        claimed_by='',
+        published_at=post.published_at,
+        error_message=post.error_message,
+        next_attempt_at=post.next_attempt_at,
+        failed_attempts=post.failed_attempts,
+        linkedin_post_urn=post.linkedin_post_urn,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        logger.warning("Post %s was no longer PUBLISHING; its %s outcome was not recorded", post.pk, post.status)
+    return bool(updated)
+
+
+def complete_posts(posts: list) -> int:
+    """
+    Batch variant of complete_post: records the outcomes of posts claimed by
+    the same node with one bulk UPDATE, under the same compare-and-set.
+
+    Returns:
+        How many rows were updated; posts no longer PUBLISHING under the
+        node's claim are left alone.
+    """
+    if not posts:
+        return 0
+    node = posts[0].claimed_by
+    now = timezone.now()
+    for post in posts:
+        post.claimed_by = ''
+        post.updated_at = now
+    try:
+        updated = SchedulePost.objects.filter(status=Status.PUBLISHING, claimed_by=node).bulk_update(posts, OUTCOME_FIELDS)
+    except Exception:
+        for post in posts:
+            post.claimed_by = node
+        raise
+    if updated < len(posts):
+        logger.warning("%d of %d posts were no longer PUBLISHING; their outcomes were not recorded", len(posts) - updated, len(posts))
+    return updated
+
+
+def requeue_in_flight(node: str = '', claimed_before=None) -> int:
+    """
+    Hands posts left PUBLISHING under `node`'s claim back to the schedule,
+    e.g. after the dispatcher holding them died before recording outcomes.
+
+    Nothing is lost by this: when the posts are claimed again, publish_once()
+    replays them from their attempts, so a post that did go out is recorded
+    as PUBLISHED without another ugcPosts call.
+
+    Args:
+        claimed_before: Only posts claimed (or last touched) before this time.
+
+    Returns:
+        How many posts were handed back.
+    """
+    posts = SchedulePost.objects.filter(status=Status.PUBLISHING, claimed_by=node)
+    if claimed_before is not None:
+        posts = posts.filter(updated_at__lt=claimed_before)
+    return posts.update(status=Status.SCHEDULED, claimed_by='', updated_at=timezone.now())
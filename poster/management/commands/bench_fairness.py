@@ -0,0 +1,92 @@
+import math
+import time
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from allauth.socialaccount.models import SocialAccount
+
+from poster.dispatcher import claim_due_posts
+from poster.models import SchedulePost, Status
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulates one heavy user and many light users all due at the same moment, drains the "
+        "backlog with the real claim query, and reports p50/p99 schedule lag per user for "
+        "fair and FIFO dispatch. Runs in a transaction that is rolled back; nothing is published."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--heavy-posts', type=int, default=20000, help="Posts queued by the heavy user.")
+        parser.add_argument('--light-users', type=int, default=100, help="Number of light users.")
+        parser.add_argument('--light-posts', type=int, default=3, help="Posts queued by each light user.")
+        parser.add_argument('--batch-size', type=int, default=100, help="Posts claimed per transaction.")
+        parser.add_argument('--rate', type=float, default=50.0, help="Simulated publish throughput in posts per second.")
+        parser.add_argument('--per-user', action='store_true', help="Print a line for every light user too.")
+
+    def handle(self, *args, **options):
+        for fair in (True, False):
+            with transaction.atomic():
+                self._run(fair, options)
+                transaction.set_rollback(True)
+
+    def _populate(self, options, due_at):
+        User = get_user_model()
+        counts = {'bench-heavy': options['heavy_posts']}
+        counts.update({f"bench-light-{i}": options['light_posts'] for i in range(options['light_users'])})
+
+        posts = []
+        for username, count in counts.items():
+            user = User.objects.create(username=username)
+            account = SocialAccount.objects.create(user=user, provider='linkedin_oauth2', uid=username)
+            posts.extend(
+                SchedulePost(author=user, social_account=account, content='bench', status=Status.SCHEDULED, scheduled_time=due_at)
+                for _ in range(count)
+            )
+        SchedulePost.objects.bulk_create(posts, batch_size=1000)
+        return dict(User.objects.filter(username__in=counts).values_list('pk', 'username'))
+
+    def _run(self, fair: bool, options):
+        due_at = timezone.now()
+        usernames = self._populate(options, due_at)
+
+        lags = defaultdict(list)
+        position = 0
+        claims = 0
+        claim_time = 0.0
+        while True:
+            started = time.perf_counter()
+            posts = claim_due_posts(options['batch_size'], now=due_at, fair=fair)
+            claim_time += time.perf_counter() - started
+            if not posts:
+                break
+            claims += 1
+            for post in posts:
+                position += 1
+                # Posts finish in claim order at the simulated publish rate.
+                lags[usernames[post.author_id]].append(position / options['rate'])
+
+        mode = "fair" if fair else "fifo"
+        self.stdout.write(f"\n[{mode}] {position} posts in {claims} claims, {1000 * claim_time / max(claims, 1):.1f} ms per claim")
+        heavy = lags.pop('bench-heavy')
+        self._line('heavy user', heavy)
+        light_all = [lag for user_lags in lags.values() for lag in user_lags]
+        self._line('light users (all posts)', light_all)
+        worst = max(lags.items(), key=lambda item: _percentile(item[1], 0.99))
+        self._line(f'worst light user ({worst[0]})', worst[1])
+        if options['per_user']:
+            for username, user_lags in sorted(lags.items()):
+                self._line(username, user_lags)
+
+    def _line(self, label: str, lags: list):
+        self.stdout.write(
+            f"  {label:<36} p50 {_percentile(lags, 0.5):>8.1f}s   p99 {_percentile(lags, 0.99):>8.1f}s   ({len(lags)} posts)"
+        )
@@ -0,0 +1,226 @@
+import json
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import override_settings
+from django.utils import timezone
+from allauth.socialaccount.models import SocialAccount, SocialApp, SocialToken
+
+from poster.dispatcher import publish_post
+from poster.fake_linkedin import Faults, FakeLinkedIn
+from poster.models import SchedulePost, Status
+from poster.payloads import compile_post
+from poster.tokens import token_cache
+from social_scheduler.metrics import QueryCounter
+
+USERNAME = 'bench-publish'
+SCENARIOS = ['single', 'media', 'concurrent', 'token-storm']
+# A regression is flagged when a figure is this much worse than the baseline.
+DEFAULT_TOLERANCE = 0.25
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def _timed_publish(post: SchedulePost) -> tuple:
+    """Publishes one claimed post; returns (seconds, queries, status)."""
+    close_old_connections()
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        publish_post(post)
+    return time.perf_counter() - started, counter.count, post.status
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives the publish path (ledger, token cache, media upload, ugcPosts) against the in-process "
+        "LinkedIn stand-in in poster.fake_linkedin and reports posts/s, p50/p95/p99 latency, DB queries "
+        "per publish and peak traced memory per scenario. Creates a '%s' user for the run and deletes it "
+        "afterwards. With --baseline, exits with an error when a scenario regressed." % USERNAME
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run, out of {', '.join(SCENARIOS)} (default: all).")
+        parser.add_argument('--posts', type=int, default=200, help="Posts published per scenario.")
+        parser.add_argument('--accounts', type=int, default=20, help="Accounts in the concurrent and token-storm scenarios.")
+        parser.add_argument('--workers', type=int, default=16, help="Publishing threads in the concurrent scenarios.")
+        parser.add_argument('--media-size', type=int, default=256 * 1024, help="Bytes per media file.")
+        parser.add_argument('--latency', type=float, default=0.02, help="Seconds the stand-in waits before answering.")
+        parser.add_argument('--jitter', type=float, default=0.0, help="Extra random latency, up to this many seconds.")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of calls answered 500.")
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of calls answered 429.")
+        parser.add_argument('--no-memory', action='store_true', help="Skip the traced pass that measures peak memory.")
+        parser.add_argument('--save', help="Write the results to this JSON file.")
+        parser.add_argument('--baseline', help="Compare against results saved earlier with --save.")
+        parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown vs. the baseline.")
+
+    def handle(self, *args, **options):
+        unknown = set(options['scenarios']) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        faults = Faults(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            throttle_rate=options['throttle_rate'],
+            retry_after=0,
+            seed=0,
+        )
+        results = {}
+        with tempfile.TemporaryDirectory() as media_root, FakeLinkedIn(faults) as fake, override_settings(
+            MEDIA_ROOT=media_root,
+            # The benchmark measures the pipeline, not the quota.
+            LINKEDIN_MEMBER_DAILY_LIMIT=10 ** 9,
+            LINKEDIN_MEMBER_BURST=10 ** 6,
+            LINKEDIN_APP_DAILY_LIMIT=10 ** 9,
+            LINKEDIN_APP_BURST=10 ** 6,
+            **fake.settings(),
+        ):
+            for scenario in options['scenarios'] or SCENARIOS:
+                results[scenario] = self._scenario(scenario, fake, options)
+                self._report(scenario, results[scenario])
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2)
+        if options['baseline']:
+            self._compare(results, options['baseline'], options['tolerance'])
+
+    # --- scenarios ---
+
+    def _scenario(self, scenario: str, fake: FakeLinkedIn, options) -> dict:
+        fake.reset()
+        result = self._run(scenario, options)
+        result['calls'] = dict(fake.calls)
+        if not options['no_memory']:
+            tracemalloc.start()
+            try:
+                self._run(scenario, options)
+                result['peak_memory_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+            finally:
+                tracemalloc.stop()
+        return result
+
+    def _run(self, scenario: str, options) -> dict:
+        concurrent = scenario in ('concurrent', 'token-storm')
+        posts = self._populate(
+            options,
+            accounts=options['accounts'] if concurrent else 1,
+            media=scenario == 'media',
+            expired=scenario == 'token-storm',
+        )
+        try:
+            started = time.perf_counter()
+            if concurrent:
+                with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                    outcomes = list(executor.map(_timed_publish, posts))
+            else:
+                outcomes = [_timed_publish(post) for post in posts]
+            elapsed = time.perf_counter() - started
+        finally:
+            get_user_model().objects.filter(username=USERNAME).delete()
+            SocialApp.objects.filter(name=USERNAME).delete()
+
+        latencies = [seconds for seconds, _, _ in outcomes]
+        published = sum(1 for _, _, post_status in outcomes if post_status == Status.PUBLISHED)
+        return {
+            'posts': len(outcomes),
+            'published': published,
+            'elapsed': elapsed,
+            'posts_per_second': len(outcomes) / elapsed if elapsed else 0.0,
+            'p50_ms': 1000 * _percentile(latencies, 0.5),
+            'p95_ms': 1000 * _percentile(latencies, 0.95),
+            'p99_ms': 1000 * _percentile(latencies, 0.99),
+            'queries_per_publish': sum(queries for _, queries, _ in outcomes) / max(len(outcomes), 1),
+        }
+
+    def _populate(self, options, accounts: int, media: bool, expired: bool) -> list:
+        User = get_user_model()
+        User.objects.filter(username=USERNAME).delete()
+        user = User.objects.create(username=USERNAME)
+        app, _ = SocialApp.objects.get_or_create(
+            name=USERNAME, defaults={'provider': 'linkedin_oauth2', 'client_id': USERNAME, 'secret': USERNAME},
+        )
+        # Expired tokens are refreshed by the first post of each account.
+        expires_at = timezone.now() + (timedelta(hours=-1) if expired else timedelta(days=30))
+        social_accounts = []
+        for i in range(accounts):
+            account = SocialAccount.objects.create(user=user, provider='linkedin_oauth2', uid=f"{USERNAME}-{i}")
+            SocialToken.objects.create(app=app, account=account, token=f"token-{i}", token_secret=f"refresh-{i}", expires_at=expires_at)
+            token_cache.invalidate(account.pk)
+            social_accounts.append(account)
+
+        now = timezone.now()
+        posts = []
+        for i in range(options['posts']):
+            post = SchedulePost(
+                author=user,
+                social_account=social_accounts[i % accounts],
+                content=f"Benchmark post {i} {now.isoformat()}",
+                status=Status.PUBLISHING,
+                scheduled_time=now,
+            )
+            if media:
+                # Distinct bytes per file, so every post really uploads.
+                name = f"bench/{i}.png"
+                path = os.path.join(settings.MEDIA_ROOT, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(os.urandom(options['media_size']))
+                post.media_file.name = name
+            # What saving through the API would have stored (media posts are
+            # compiled once staged, so these publish without a payload).
+            compile_post(post)
+            posts.append(post)
+        SchedulePost.objects.bulk_create(posts)
+        return list(SchedulePost.objects.filter(author=user).select_related('social_account').order_by('id'))
+
+    # --- reporting ---
+
+    def _report(self, scenario: str, result: dict):
+        memory = f"   peak {result['peak_memory_kb']:>7} KiB" if 'peak_memory_kb' in result else ""
+        self.stdout.write(
+            f"{scenario:<12} {result['published']:>5}/{result['posts']:<5} published   "
+            f"{result['posts_per_second']:>7.1f} posts/s   p50 {result['p50_ms']:>7.1f} ms   "
+            f"p95 {result['p95_ms']:>7.1f} ms   p99 {result['p99_ms']:>7.1f} ms   "
+            f"{result['queries_per_publish']:>5.1f} queries/publish{memory}"
+        )
+        self.stdout.write(f"{'':<12} LinkedIn calls: {', '.join(f'{k} {v}' for k, v in sorted(result['calls'].items()))}")
+
+    def _compare(self, results: dict, path: str, tolerance: float):
+        with open(path) as f:
+            baseline = json.load(f)
+        regressions = []
+        for scenario, result in results.items():
+            before = baseline.get(scenario)
+            if not before:
+                continue
+            if result['posts_per_second'] < before['posts_per_second'] * (1 - tolerance):
+                regressions.append(f"{scenario}: {result['posts_per_second']:.1f} posts/s (was {before['posts_per_second']:.1f})")
+            if result['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+                regressions.append(f"{scenario}: p99 {result['p99_ms']:.1f} ms (was {before['p99_ms']:.1f})")
+            if result['queries_per_publish'] > before['queries_per_publish']:
+                regressions.append(
+                    f"{scenario}: {result['queries_per_publish']:.1f} queries/publish (was {before['queries_per_publish']:.1f})"
+                )
+            if 'peak_memory_kb' in result and 'peak_memory_kb' in before and (
+                result['peak_memory_kb'] > before['peak_memory_kb'] * (1 + tolerance)
+            ):
+                regressions.append(f"{scenario}: peak {result['peak_memory_kb']} KiB (was {before['peak_memory_kb']})")
+        if regressions:
+            raise CommandError("Regressions against %s:\n  %s" % (path, "\n  ".join(regressions)))
+        self.stdout.write(f"No regressions against {path} (tolerance {tolerance:.0%}).")
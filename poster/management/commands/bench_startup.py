@@ -0,0 +1,171 @@
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from allauth.socialaccount.models import SocialAccount, SocialApp, SocialToken
+
+from poster.fake_linkedin import Faults, FakeLinkedIn
+from poster.models import SchedulePost, Status
+from poster.payloads import compile_post
+
+USERNAME = 'bench-startup'
+# (settings module, dispatch_posts command line) per entrypoint, run from BASE_DIR.
+ENTRYPOINTS = {
+    'manage.py': ('social_scheduler.settings', ['manage.py', 'dispatch_posts', '--no-warm-up']),
+    'worker.py': ('social_scheduler.worker_settings', ['worker.py', '--no-warm-up']),
+    'worker.py+warm': ('social_scheduler.worker_settings', ['worker.py']),
+}
+# What a worker imports before it can claim anything.
+SETUP_PROBE = "import django; django.setup(); import poster.dispatcher"
+# Longest a started dispatcher gets to publish the backlog.
+RUN_TIMEOUT = 120
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares how soon a freshly started dispatcher publishes, started through manage.py or through "
+        "worker.py (with and without warm-up), against the LinkedIn stand-in in poster.fake_linkedin. "
+        "Each run schedules a batch of posts and starts a process; by default the posts are already due "
+        "and the process runs with --once, with --due-in they fall due while it is idle. Reports the median "
+        "time to Django setup alone, and to the first and last post reaching LinkedIn, counted from the "
+        "process start or the due time, whichever is later. Creates a '%s' user for the run and deletes it "
+        "afterwards." % USERNAME
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('entrypoints', nargs='*', help=f"Entrypoints to run, out of {', '.join(ENTRYPOINTS)} (default: all).")
+        parser.add_argument('--runs', type=int, default=5, help="Process starts per entrypoint.")
+        parser.add_argument('--posts', type=int, default=50, help="Posts scheduled per run.")
+        parser.add_argument('--accounts', type=int, default=10, help="Accounts the posts are spread over.")
+        parser.add_argument('--workers', type=int, default=16, help="Publishing threads of the started dispatcher.")
+        parser.add_argument('--async', action='store_true', dest='use_async', help="Start the asyncio dispatcher.")
+        parser.add_argument('--due-in', type=float, default=0.0, help="Seconds after the process start the posts fall due.")
+        parser.add_argument('--expired', action='store_true', help="Start with expired tokens, so each account refreshes first.")
+        parser.add_argument('--latency', type=float, default=0.02, help="Seconds the stand-in waits before answering.")
+        parser.add_argument('--connect-latency', type=float, default=0.1, help="Extra seconds per new connection (handshakes).")
+
+    def handle(self, *args, **options):
+        unknown = set(options['entrypoints']) - set(ENTRYPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown entrypoints: {', '.join(sorted(unknown))}")
+        # The started dispatchers publish everything due, not just ours.
+        if SchedulePost.objects.filter(status=Status.SCHEDULED).exclude(author__username=USERNAME).exists():
+            raise CommandError("Other users have scheduled posts; run this against a scratch database.")
+
+        faults = Faults(latency=options['latency'], connect_latency=options['connect_latency'], seed=0)
+        with FakeLinkedIn(faults) as fake:
+            env = {
+                **os.environ,
+                **fake.settings(),
+                # The benchmark measures startup, not the quota.
+                'LINKEDIN_MEMBER_DAILY_LIMIT': str(10 ** 9),
+                'LINKEDIN_MEMBER_BURST': str(10 ** 6),
+                'SCHEDULER_MAX_WORKERS': str(options['workers']),
+                'METRICS_ENABLED': 'False',
+            }
+            self.stdout.write(
+                f"{options['posts']} posts over {options['accounts']} accounts, {options['workers']} workers, "
+                f"due {options['due_in']:g}s after start; median of {options['runs']} runs, in ms:"
+            )
+            for name in options['entrypoints'] or ENTRYPOINTS:
+                self._report(name, self._entrypoint(name, fake, env, options))
+
+    # --- runs ---
+
+    def _entrypoint(self, name: str, fake: FakeLinkedIn, env: dict, options) -> dict:
+        settings_module, argv = ENTRYPOINTS[name]
+        if options['use_async']:
+            argv = [*argv, '--async']
+        env = {**env, 'DJANGO_SETTINGS_MODULE': settings_module}
+        runs = {'setup': [], 'first_post': [], 'last_post': []}
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            self._run([sys.executable, '-c', SETUP_PROBE], env)
+            runs['setup'].append(1000 * (time.perf_counter() - started))
+
+            fake.reset()
+            due = self._populate(options)
+            try:
+                started = time.time()
+                if options['due_in']:
+                    self._run_until_published(name, [sys.executable, *argv], env, fake, options['posts'])
+                else:
+                    self._run([sys.executable, *argv, '--once'], env)
+            finally:
+                get_user_model().objects.filter(username=USERNAME).delete()
+                SocialApp.objects.filter(name=USERNAME).delete()
+
+            created = sorted(post['created']['time'] / 1000 for post in fake.posts)
+            if len(created) != options['posts']:
+                raise CommandError(f"{name} published {len(created)} of {options['posts']} posts.")
+            since = max(started, due.timestamp())
+            runs['first_post'].append(1000 * (created[0] - since))
+            runs['last_post'].append(1000 * (created[-1] - since))
+        return {key: statistics.median(values) for key, values in runs.items()}
+
+    def _run(self, argv: list, env: dict):
+        result = subprocess.run(
+            argv, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            text=True, timeout=RUN_TIMEOUT,
+        )
+        if result.returncode:
+            raise CommandError(f"{' '.join(argv[1:])} failed:\n{result.stderr}")
+
+    def _run_until_published(self, name: str, argv: list, env: dict, fake: FakeLinkedIn, posts: int):
+        """Runs the dispatch loop until every post reached LinkedIn, then interrupts it."""
+        process = subprocess.Popen(
+            argv, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        deadline = time.monotonic() + RUN_TIMEOUT
+        while len(fake.posts) < posts and process.poll() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        process.send_signal(signal.SIGINT)
+        _, stderr = process.communicate(timeout=RUN_TIMEOUT)
+        if len(fake.posts) < posts and process.returncode:
+            raise CommandError(f"{name} failed:\n{stderr}")
+
+    def _populate(self, options):
+        """Schedules the run's posts; returns their due time."""
+        User = get_user_model()
+        User.objects.filter(username=USERNAME).delete()
+        user = User.objects.create(username=USERNAME)
+        app, _ = SocialApp.objects.get_or_create(
+            name=USERNAME, defaults={'provider': 'linkedin_oauth2', 'client_id': USERNAME, 'secret': USERNAME},
+        )
+        expires_at = timezone.now() + (timedelta(hours=-1) if options['expired'] else timedelta(days=30))
+        accounts = []
+        for i in range(options['accounts']):
+            account = SocialAccount.objects.create(user=user, provider='linkedin_oauth2', uid=f"{USERNAME}-{i}")
+            SocialToken.objects.create(app=app, account=account, token=f"token-{i}", token_secret=f"refresh-{i}", expires_at=expires_at)
+            accounts.append(account)
+
+        due = timezone.now() + timedelta(seconds=options['due_in'])
+        posts = []
+        for i in range(options['posts']):
+            post = SchedulePost(
+                author=user,
+                social_account=accounts[i % len(accounts)],
+                content=f"Startup benchmark post {i} {due.isoformat()}",
+                status=Status.SCHEDULED,
+                scheduled_time=due,
+            )
+            compile_post(post)
+            posts.append(post)
+        SchedulePost.objects.bulk_create(posts)
+        return due
+
+    # --- reporting ---
+
+    def _report(self, name: str, result: dict):
+        self.stdout.write(
+            f"{name:<16} setup {result['setup']:>7.0f}   first post {result['first_post']:>7.0f}   "
+            f"last post {result['last_post']:>7.0f}"
+        )
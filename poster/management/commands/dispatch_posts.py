@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from poster.cluster import Membership
+from poster.dispatcher import AsyncDispatcher, Dispatcher
+from social_scheduler.metrics import serve_metrics
+
+
+class Command(BaseCommand):
+    help = "Publishes due scheduled posts to LinkedIn from a thread pool or an asyncio event loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Posts claimed per transaction.")
+        parser.add_argument('--workers', type=int, help="Size of the publishing thread pool.")
+        parser.add_argument('--async', action='store_true', dest='use_async', help="Publish on an asyncio event loop instead of threads.")
+        parser.add_argument('--concurrency', type=int, help="Posts in flight at once with --async.")
+        parser.add_argument('--resync-interval', type=float, help="Max seconds between reloads of upcoming due times.")
+        parser.add_argument('--once', action='store_true', help="Publish what is due now and exit.")
+        parser.add_argument(
+            '--node', help="Join the dispatcher cluster under this name (implied by SCHEDULER_CLUSTERED).",
+        )
+        parser.add_argument('--no-warm-up', action='store_false', dest='warm_up', help="Start claiming without warming up connections and tokens.")
+        parser.add_argument('--metrics-port', type=int, help="Serve Prometheus metrics on this port (needs METRICS_ENABLED).")
+        parser.add_argument('--metrics-host', default='127.0.0.1', help="Address to serve metrics on (default: local only).")
+
+    def handle(self, *args, **options):
+        membership = None
+        if options['node'] or settings.SCHEDULER_CLUSTERED:
+            membership = Membership(options['node'] or settings.SCHEDULER_NODE_NAME or None)
+        if options['use_async']:
+            dispatcher = AsyncDispatcher(
+                batch_size=options['batch_size'],
+                concurrency=options['concurrency'],
+                resync_interval=options['resync_interval'],
+                membership=membership,
+            )
+            mode = f"{dispatcher.concurrency} concurrent tasks"
+        else:
+            dispatcher = Dispatcher(
+                batch_size=options['batch_size'],
+                max_workers=options['workers'],
+                resync_interval=options['resync_interval'],
+                membership=membership,
+            )
+            mode = f"{dispatcher.max_workers} workers"
+        if membership:
+            mode += f", node {membership.name} ({len(membership.partitions)} partitions)"
+        if options['metrics_port']:
+            serve_metrics(options['metrics_port'], options['metrics_host'])
+            mode += f", metrics on {options['metrics_host']}:{options['metrics_port']}"
+        try:
+            if options['warm_up']:
+                self.stdout.write(str(dispatcher.warm_up()))
+            if options['once']:
+                self.stdout.write(str(dispatcher.run_once()))
+            else:
+                self.stdout.write(f"Dispatching with {mode}, batches of {dispatcher.batch_size}.")
+                dispatcher.run_forever(on_batch=lambda stats: self.stdout.write(str(stats)))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping dispatcher; waiting for in-flight posts.")
+        finally:
+            dispatcher.shutdown()
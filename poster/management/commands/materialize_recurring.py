@@ -0,0 +1,26 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from poster.recurrence import materialize
+
+
+class Command(BaseCommand):
+    help = "Turns occurrences of recurring series due within the horizon into scheduled posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, help="Materialize occurrences due within this many seconds.")
+        parser.add_argument('--batch-size', type=int, help="Series read per query.")
+        parser.add_argument('--loop', action='store_true', help="Keep materializing every RECURRING_INTERVAL seconds.")
+
+    def handle(self, *args, **options):
+        horizon = timedelta(seconds=options['horizon']) if options['horizon'] else None
+        while True:
+            report = materialize(horizon=horizon, batch_size=options['batch_size'])
+            if report.posts or not options['loop']:
+                self.stdout.write(str(report))
+            if not options['loop']:
+                break
+            time.sleep(settings.RECURRING_INTERVAL)
@@ -0,0 +1,32 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from poster.sweeper import sweep_tokens
+
+
+class Command(BaseCommand):
+    help = "Refreshes LinkedIn tokens that are about to expire, ahead of the publish path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, help="Refresh tokens expiring within this many seconds.")
+        parser.add_argument('--batch-size', type=int, help="Tokens written back per bulk update.")
+        parser.add_argument('--concurrency', type=int, help="Refresh calls in flight at once.")
+        parser.add_argument('--rate', type=float, help="Max refresh calls per second.")
+        parser.add_argument('--loop', action='store_true', help="Keep sweeping every TOKEN_SWEEP_INTERVAL seconds.")
+
+    def handle(self, *args, **options):
+        horizon = timedelta(seconds=options['horizon']) if options['horizon'] else None
+        while True:
+            report = sweep_tokens(
+                horizon=horizon,
+                batch_size=options['batch_size'],
+                concurrency=options['concurrency'],
+                rate=options['rate'],
+            )
+            self.stdout.write(str(report))
+            if not options['loop']:
+                break
+            time.sleep(settings.TOKEN_SWEEP_INTERVAL)
@@ -0,0 +1,31 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from poster.staging import stage_media
+
+
+class Command(BaseCommand):
+    help = "Uploads media for posts due soon, so publishing them is a single API call."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lead-time', type=int, help="Stage posts due within this many seconds.")
+        parser.add_argument('--batch-size', type=int, help="Posts claimed per pass.")
+        parser.add_argument('--concurrency', type=int, help="Uploads in flight at once.")
+        parser.add_argument('--loop', action='store_true', help="Keep staging every MEDIA_STAGING_INTERVAL seconds.")
+
+    def handle(self, *args, **options):
+        lead = timedelta(seconds=options['lead_time']) if options['lead_time'] else None
+        while True:
+            report = stage_media(
+                batch_size=options['batch_size'],
+                lead=lead,
+                concurrency=options['concurrency'],
+            )
+            if report.total or not options['loop']:
+                self.stdout.write(str(report))
+            if not options['loop']:
+                break
+            time.sleep(settings.MEDIA_STAGING_INTERVAL)
@@ -0,0 +1,156 @@
+import math
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.utils import timezone
+from allauth.socialaccount.models import SocialAccount
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from poster.dispatcher import claim_due_posts
+from poster.ledger import complete_post
+from poster.models import SchedulePost, Status
+from poster.views import SchedulePostView
+
+USERNAME = 'stress-db'
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs API listing reads alongside dispatcher claim/complete writes on the configured "
+        "database and reports read latency with and without the writers, write latency and "
+        "'database is locked' errors. Creates a '%s' user for the run and deletes it afterwards." % USERNAME
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per phase.")
+        parser.add_argument('--readers', type=int, default=4, help="Threads polling the posts listing.")
+        parser.add_argument('--writers', type=int, default=2, help="Threads claiming and completing posts.")
+        parser.add_argument('--posts', type=int, default=2000, help="Posts created for the run.")
+        parser.add_argument('--batch-size', type=int, default=50, help="Posts claimed per write transaction.")
+        parser.add_argument('--host', default='localhost', help="Host header of the listing requests; must be in ALLOWED_HOSTS.")
+
+    def handle(self, *args, **options):
+        # The writers claim and mark published every due post, not just ours.
+        if SchedulePost.objects.filter(status=Status.SCHEDULED).exclude(author__username=USERNAME).exists():
+            raise CommandError("Other users have scheduled posts; run this against a scratch database.")
+        mode = connection.vendor
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                mode = f"sqlite, journal_mode={cursor.fetchone()[0]}"
+        self.stdout.write(f"Database: {connection.settings_dict['NAME']} ({mode})")
+
+        user = self._populate(options)
+        try:
+            baseline = self._phase(user, options, writers=0)
+            loaded = self._phase(user, options, writers=options['writers'])
+        finally:
+            get_user_model().objects.filter(pk=user.pk).delete()
+
+        self._report("reads only", baseline)
+        self._report(f"reads + {options['writers']} writers", loaded)
+        slowdown = _percentile(loaded['reads'], 0.99) / max(_percentile(baseline['reads'], 0.99), 1e-9)
+        self.stdout.write(f"\nRead p99 under write load: {slowdown:.2f}x the read-only p99")
+
+    def _populate(self, options):
+        User = get_user_model()
+        User.objects.filter(username=USERNAME).delete()
+        user = User.objects.create(username=USERNAME)
+        accounts = [
+            SocialAccount.objects.create(user=user, provider='linkedin_oauth2', uid=f"{USERNAME}-{i}") for i in range(10)
+        ]
+        now = timezone.now()
+        SchedulePost.objects.bulk_create(
+            (
+                SchedulePost(
+                    author=user, social_account=accounts[i % len(accounts)], content=f"stress {i}",
+                    status=Status.SCHEDULED, scheduled_time=now,
+                )
+                for i in range(options['posts'])
+            ),
+            batch_size=500,
+        )
+        return user
+
+    def _phase(self, user, options, writers: int) -> dict:
+        results = {'reads': [], 'writes': [], 'read_errors': 0, 'write_errors': 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+        threads = [threading.Thread(target=self._reader, args=(user, options, stop, results, lock)) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=self._writer, args=(user, options, stop, results, lock)) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _reader(self, user, options, stop, results, lock):
+        view = SchedulePostView.as_view()
+        factory = APIRequestFactory()
+        try:
+            while not stop.is_set():
+                request = factory.get('/api/me/posts', {'limit': 50}, HTTP_HOST=options['host'])
+                force_authenticate(request, user=user)
+                started = time.perf_counter()
+                try:
+                    response = view(request)
+                    response.render()
+                    ok = response.status_code == 200
+                except OperationalError:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    results['reads'].append(elapsed)
+                    results['read_errors'] += not ok
+        finally:
+            connections.close_all()
+
+    def _writer(self, user, options, stop, results, lock):
+        try:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    posts = claim_due_posts(options['batch_size'], fair=False)
+                    if not posts:
+                        # Everything is published; put the posts back to keep writing.
+                        SchedulePost.objects.filter(author=user, status=Status.PUBLISHED).update(status=Status.SCHEDULED, published_at=None)
+                    for post in posts:
+                        post.status = Status.PUBLISHED
+                        post.published_at = timezone.now()
+                        complete_post(post)
+                    ok = True
+                except OperationalError:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    results['writes'].append(elapsed)
+                    results['write_errors'] += not ok
+        finally:
+            connections.close_all()
+
+    def _report(self, label: str, results: dict):
+        reads, writes = results['reads'], results['writes']
+        self.stdout.write(f"\n[{label}]")
+        self.stdout.write(
+            f"  reads   {len(reads):>6}   p50 {1000 * _percentile(reads, 0.5):>7.1f} ms   "
+            f"p99 {1000 * _percentile(reads, 0.99):>7.1f} ms   max {1000 * max(reads, default=0):>7.1f} ms   "
+            f"errors {results['read_errors']}"
+        )
+        if writes:
+            self.stdout.write(
+                f"  writes  {len(writes):>6}   p50 {1000 * _percentile(writes, 0.5):>7.1f} ms   "
+                f"p99 {1000 * _percentile(writes, 0.99):>7.1f} ms   max {1000 * max(writes, default=0):>7.1f} ms   "
+                f"errors {results['write_errors']}"
+            )
@@ -0,0 +1,223 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from allauth.socialaccount.models import SocialAccount
+
+from social_scheduler.metrics import span
+
+from .http_client import retry_delay
+from .models import MediaUpload
+from .services import (
+    LinkedInAPIError,
+    _api_url,
+    _check_auth,
+    _get_linkedin_api_headers,
+    _limited_send,
+    _media_recipe,
+    _register_upload_payload,
+    _send,
+)
+
+logger = logging.getLogger(__name__)
+
+MULTIPART_MECHANISM = 'com.linkedin.digitalmedia.uploading.MultipartUpload'
+# Used when LinkedIn does not say how long its part URLs stay valid.
+DEFAULT_URL_LIFETIME = timedelta(hours=12)
+
+
+class _FileRange:
+    """
+    Read-only, seekable view of bytes [first_byte, last_byte] of a file.
+
+    Passed as a request body, it is streamed in small reads with a
+    Content-Length of the range, so a part never sits in memory whole.
+    """
+
+    def __init__(self, path: str, first_byte: int, last_byte: int):
+        self._file = open(path, 'rb')
+        self._start = first_byte
+        self._length = last_byte - first_byte + 1
+        self._pos = 0
+        self._file.seek(first_byte)
+
+    def __len__(self):
+        return self._length
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: self._length}[whence]
+        self._pos = min(max(base + offset, 0), self._length)
+        self._file.seek(self._start + self._pos)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self._length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self._file.read(size)
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _register_multipart(social_account: SocialAccount, media_path: str, author_urn: str, stat) -> MediaUpload:
+    headers = _get_linkedin_api_headers(social_account)
+    recipe = _media_recipe(media_path)
+    with span('register_upload', multipart=True):
+        response = _limited_send(
+            social_account,
+            'POST',
+            _api_url("/assets?action=registerUpload"),
+            json=_register_upload_payload(author_urn, recipe, file_size=stat.st_size),
+            headers=headers,
+        )
+    _check_auth(social_account, response)
+    if response.status_code != 200:
+        raise LinkedInAPIError(f"Failed to register media upload: {response.text}")
+
+    value = response.json()['value']
+    mechanism = value['uploadMechanism'][MULTIPART_MECHANISM]
+    parts = mechanism['partUploadRequests']
+    expiries = [part['urlExpiresAt'] for part in parts if part.get('urlExpiresAt')]
+    if expiries:
+        urls_expire_at = datetime.fromtimestamp(min(expiries) / 1000, tz=dt_timezone.utc)
+    else:
+        urls_expire_at = timezone.now() + DEFAULT_URL_LIFETIME
+
+    return MediaUpload.objects.create(
+        owner_urn=author_urn,
+        media_path=media_path,
+        file_size=stat.st_size,
+        file_mtime=stat.st_mtime,
+        recipe=recipe,
+        asset_urn=value['asset'],
+        media_artifact=value.get('mediaArtifact', ''),
+        upload_metadata=mechanism.get('metadata', ''),
+        part_requests=parts,
+        urls_expire_at=urls_expire_at,
+    )
+
+
+def _resumable_upload(author_urn: str, media_path: str, stat):
+    """
+    Returns an unfinished upload of this exact file (same size and mtime)
+    whose part URLs are still valid, if there is one.
+    """
+    return (
+        MediaUpload.objects
+        .filter(
+            owner_urn=author_urn,
+            media_path=media_path,
+            file_size=stat.st_size,
+            file_mtime=stat.st_mtime,
+            completed_at__isnull=True,
+            urls_expire_at__gt=timezone.now() + timedelta(minutes=5),
+        )
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def _upload_part(media_path: str, part: dict) -> dict:
+    """
+    PUTs one byte range, retrying just this part on failure.
+
+    Returns:
+        The part's entry for completeMultiPartUpload (status code and ETag).
+    """
+    byte_range = part['byteRange']
+    retries = settings.LINKEDIN_UPLOAD_PART_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            with span('media_put', multipart=True), _FileRange(media_path, byte_range['firstByte'], byte_range['lastByte']) as body:
+                response = _send('PUT', part['url'], data=body, headers=part.get('headers', {}))
+            if response.status_code in (200, 201):
+                return {"httpStatusCode": response.status_code, "headers": {"ETag": response.headers.get('ETag', '')}}
+            error = LinkedInAPIError(f"Failed to upload part {byte_range}: {response.status_code} - {response.text}")
+        except LinkedInAPIError as e:
+            error = e
+        if attempt < retries:
+            time.sleep(retry_delay(attempt))
+    raise error
+
+
+def _complete_multipart(social_account: SocialAccount, upload: MediaUpload):
+    headers = _get_linkedin_api_headers(social_account)
+    payload = {
+        "completeMultipartUploadRequest": {
+            "mediaArtifact": upload.media_artifact,
+            "metadata": upload.upload_metadata,
+            "partUploadResponses": [upload.part_responses[str(i)] for i in range(len(upload.part_requests))],
+        }
+    }
+    with span('complete_upload'):
+        response = _limited_send(social_account, 'POST', _api_url("/assets?action=completeMultiPartUpload"), json=payload, headers=headers)
+    _check_auth(social_account, response)
+    if response.status_code not in (200, 201):
+        raise LinkedInAPIError(f"Failed to complete multi-part upload: {response.status_code} - {response.text}")
+
+
+def upload_multipart(social_account: SocialAccount, media_path: str, author_urn: str) -> str:
+    """
+    Uploads a large file with LinkedIn's multi-part mechanism.
+
+    Parts are streamed from disk and uploaded LINKEDIN_UPLOAD_PARALLELISM at a
+    time. Each completed part is recorded on a MediaUpload row, so after a
+    crash or a failed part the next call for the same file only uploads the
+    parts that are missing.
+
+    Returns:
+        The URN of the uploaded digital media asset.
+    """
+    stat = os.stat(media_path)
+    upload = _resumable_upload(author_urn, media_path, stat)
+    if upload is None:
+        upload = _register_multipart(social_account, media_path, author_urn, stat)
+    else:
+        logger.info("Resuming upload %s with %d/%d parts done", upload.pk, len(upload.part_responses), len(upload.part_requests))
+
+    pending = [i for i in range(len(upload.part_requests)) if str(i) not in upload.part_responses]
+    progress_lock = threading.Lock()
+
+    def run_part(index):
+        close_old_connections()
+        try:
+            result = _upload_part(media_path, upload.part_requests[index])
+            with progress_lock:
+                upload.part_responses[str(index)] = result
+                MediaUpload.objects.filter(pk=upload.pk).update(part_responses=upload.part_responses)
+        finally:
+            # Pool threads outlive the upload; don't leave their connections open.
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=settings.LINKEDIN_UPLOAD_PARALLELISM, thread_name_prefix='media-upload') as executor:
+        futures = [executor.submit(run_part, index) for index in pending]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    _complete_multipart(social_account, upload)
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['completed_at'])
+    return upload.asset_urn
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='schedulepost',
+            name='status',
+            field=models.CharField(choices=[('DRAFT', 'Draft'), ('SCHEDULED', 'Scheduled'), ('PUBLISHING', 'Publishing'), ('PUBLISHED', 'Published'), ('FAILED', 'Failed')], default='DRAFT', max_length=10),
+        ),
+    ]
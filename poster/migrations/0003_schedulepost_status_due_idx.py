@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0002_schedulepost_publishing_status'),
+        ('socialaccount', '0006_alter_socialaccount_extra_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedulepost',
+            index=models.Index(fields=['status', 'scheduled_time'], name='poster_status_due_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0003_schedulepost_status_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_urn', models.CharField(max_length=100)),
+                ('media_path', models.CharField(max_length=500)),
+                ('file_size', models.BigIntegerField()),
+                ('file_mtime', models.FloatField()),
+                ('recipe', models.CharField(max_length=100)),
+                ('asset_urn', models.CharField(max_length=100)),
+                ('media_artifact', models.CharField(blank=True, max_length=200)),
+                ('upload_metadata', models.TextField(blank=True)),
+                ('part_requests', models.JSONField(default=list)),
+                ('part_responses', models.JSONField(default=dict)),
+                ('urls_expire_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_urn', 'media_path'], name='poster_media_upload_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0004_mediaupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_urn', models.CharField(max_length=100)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('asset_urn', models.CharField(max_length=100)),
+                ('uploaded_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('owner_urn', 'content_hash'), name='poster_unique_media_asset')],
+            },
+        ),
+    ]
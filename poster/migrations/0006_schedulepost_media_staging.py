@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0005_mediaasset'),
+        ('socialaccount', '0006_alter_socialaccount_extra_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulepost',
+            name='media_asset_urn',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='schedulepost',
+            name='media_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schedulepost',
+            name='media_file',
+            field=models.FileField(blank=True, null=True, upload_to='scheduled_media/'),
+        ),
+        migrations.AddField(
+            model_name='schedulepost',
+            name='media_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='schedulepost',
+            name='media_status',
+            field=models.CharField(choices=[('NONE', 'No media'), ('PENDING', 'Pending upload'), ('READY', 'Uploaded'), ('FAILED', 'Upload failed')], default='NONE', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='schedulepost',
+            index=models.Index(fields=['media_status', 'scheduled_time'], name='poster_media_stage_idx'),
+        ),
+    ]
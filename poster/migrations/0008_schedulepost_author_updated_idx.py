@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0007_schedulepost_author_timeline_idx'),
+        ('socialaccount', '0006_alter_socialaccount_extra_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedulepost',
+            index=models.Index(fields=['author', 'updated_at'], name='poster_author_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0008_schedulepost_author_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulepost',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
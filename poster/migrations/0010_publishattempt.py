@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:16
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0009_schedulepost_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulepost',
+            name='linkedin_post_urn',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.CreateModel(
+            name='PublishAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('state', models.CharField(choices=[('PENDING', 'Sending'), ('SUCCEEDED', 'Published'), ('FAILED', 'Not published'), ('UNKNOWN', 'Outcome unknown')], default='PENDING', max_length=10)),
+                ('linkedin_post_urn', models.CharField(blank=True, max_length=100)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='poster.schedulepost')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('state', 'PENDING')), fields=('post',), name='poster_one_pending_attempt'), models.UniqueConstraint(condition=models.Q(('state', 'SUCCEEDED')), fields=('post',), name='poster_one_successful_attempt')],
+            },
+        ),
+    ]
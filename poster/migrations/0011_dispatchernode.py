@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0010_publishattempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DispatcherNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('heartbeat_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='schedulepost',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0011_dispatchernode'),
+        ('socialaccount', '0006_alter_socialaccount_extra_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulepost',
+            name='failed_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='schedulepost',
+            name='status',
+            field=models.CharField(choices=[('DRAFT', 'Draft'), ('SCHEDULED', 'Scheduled'), ('PUBLISHING', 'Publishing'), ('PUBLISHED', 'Published'), ('FAILED', 'Failed'), ('DEAD', 'Dead-lettered')], default='DRAFT', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='schedulepost',
+            index=models.Index(fields=['status', 'next_attempt_at', 'scheduled_time'], name='poster_status_retry_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0012_schedulepost_retries'),
+        ('socialaccount', '0006_alter_socialaccount_extra_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField(max_length=1000)),
+                ('media_file', models.FileField(blank=True, null=True, upload_to='scheduled_media/')),
+                ('rrule', models.CharField(max_length=500)),
+                ('dtstart', models.DateTimeField()),
+                ('tzname', models.CharField(default='UTC', max_length=64)),
+                ('active', models.BooleanField(default=True)),
+                ('materialized_until', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_schedules', to=settings.AUTH_USER_MODEL)),
+                ('social_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='socialaccount.socialaccount')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='schedulepost',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='poster.recurringschedule'),
+        ),
+        migrations.AddConstraint(
+            model_name='schedulepost',
+            constraint=models.UniqueConstraint(fields=('recurrence', 'scheduled_time'), name='poster_one_post_per_occurrence'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringschedule',
+            index=models.Index(fields=['active', 'materialized_until'], name='poster_recurring_due_idx'),
+        ),
+    ]
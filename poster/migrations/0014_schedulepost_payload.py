@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0013_recurringschedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulepost',
+            name='payload',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='schedulepost',
+            name='payload_hash',
+            field=models.CharField(blank=True, editable=False, max_length=80),
+        ),
+    ]
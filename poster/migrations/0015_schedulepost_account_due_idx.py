@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0014_schedulepost_payload'),
+        ('socialaccount', '0006_alter_socialaccount_extra_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedulepost',
+            index=models.Index(fields=['social_account', 'status', 'scheduled_time', 'id'], name='poster_account_due_idx'),
+        ),
+    ]
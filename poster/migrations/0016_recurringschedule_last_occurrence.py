@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0015_schedulepost_account_due_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringschedule',
+            name='last_occurrence',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
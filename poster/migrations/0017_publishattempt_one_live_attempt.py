@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poster', '0016_recurringschedule_last_occurrence'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='publishattempt',
+            name='poster_one_pending_attempt',
+        ),
+        migrations.RemoveConstraint(
+            model_name='publishattempt',
+            name='poster_one_successful_attempt',
+        ),
+        migrations.AddConstraint(
+            model_name='publishattempt',
+            constraint=models.UniqueConstraint(condition=models.Q(('state__in', ['PENDING', 'SUCCEEDED'])), fields=('post',), name='poster_one_live_attempt'),
+        ),
+    ]
@@ -1,13 +1,34 @@
+import uuid
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from allauth.socialaccount.models import SocialAccount
 
 # Create your models here.
 class Status(models.TextChoices):
         DRAFT = 'DRAFT', 'Draft'
         SCHEDULED = 'SCHEDULED', 'Scheduled'
+        PUBLISHING = 'PUBLISHING', 'Publishing'
         PUBLISHED = 'PUBLISHED', 'Published'
         FAILED = 'FAILED', 'Failed'
+        # Retryable failures that ran out of attempts; re-driven from the admin.
+        DEAD = 'DEAD', 'Dead-lettered'
+
+
+class AttemptState(models.TextChoices):
+        PENDING = 'PENDING', 'Sending'
+        SUCCEEDED = 'SUCCEEDED', 'Published'
+        FAILED = 'FAILED', 'Not published'
+        UNKNOWN = 'UNKNOWN', 'Outcome unknown'
+
+
+class MediaStatus(models.TextChoices):
+        NONE = 'NONE', 'No media'
+        PENDING = 'PENDING', 'Pending upload'
+        READY = 'READY', 'Uploaded'
+        FAILED = 'FAILED', 'Upload failed'
 
 
 class SchedulePost(models.Model):
@@ -18,11 +39,197 @@ class SchedulePost(models.Model):
     scheduled_time = models.DateTimeField()
     published_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(null=True, blank=True)
+    media_file = models.FileField(upload_to='scheduled_media/', null=True, blank=True)
+    # Set by the media staging job once the file is uploaded ahead of scheduled_time.
+    media_status = models.CharField(max_length=10, choices=MediaStatus.choices, default=MediaStatus.NONE)
+    media_asset_urn = models.CharField(max_length=100, blank=True)
+    media_attempts = models.PositiveSmallIntegerField(default=0)
+    media_next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # Set when publishing was put off (out of LinkedIn quota, or retrying after a
+    # failure); not claimed before then.
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # Failed publish attempts so far; the post is dead-lettered at SCHEDULER_RETRY_MAX_ATTEMPTS.
+    failed_attempts = models.PositiveSmallIntegerField(default=0)
+    # URN of the published LinkedIn post (urn:li:share:... / urn:li:ugcPost:...).
+    linkedin_post_urn = models.CharField(max_length=100, blank=True)
+    # Dispatcher node holding the post while it is PUBLISHING (see poster.cluster).
+    claimed_by = models.CharField(max_length=100, blank=True)
+    # ugcPosts request body compiled when the post was saved, and the version and
+    # hash of what it was compiled from (see poster.payloads).
+    payload = models.BinaryField(null=True, blank=True, editable=False)
+    payload_hash = models.CharField(max_length=80, blank=True, editable=False)
+    # The series this post is an occurrence of (see poster.recurrence).
+    recurrence = models.ForeignKey('RecurringSchedule', on_delete=models.SET_NULL, null=True, blank=True, related_name='posts')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Post by {self.user.username} scheduled for {self.scheduled_time}"
+        return f"Post by {self.author.username} scheduled for {self.scheduled_time}"
+
+    def clean(self):
+        # Scheduled posts must be publishable; drafts may be incomplete.
+        from .services import LinkedInPostInvalid, validate_post
+
+        if self.status != Status.SCHEDULED or not self.social_account_id:
+            return
+        try:
+            validate_post(self.social_account.provider, self.content, self.media_file.name if self.media_file else None)
+        except LinkedInPostInvalid as e:
+            raise ValidationError(str(e))
+
+    @property
+    def due_at(self):
+        """When the dispatcher may next pick the post up."""
+        if self.next_attempt_at and self.next_attempt_at > self.scheduled_time:
+            return self.next_attempt_at
+        return self.scheduled_time
     
     class Meta:
-        ordering = ['-scheduled_time']
\ No newline at end of file
+        ordering = ['-scheduled_time']
+        indexes = [
+            # Serves the dispatcher's "SCHEDULED and due" range scan in scheduled_time order.
+            models.Index(fields=['status', 'scheduled_time'], name='poster_status_due_idx'),
+            # Serves the same scan split by next_attempt_at: posts never put off
+            # (next_attempt_at NULL, in scheduled_time order) and put-off posts whose
+            # retry time has come, so waiting retries are never read.
+            models.Index(fields=['status', 'next_attempt_at', 'scheduled_time'], name='poster_status_retry_idx'),
+            # Serves fair dispatch's per-account reads of the oldest due posts.
+            models.Index(fields=['social_account', 'status', 'scheduled_time', 'id'], name='poster_account_due_idx'),
+            models.Index(fields=['media_status', 'scheduled_time'], name='poster_media_stage_idx'),
+            # Serves the per-user timeline, paged by (scheduled_time, id) keyset.
+            models.Index(fields=['author', 'scheduled_time', 'id'], name='poster_author_timeline_idx'),
+            # Lets the listing's ETag (latest updated_at and count per author) come from the index alone.
+            models.Index(fields=['author', 'updated_at'], name='poster_author_updated_idx'),
+        ]
+        constraints = [
+            # Materializing an occurrence twice (overlapping runs) inserts nothing.
+            models.UniqueConstraint(fields=['recurrence', 'scheduled_time'], name='poster_one_post_per_occurrence'),
+        ]
+
+
+class RecurringSchedule(models.Model):
+    """
+    A series of posts with the same content, repeating by an RFC 5545 RRULE
+    (e.g. "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR;BYHOUR=9;BYMINUTE=0") from
+    `dtstart`, in wall-clock time of `tzname`.
+
+    Occurrences are not stored. poster.recurrence materializes them into
+    SchedulePost rows only up to a rolling horizon, so an edit to the series
+    applies to every later occurrence without touching any rows.
+    """
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='recurring_schedules')
+    social_account = models.ForeignKey(SocialAccount, on_delete=models.CASCADE)
+    content = models.TextField(max_length=1000)
+    media_file = models.FileField(upload_to='scheduled_media/', null=True, blank=True)
+    rrule = models.CharField(max_length=500)
+    dtstart = models.DateTimeField()
+    tzname = models.CharField(max_length=64, default='UTC')
+    # Paused series, and series with no occurrences left, produce no posts.
+    active = models.BooleanField(default=True)
+    # Occurrences up to this time exist as SchedulePost rows.
+    materialized_until = models.DateTimeField(null=True, blank=True)
+    # The latest of them, where expanding the rule resumes.
+    last_occurrence = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.rrule} from {self.dtstart} for {self.author.username}"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Serves the materializer's "active and behind the horizon" scan.
+            models.Index(fields=['active', 'materialized_until'], name='poster_recurring_due_idx'),
+        ]
+
+
+class MediaUpload(models.Model):
+    """
+    Progress of a multi-part LinkedIn media upload, so an interrupted upload
+    can resume from its last completed part instead of starting over.
+    """
+    owner_urn = models.CharField(max_length=100)
+    media_path = models.CharField(max_length=500)
+    file_size = models.BigIntegerField()
+    file_mtime = models.FloatField()
+    recipe = models.CharField(max_length=100)
+    asset_urn = models.CharField(max_length=100)
+    media_artifact = models.CharField(max_length=200, blank=True)
+    upload_metadata = models.TextField(blank=True)
+    part_requests = models.JSONField(default=list)
+    part_responses = models.JSONField(default=dict)
+    urls_expire_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Upload of {self.media_path} as {self.asset_urn}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner_urn', 'media_path'], name='poster_media_upload_idx'),
+        ]
+
+
+class MediaAsset(models.Model):
+    """
+    An uploaded LinkedIn asset, keyed by the hash of the file's bytes, so the
+    same image or video posted again by the same member is not re-uploaded.
+    """
+    owner_urn = models.CharField(max_length=100)
+    content_hash = models.CharField(max_length=64)
+    asset_urn = models.CharField(max_length=100)
+    uploaded_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.asset_urn} for {self.owner_urn}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner_urn', 'content_hash'], name='poster_unique_media_asset'),
+        ]
+
+
+class PublishAttempt(models.Model):
+    """
+    One try at creating a SchedulePost on LinkedIn, recorded before the
+    request goes out.
+
+    An attempt still PENDING or UNKNOWN when the post is next picked up may or
+    may not have reached LinkedIn, so it is reconciled against the member's
+    posts before anything is sent again (see poster.ledger).
+    """
+    post = models.ForeignKey(SchedulePost, on_delete=models.CASCADE, related_name='attempts')
+    idempotency_key = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    state = models.CharField(max_length=10, choices=AttemptState.choices, default=AttemptState.PENDING)
+    linkedin_post_urn = models.CharField(max_length=100, blank=True)
+    error_message = models.TextField(blank=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Attempt {self.idempotency_key} for post {self.post_id}: {self.state}"
+
+    class Meta:
+        constraints = [
+            # One live attempt per post: no request goes out while another is
+            # in flight or once one has succeeded.
+            models.UniqueConstraint(
+                fields=['post'], condition=models.Q(state__in=[AttemptState.PENDING, AttemptState.SUCCEEDED]),
+                name='poster_one_live_attempt',
+            ),
+        ]
+
+
+class DispatcherNode(models.Model):
+    """
+    Lease of a running dispatcher node. Nodes renew it by heartbeat; live
+    nodes share the account partitions between them (see poster.cluster).
+    """
+    name = models.CharField(max_length=100, unique=True)
+    joined_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.name} (last seen {self.heartbeat_at})"
@@ -0,0 +1,62 @@
+import hashlib
+
+from .models import MediaStatus, SchedulePost
+from .services import _author_urn, _build_post_payload, _media_category, encode_payload, validate_post
+
+# Bump whenever _build_post_payload changes shape: payloads compiled by an
+# older version are then ignored at publish time and rebuilt on next save.
+# 2: the hash covers the media file.
+PAYLOAD_VERSION = 2
+
+
+def _hash(author_urn: str, text: str, media_name: str, asset_urn: str, media_category: str) -> str:
+    parts = (author_urn, text, media_name or '', asset_urn or '', media_category or '')
+    digest = hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+    return f"v{PAYLOAD_VERSION}:{digest}"
+
+
+def compile_post(post: SchedulePost, social_account=None) -> bool:
+    """
+    Validates the post and stores its final ugcPosts request body on
+    `post.payload` (not saved), so publishing only attaches auth headers and
+    sends the bytes.
+
+    The body is rebuilt only when what it is built from (account, text,
+    media file and asset) changed. A post with media is compiled once its asset has
+    been staged; until then there is nothing final to store.
+
+    Args:
+        social_account: The post's account, when the caller has it loaded
+            (bulk inserts), to save a query.
+
+    Returns:
+        Whether post.payload changed.
+
+    Raises:
+        LinkedInPostInvalid: If LinkedIn would reject the post.
+    """
+    social_account = social_account or post.social_account
+    media_name = post.media_file.name if post.media_file else None
+    validate_post(social_account.provider, post.content, media_name)
+
+    if media_name and not (post.media_status == MediaStatus.READY and post.media_asset_urn):
+        changed = post.payload is not None
+        post.payload, post.payload_hash = None, ''
+        return changed
+
+    author_urn = _author_urn(social_account)
+    asset_urn = post.media_asset_urn if media_name else None
+    media_category = _media_category(media_name) if media_name else None
+    payload_hash = _hash(author_urn, post.content, media_name, asset_urn, media_category)
+    if post.payload is not None and post.payload_hash == payload_hash:
+        return False
+    post.payload = encode_payload(_build_post_payload(author_urn, post.content, asset_urn, media_category or "IMAGE"))
+    post.payload_hash = payload_hash
+    return True
+
+
+def compiled_payload(post: SchedulePost) -> bytes:
+    """The post's compiled body if it is current, else None (publishing then builds it)."""
+    if post.payload is None or not post.payload_hash.startswith(f"v{PAYLOAD_VERSION}:"):
+        return None
+    return bytes(post.payload)
@@ -0,0 +1,136 @@
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+
+# How long a bucket's lock may be held before it expires on its own.
+LOCK_TIMEOUT = 2
+_POLL_INTERVAL = 0.002
+# After a 429 a bucket's rate is halved, down to 1/MAX_SLOWDOWN of its quota;
+# each successful call then wins back RECOVERY_STEP of the slowdown.
+MAX_SLOWDOWN = 32.0
+RECOVERY_STEP = 0.1
+
+
+@dataclass(frozen=True)
+class Limit:
+    """A quota of `per_day` calls, of which up to `burst` may go back to back."""
+    per_day: int
+    burst: int
+
+    @property
+    def interval(self) -> float:
+        return 86400.0 / self.per_day
+
+
+class RateLimiter:
+    """
+    Token buckets (in their GCRA form) kept in a Django cache, so every process
+    using the same cache draws from one budget.
+
+    Each bucket stores its theoretical arrival time (TAT): when the bucket
+    would be empty again if calls kept coming at the quota rate. A caller
+    reserves the next slot by pushing the TAT forward one interval and then
+    sleeps until its slot comes up, so bursts are spread out instead of
+    rejected. Buckets also carry a slowdown factor that grows on 429s and
+    decays on success, keeping throughput just under what LinkedIn accepts.
+    """
+
+    def _cache(self):
+        return caches[settings.LINKEDIN_RATE_LIMIT_CACHE_ALIAS]
+
+    @staticmethod
+    def _key(bucket: str) -> str:
+        return f"linkedin-rate:{bucket}"
+
+    def _lock(self, bucket: str):
+        """
+        Takes the bucket's lock. Returns its key, or None if waiting timed out
+        and the caller went ahead without it.
+        """
+        cache = self._cache()
+        lock_key = self._key(bucket) + ":lock"
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                # The holder died; its lock is about to expire anyway.
+                return None
+            time.sleep(_POLL_INTERVAL)
+        return lock_key
+
+    def _unlock(self, lock_key: str):
+        # A lock we went ahead without is someone else's to release.
+        if lock_key is not None:
+            self._cache().delete(lock_key)
+
+    def _state(self, bucket: str, now: float) -> dict:
+        return self._cache().get(self._key(bucket)) or {'tat': now, 'slowdown': 1.0}
+
+    def _save(self, bucket: str, state: dict, now: float):
+        # Once the TAT has passed the bucket is full again; keep the entry only that long.
+        ttl = max(int(state['tat'] - now) + 60, 60)
+        self._cache().set(self._key(bucket), state, timeout=ttl)
+
+    def reserve(self, limits: dict, max_wait: float) -> tuple:
+        """
+        Takes one slot from every bucket in `limits` ({bucket name: Limit}).
+
+        Returns:
+            (granted, wait): when granted, the caller must sleep `wait` seconds
+            before calling out. When the wait would exceed `max_wait` nothing
+            is taken and `wait` says how long until a slot frees up.
+        """
+        buckets = sorted(limits)
+        locks = [self._lock(bucket) for bucket in buckets]
+        try:
+            now = time.time()
+            states = {bucket: self._state(bucket, now) for bucket in buckets}
+            wait = 0.0
+            for bucket in buckets:
+                limit, state = limits[bucket], states[bucket]
+                state['tat'] = max(state['tat'], now) + limit.interval * state['slowdown']
+                # The bucket admits up to `burst` calls ahead of the steady rate. The
+                # allowance is not scaled by the slowdown, so recovering from one
+                # does not shift the waits of calls already queued.
+                wait = max(wait, state['tat'] - limit.burst * limit.interval - now)
+            if wait > max_wait:
+                return False, wait
+            for bucket in buckets:
+                self._save(bucket, states[bucket], now)
+            return True, wait
+        finally:
+            for lock_key in locks:
+                self._unlock(lock_key)
+
+    def throttled(self, bucket: str, limit: Limit, retry_after: float = None):
+        """
+        Records a 429 for `bucket`: halves its rate and, if LinkedIn said how
+        long to back off, holds every caller until then.
+        """
+        lock_key = self._lock(bucket)
+        try:
+            now = time.time()
+            state = self._state(bucket, now)
+            state['slowdown'] = min(state['slowdown'] * 2, MAX_SLOWDOWN)
+            pause = retry_after if retry_after is not None else limit.interval * state['slowdown']
+            state['tat'] = max(state['tat'], now + pause + limit.burst * limit.interval)
+            self._save(bucket, state, now)
+        finally:
+            self._unlock(lock_key)
+
+    def succeeded(self, bucket: str):
+        """Records a successful call, easing a previous slowdown."""
+        now = time.time()
+        if self._state(bucket, now)['slowdown'] <= 1.0:
+            return
+        lock_key = self._lock(bucket)
+        try:
+            state = self._state(bucket, now)
+            state['slowdown'] = max(state['slowdown'] - RECOVERY_STEP, 1.0)
+            self._save(bucket, state, now)
+        finally:
+            self._unlock(lock_key)
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,208 @@
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from itertools import islice
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil.rrule import rrule, rrulestr
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import MediaStatus, RecurringSchedule, SchedulePost, Status
+from .payloads import compile_post
+from .services import LinkedInPostInvalid
+
+logger = logging.getLogger(__name__)
+
+# Finer frequencies would flood the schedule, and the member's LinkedIn quota.
+_TOO_FREQUENT = {'SECONDLY', 'MINUTELY'}
+
+
+@dataclass
+class MaterializeReport:
+    series: int = 0
+    posts: int = 0
+
+    def __str__(self):
+        return f"{self.posts} posts materialized from {self.series} series"
+
+
+# --- Occurrences ---
+
+@dataclass
+class ParsedRule:
+    rule: rrule
+    tz: ZoneInfo
+    # Whether the RRULE has a COUNT, which only holds when counted from dtstart.
+    counted: bool
+
+
+def parse_rule(rule: str, dtstart, tzname: str) -> ParsedRule:
+    """
+    Builds a series' recurrence from its RRULE, anchored at `dtstart` in the
+    wall-clock time of `tzname`, so that "9am" stays 9am across DST changes.
+
+    Raises:
+        ValueError: If the rule or the time zone is invalid, or the rule
+            repeats more often than hourly.
+    """
+    try:
+        tz = ZoneInfo(tzname)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone {tzname!r}.")
+    rule = rule.strip().removeprefix('RRULE:')
+    parts = dict(part.split('=', 1) for part in rule.upper().split(';') if '=' in part)
+    if parts.get('FREQ') in _TOO_FREQUENT:
+        raise ValueError("Series may repeat at most hourly.")
+    try:
+        parsed = rrulestr(rule, dtstart=dtstart.astimezone(tz))
+    except ValueError as e:
+        raise ValueError(f"Invalid RRULE: {e}")
+    if not isinstance(parsed, rrule):
+        raise ValueError("Give a single RRULE.")
+    return ParsedRule(rule=parsed, tz=tz, counted='COUNT' in parts)
+
+
+def occurrences(series: RecurringSchedule, after, until=None):
+    """
+    Yields the series' occurrence times from `after` (inclusive) up to
+    `until` (inclusive, unbounded if None), without expanding the rest.
+
+    The rule is expanded from the series' last materialized occurrence when
+    that is not past `after`, so the cost does not grow with the series'
+    age. An occurrence has every field the rule takes from dtstart, so the
+    rule re-anchored there yields the same times. Rules with a COUNT are
+    still counted from dtstart; they are bounded anyway.
+    """
+    parsed = parse_rule(series.rrule, series.dtstart, series.tzname)
+    rule = parsed.rule
+    if series.last_occurrence and series.last_occurrence <= after and not parsed.counted:
+        rule = rule.replace(dtstart=series.last_occurrence.astimezone(parsed.tz))
+    for occurrence in rule.xafter(after, inc=True):
+        if until is not None and occurrence > until:
+            return
+        yield occurrence
+
+
+# --- Materializing ---
+
+def _post(series: RecurringSchedule, scheduled_time) -> SchedulePost:
+    post = SchedulePost(
+        author_id=series.author_id,
+        social_account_id=series.social_account_id,
+        content=series.content,
+        media_file=series.media_file.name or None,
+        # bulk_create skips the pre_save signal that queues staging.
+        media_status=MediaStatus.PENDING if series.media_file else MediaStatus.NONE,
+        status=Status.SCHEDULED,
+        scheduled_time=scheduled_time,
+        recurrence=series,
+    )
+    try:
+        # Occurrences of a series share one body; the hash check makes the
+        # rest of the batch cheap.
+        compile_post(post, series.social_account)
+    except LinkedInPostInvalid as e:
+        logger.warning("Series %s will not publish: %s", series.pk, e)
+    return post
+
+
+def materialize_series(series: RecurringSchedule, until=None, now=None) -> int:
+    """
+    Inserts SchedulePost rows for the series' occurrences between its
+    watermark (materialized_until, or now for a new series) and `until`,
+    at most RECURRING_MAX_OCCURRENCES per call, then advances the watermark.
+    A series with no occurrences left is deactivated.
+
+    Runs as one transaction that is dropped if the series was edited in the
+    meantime; the edit re-materializes it.
+
+    Returns:
+        How many occurrences were materialized.
+    """
+    now = now or timezone.now()
+    until = until or now + timedelta(seconds=settings.RECURRING_HORIZON)
+    if not series.active:
+        return 0
+    try:
+        times = list(islice(occurrences(series, series.materialized_until or now, until), settings.RECURRING_MAX_OCCURRENCES))
+    except ValueError as e:
+        # Validated on save, so only a time zone that has since gone away.
+        logger.warning("Deactivating series %s: %s", series.pk, e)
+        RecurringSchedule.objects.filter(pk=series.pk).update(active=False)
+        return 0
+
+    if len(times) == settings.RECURRING_MAX_OCCURRENCES:
+        until = times[-1]
+    exhausted = next(occurrences(series, until + timedelta(microseconds=1)), None) is None
+    with transaction.atomic():
+        # Overlapping runs may materialize the same occurrence; the unique
+        # (recurrence, scheduled_time) constraint keeps one.
+        SchedulePost.objects.bulk_create([_post(series, occurrence) for occurrence in times], ignore_conflicts=True)
+        last_occurrence = times[-1] if times else series.last_occurrence
+        updated = RecurringSchedule.objects.filter(pk=series.pk, updated_at=series.updated_at).update(
+            materialized_until=until, last_occurrence=last_occurrence, active=not exhausted,
+        )
+        if not updated:
+            transaction.set_rollback(True)
+            return 0
+    series.materialized_until, series.last_occurrence, series.active = until, last_occurrence, not exhausted
+    return len(times)
+
+
+def materialize(horizon: timedelta = None, batch_size: int = None, now=None) -> MaterializeReport:
+    """
+    Materializes every active series up to now + `horizon` (RECURRING_HORIZON
+    by default). Only series whose watermark has fallen more than a run
+    interval behind the horizon are read, and each only for the occurrences
+    past its watermark, so a run with nothing to do is a single query.
+    """
+    now = now or timezone.now()
+    horizon = horizon or timedelta(seconds=settings.RECURRING_HORIZON)
+    until = now + horizon
+    refresh_before = until - min(timedelta(seconds=settings.RECURRING_INTERVAL), horizon / 2)
+    batch_size = batch_size or settings.RECURRING_BATCH_SIZE
+    report = MaterializeReport()
+    pending = (
+        RecurringSchedule.objects
+        .filter(active=True)
+        .select_related('social_account')
+        .filter(Q(materialized_until__isnull=True) | Q(materialized_until__lt=refresh_before))
+        .order_by('pk')
+    )
+    last_pk = 0
+    while batch := list(pending.filter(pk__gt=last_pk)[:batch_size]):
+        for series in batch:
+            report.posts += materialize_series(series, until=until, now=now)
+            report.series += 1
+        last_pk = batch[-1].pk
+    return report
+
+
+def rematerialize(series: RecurringSchedule, now=None) -> int:
+    """
+    Applies an edit of the series: drops its materialized occurrences that
+    are still waiting to be published and materializes them anew. Only the
+    horizon's worth of rows is touched, however long the series runs.
+
+    Returns:
+        How many occurrences were materialized.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        discard_pending(series, now)
+        # The edited rule may not produce the old occurrences.
+        series.materialized_until = series.last_occurrence = None
+        series.save(update_fields=['materialized_until', 'last_occurrence', 'updated_at'])
+        return materialize_series(series, now=now)
+
+
+def discard_pending(series: RecurringSchedule, now=None) -> int:
+    """Deletes the series' posts that are scheduled for later and not yet picked up."""
+    now = now or timezone.now()
+    deleted, _ = series.posts.filter(
+        status__in=[Status.SCHEDULED, Status.DRAFT], scheduled_time__gt=now,
+    ).delete()
+    return deleted
@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .ledger import complete_posts
+from .models import SchedulePost, Status
+from .timers import due_timer
+
+logger = logging.getLogger(__name__)
+
+
+class ResultBuffer:
+    """
+    Write-behind buffer for publish outcomes.
+
+    Workers add() posts whose outcome is set on the instance; the buffer
+    records them with one bulk UPDATE per batch (see ledger.complete_posts)
+    once `max_size` are pending or the oldest has waited `max_delay` seconds.
+    The dispatcher flushes what is left at the end of every pass and on
+    shutdown.
+
+    Buffered posts are still PUBLISHING in the database. If the process dies
+    before a flush they are handed back by ledger.requeue_in_flight() and
+    replayed from the publish ledger, so an outcome can be delayed but a post
+    is never published twice. A flush that fails keeps its posts for the
+    next one.
+    """
+
+    def __init__(self, max_size: int = None, max_delay: float = None):
+        self.max_size = max_size or settings.SCHEDULER_RESULT_BATCH_SIZE
+        self.max_delay = settings.SCHEDULER_RESULT_FLUSH_INTERVAL if max_delay is None else max_delay
+        self._pending = []
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, post: SchedulePost) -> bool:
+        """
+        Queues a post's outcome.
+
+        Returns:
+            True when the buffer is due for a flush. The caller flushes, so
+            that async code can do it off the event loop.
+        """
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(post)
+        return self.due()
+
+    def due(self) -> bool:
+        """Whether the size or age threshold has been reached."""
+        with self._lock:
+            return bool(self._pending) and (
+                len(self._pending) >= self.max_size or time.monotonic() - self._oldest >= self.max_delay
+            )
+
+    def flush(self) -> int:
+        """
+        Records every pending outcome, one bulk UPDATE per claiming node.
+
+        Returns:
+            How many posts were written.
+        """
+        with self._lock:
+            posts, self._pending, self._oldest = self._pending, [], None
+        by_node = {}
+        for post in posts:
+            by_node.setdefault(post.claimed_by, []).append(post)
+
+        written = 0
+        for node, batch in by_node.items():
+            try:
+                written += complete_posts(batch)
+            except DatabaseError as e:
+                # Typically "database is locked"; try again with the next flush.
+                logger.warning("Recording %d publish outcomes failed, will retry: %s", len(batch), e)
+                with self._lock:
+                    self._pending[:0] = batch
+                    self._oldest = time.monotonic()
+                continue
+            for post in batch:
+                if post.status == Status.SCHEDULED:
+                    due_timer.schedule(post.pk, post.due_at)
+        return written
@@ -0,0 +1,40 @@
+import random
+
+import httpx
+import requests
+from django.conf import settings
+from django.db import OperationalError
+
+from .services import LinkedInAPIError, LinkedInReauthRequired
+
+# Error responses LinkedIn may answer differently when asked again later.
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429})
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether a failed publish is worth trying again: throttling (429), server
+    errors (5xx), transport failures such as timeouts and a locked or busy
+    database are; other 4xx answers, a revoked token and anything else
+    (a missing media file, a missing token) are permanent.
+    """
+    if isinstance(error, OperationalError):
+        return True
+    if isinstance(error, LinkedInReauthRequired) or not isinstance(error, LinkedInAPIError):
+        return False
+    if error.status_code is not None:
+        return error.status_code >= 500 or error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error.__cause__, (requests.RequestException, httpx.HTTPError))
+
+
+def retry_backoff(failed_attempts: int, base_delay: float = None, max_delay: float = None) -> float:
+    """
+    Seconds to wait after the `failed_attempts`-th failure: doubling from
+    `base_delay` (SCHEDULER_RETRY_BASE_DELAY) up to `max_delay`
+    (SCHEDULER_RETRY_MAX_DELAY), of which a random half is jitter so posts
+    that failed together do not retry together.
+    """
+    base_delay = settings.SCHEDULER_RETRY_BASE_DELAY if base_delay is None else base_delay
+    max_delay = settings.SCHEDULER_RETRY_MAX_DELAY if max_delay is None else max_delay
+    delay = min(base_delay * 2 ** (failed_attempts - 1), max_delay)
+    return delay / 2 + random.uniform(0, delay / 2)
@@ -1,11 +1,17 @@
+from itertools import islice
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import SchedulePost
+from .models import RecurringSchedule, SchedulePost, Status
+from .recurrence import occurrences, parse_rule
+from .services import LinkedInPostInvalid, validate_post
 from allauth.socialaccount.models import SocialAccount
 
+
 class SchedulePostSerializer(serializers.ModelSerializer):
 
     author_username = serializers.CharField(source='author.username', read_only=True)
-    social_account_name = serializers.CharField(source='social_account.provider', read_only=True)
+    social_account_provider = serializers.CharField(source='social_account.provider', read_only=True)
     social_account = serializers.PrimaryKeyRelatedField(queryset=SocialAccount.objects.all())
     
     class Meta:
@@ -18,10 +24,75 @@ class SchedulePostSerializer(serializers.ModelSerializer):
             'content', 
             'media_file', 
             'status', 
-            'publish_at', 
+            'scheduled_time', 
+            'published_at', 
             'created_at',
         ]
-        read_only_fields = ['id', 'author_username', 'status', 'created_at'] 
+        read_only_fields = ['id', 'author_username', 'status', 'published_at', 'created_at'] 
+
+
+class BulkSchedulePostRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk import. social_account is a plain id here; ownership is
+    checked for the whole chunk at once instead of with a query per row.
+    """
+    social_account = serializers.IntegerField()
+    content = serializers.CharField(max_length=1000)
+    scheduled_time = serializers.DateTimeField()
+    status = serializers.ChoiceField(choices=[Status.DRAFT, Status.SCHEDULED], default=Status.SCHEDULED)
+
+
+class RecurringScheduleSerializer(serializers.ModelSerializer):
+    """
+    A recurring series. `upcoming` previews its next occurrences, which are
+    computed from the rule, not read from stored posts.
+    """
+    UPCOMING = 5
+
+    social_account = serializers.PrimaryKeyRelatedField(queryset=SocialAccount.objects.all())
+    upcoming = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RecurringSchedule
+        fields = [
+            'id',
+            'social_account',
+            'content',
+            'media_file',
+            'rrule',
+            'dtstart',
+            'tzname',
+            'active',
+            'upcoming',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = ['id', 'upcoming', 'created_at', 'updated_at']
+
+    def validate_social_account(self, social_account):
+        if social_account.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError("Not one of your connected accounts.")
+        return social_account
+
+    def validate(self, attrs):
+        def current(field):
+            return attrs[field] if field in attrs else getattr(self.instance, field, None)
+
+        try:
+            parse_rule(current('rrule'), current('dtstart'), current('tzname') or 'UTC')
+        except ValueError as e:
+            raise serializers.ValidationError({'rrule': str(e)})
+        media_file = current('media_file')
+        try:
+            validate_post(current('social_account').provider, current('content'), media_file.name if media_file else None)
+        except LinkedInPostInvalid as e:
+            raise serializers.ValidationError(str(e))
+        return attrs
+
+    def get_upcoming(self, series):
+        if not series.active:
+            return []
+        return list(islice(occurrences(series, timezone.now()), self.UPCOMING))
 
 
 class SocialAccountSerializer(serializers.ModelSerializer):
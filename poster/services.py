@@ -1,12 +1,32 @@
+import json
+import os
+import time
 import requests
 import mimetypes
+from dataclasses import dataclass
 from datetime import timedelta
+from urllib.parse import quote
 from django.utils import timezone
 from django.conf import settings
+from allauth.socialaccount.adapter import get_adapter
 from allauth.socialaccount.models import SocialToken, SocialAccount
+from social_scheduler.metrics import span
+
+from .assets import file_digest, forget_asset, lookup_asset, remember_asset
+from .http_client import get_session, parse_retry_after, was_throttled
+from .ratelimit import Limit, rate_limiter
+from .tokens import REFRESH_MARGIN, token_cache
 
 # --- Constants ---
-LINKEDIN_API_BASE_URL = "https://api.linkedin.com/v2"
+IMAGE_RECIPE = "urn:li:digitalmediaRecipe:feedshare-image"
+VIDEO_RECIPE = "urn:li:digitalmediaRecipe:feedshare-video"
+# SocialToken columns a refresh changes; saving only these keeps the write small.
+REFRESHED_TOKEN_FIELDS = ['token', 'token_secret', 'expires_at']
+# LinkedIn's limit on the text of a share, in characters.
+MAX_POST_LENGTH = 3000
+# Provider ids LinkedIn accounts are stored under: 'linkedin' by the OpenID
+# Connect flow in linkedinposter, 'linkedin_oauth2' by allauth's provider.
+LINKEDIN_PROVIDERS = ('linkedin', 'linkedin_oauth2')
 
 # --- Custom Exceptions for Clear Error Handling ---
 
@@ -15,141 +35,254 @@ class LinkedInAccountNotConnected(Exception):
     pass
 
 class LinkedInAPIError(Exception):
-    """Raised for any failures when communicating with the LinkedIn API."""
+    """
+    Raised for any failures when communicating with the LinkedIn API.
+    `status_code` is set when LinkedIn answered with an error response.
+    """
+    def __init__(self, message: str = '', status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class LinkedInReauthRequired(LinkedInAPIError):
+    """Raised when a token cannot be refreshed and the user must reconnect LinkedIn."""
+    pass
+
+class LinkedInRateLimited(LinkedInAPIError):
+    """
+    Raised instead of calling LinkedIn when the account's or app's quota would
+    make the call wait longer than LINKEDIN_RATE_LIMIT_MAX_WAIT. Nothing was
+    sent; try again after `retry_after` seconds.
+    """
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LinkedInPostInvalid(Exception):
+    """Raised when LinkedIn would reject a post as it stands, however often it is retried."""
     pass
 
 
 # --- Internal Helper Functions (prefixed with _) ---
 
-def _refresh_linkedin_token(social_account: SocialAccount) -> SocialToken:
+def _api_url(path: str) -> str:
+    """Absolute URL of a LinkedIn REST API path, e.g. "/ugcPosts"."""
+    return f"{settings.LINKEDIN_API_BASE_URL}{path}"
+
+
+def _send(method: str, url: str, **kwargs) -> requests.Response:
     """
-    Checks if a token is expired and refreshes it using the refresh_token if necessary.
-    This is a critical function for long-term, automated posting.
+    Sends a request through the shared, pooled LinkedIn session.
+
+    Timeouts and retries are applied by the session; transport failures that
+    survive the retries are raised as LinkedInAPIError.
+    """
+    try:
+        return get_session().request(method, url, **kwargs)
+    except requests.RequestException as e:
+        raise LinkedInAPIError(f"{method} {url} failed: {e}") from e
+
+
+# --- Rate limiting ---
+
+def _member_bucket(social_account: SocialAccount) -> str:
+    return f"member:{social_account.pk}"
+
+
+def _member_limit() -> Limit:
+    return Limit(settings.LINKEDIN_MEMBER_DAILY_LIMIT, settings.LINKEDIN_MEMBER_BURST)
+
+
+def _rate_limits(social_account: SocialAccount) -> dict:
+    # Each provider is backed by a single SocialApp here, so the provider names
+    # the application quota without a lookup on the publish path.
+    return {
+        _member_bucket(social_account): _member_limit(),
+        f"app:{social_account.provider}": Limit(settings.LINKEDIN_APP_DAILY_LIMIT, settings.LINKEDIN_APP_BURST),
+    }
+
+
+def _reserve_quota(social_account: SocialAccount) -> float:
+    """
+    Takes a slot from the member's and the app's token buckets.
 
     Returns:
-        A SocialToken object with a guaranteed-valid access token.
+        Seconds to wait before sending, so bursts are smoothed out.
 
     Raises:
-        LinkedInAPIError: If the token cannot be refreshed.
+        LinkedInRateLimited: If the wait would exceed LINKEDIN_RATE_LIMIT_MAX_WAIT.
     """
-    try:
-        social_token = SocialToken.objects.get(account=social_account)
-    except SocialToken.DoesNotExist:
-        raise LinkedInAPIError(f"No SocialToken found for account {social_account.uid}.")
-
-    if social_token.expires_at < (timezone.now() + timedelta(seconds=60)):
-        refresh_token = social_token.token_secret
-        if not refresh_token:
-            raise LinkedInAPIError("No refresh token found. User must re-authenticate.")
-        social_app = social_account.get_provider().get_app(request=None)
-        
-        response = requests.post(
-            "https://www.linkedin.com/oauth/v2/accessToken",
-            data={
-                'grant_type': 'refresh_token',
-                'refresh_token': refresh_token,
-                'client_id': social_app.client_id,
-                'client_secret': social_app.secret,
-            }
+    granted, wait = rate_limiter.reserve(_rate_limits(social_account), settings.LINKEDIN_RATE_LIMIT_MAX_WAIT)
+    if not granted:
+        raise LinkedInRateLimited(
+            f"LinkedIn quota for account {social_account.uid} is used up for the next {wait:.0f}s.",
+            retry_after=wait,
         )
+    return wait
 
-        if response.status_code != 200:
-            raise LinkedInAPIError(f"Failed to refresh token: {response.status_code} - {response.text}")
 
-        data = response.json()
-        social_token.token = data['access_token']
-        social_token.expires_at = timezone.now() + timedelta(seconds=data['expires_in'])
-        
-        if 'refresh_token' in data:
-            social_token.token_secret = data['refresh_token']
-        social_token.save()
+def _record_quota(social_account: SocialAccount, response):
+    """Slows the member's bucket down after a 429 and lets it recover on success."""
+    bucket = _member_bucket(social_account)
+    if was_throttled(response):
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        rate_limiter.throttled(bucket, _member_limit(), retry_after)
+    else:
+        rate_limiter.succeeded(bucket)
 
-    return social_token
 
+def _limited_send(social_account: SocialAccount, method: str, url: str, **kwargs) -> requests.Response:
+    """
+    _send for calls that count against LinkedIn's member and application
+    quotas (registerUpload, ugcPosts, ...). Waits for a rate-limit slot first.
+    """
+    wait = _reserve_quota(social_account)
+    if wait > 0:
+        with span('rate_limit_wait'):
+            time.sleep(wait)
+    response = _send(method, url, **kwargs)
+    _record_quota(social_account, response)
+    return response
 
-def _get_linkedin_api_headers(social_account: SocialAccount) -> dict:
+
+# Pure request/response helpers, shared by the sync path below and poster.async_services.
+
+def _token_needs_refresh(social_token: SocialToken) -> bool:
+    return social_token.expires_at < (timezone.now() + REFRESH_MARGIN)
+
+
+def _refresh_request_data(social_token: SocialToken, social_app) -> dict:
     """
-    Refreshes the token if needed and returns valid API headers.
+    Builds the form body for the OAuth refresh_token grant.
     """
-    valid_token = _refresh_linkedin_token(social_account)
+    refresh_token = social_token.token_secret
+    if not refresh_token:
+        raise LinkedInReauthRequired("No refresh token found. User must re-authenticate.")
+    return {
+        'grant_type': 'refresh_token',
+        'refresh_token': refresh_token,
+        'client_id': social_app.client_id,
+        'client_secret': social_app.secret,
+    }
+
+
+def _apply_refresh_response(social_token: SocialToken, response) -> SocialToken:
+    """
+    Copies a refresh response onto the (unsaved) token.
+    """
+    if response.status_code in (400, 401):
+        # invalid_grant: the refresh token expired or was revoked.
+        raise LinkedInReauthRequired(f"Failed to refresh token: {response.status_code} - {response.text}")
+    if response.status_code != 200:
+        raise LinkedInAPIError(f"Failed to refresh token: {response.status_code} - {response.text}")
+
+    data = response.json()
+    social_token.token = data['access_token']
+    social_token.expires_at = timezone.now() + timedelta(seconds=data['expires_in'])
+
+    if 'refresh_token' in data:
+        social_token.token_secret = data['refresh_token']
+    return social_token
+
+
+def _api_headers(access_token: str) -> dict:
     return {
-        "Authorization": f"Bearer {valid_token.token}",
+        "Authorization": f"Bearer {access_token}",
         "X-Restli-Protocol-Version": "2.0.0",
         "LinkedIn-Version": "202305" 
     }
 
 
-def _upload_media_to_linkedin(social_account: SocialAccount, media_path: str, author_urn: str) -> str:
-    """
-    Handles the two-step process of uploading media to LinkedIn.
+def _get_social_app(social_account: SocialAccount):
+    # Looked up by provider id, so no provider class has to be registered for it.
+    return get_adapter().get_app(request=None, provider=social_account.provider)
 
-    1. Registers the upload intent to get a temporary upload URL.
-    2. Uploads the actual media file to that URL.
 
-    Returns:
-        The URN of the uploaded digital media asset (e.g., "urn:li:digitalmediaAsset:C5612AQG...").
+def _author_urn(social_account: SocialAccount) -> str:
+    if social_account.provider not in LINKEDIN_PROVIDERS:
+        raise ValueError("This function only supports LinkedIn social accounts.")
+    return f"urn:li:person:{social_account.uid}"
+
+
+def _register_upload_payload(author_urn: str, recipe: str = IMAGE_RECIPE, file_size: int = None) -> dict:
     """
-    headers = _get_linkedin_api_headers(social_account)
-    
-    # 1. Register the upload
-    register_payload = {
+    Passing `file_size` requests LinkedIn's multi-part upload mechanism.
+    """
+    payload = {
         "registerUploadRequest": {
-            "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"], # Use "feedshare-video" for videos
+            "recipes": [recipe],
             "owner": author_urn,
             "serviceRelationships": [{"relationshipType": "OWNER", "identifier": "urn:li:userGeneratedContent"}]
         }
     }
-    reg_response = requests.post(f"{LINKEDIN_API_BASE_URL}/assets?action=registerUpload", json=register_payload, headers=headers)
-    if reg_response.status_code != 200:
-        raise LinkedInAPIError(f"Failed to register media upload: {reg_response.text}")
-    
-    upload_data = reg_response.json()['value']
+    if file_size is not None:
+        payload["registerUploadRequest"]["supportedUploadMechanism"] = ["MULTIPART_UPLOAD"]
+        payload["registerUploadRequest"]["fileSize"] = file_size
+    return payload
+
+
+def _parse_register_upload(response) -> tuple:
+    """
+    Returns:
+        (upload_url, asset_urn) from a registerUpload response.
+    """
+    if response.status_code != 200:
+        raise LinkedInAPIError(f"Failed to register media upload: {response.text}")
+
+    upload_data = response.json()['value']
     upload_url = upload_data['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
-    asset_urn = upload_data['asset']
+    return upload_url, upload_data['asset']
 
-    # 2. Upload the media file
-    with open(media_path, 'rb') as f:
-        content_type, _ = mimetypes.guess_type(media_path)
-        upload_headers = {'Content-Type': content_type or 'application/octet-stream'}
-        upload_response = requests.put(upload_url, data=f, headers=upload_headers)
 
-    if upload_response.status_code not in [200, 201]:
-         raise LinkedInAPIError(f"Failed to upload media file: {upload_response.text}")
+def _check_upload_response(response):
+    if response.status_code not in [200, 201]:
+         raise LinkedInAPIError(f"Failed to upload media file: {response.text}")
 
-    return asset_urn
 
+def _media_content_type(media_path: str) -> str:
+    content_type, _ = mimetypes.guess_type(media_path)
+    return content_type or 'application/octet-stream'
 
-# --- Public-Facing Service Function ---
 
-def post_to_linkedin(social_account: SocialAccount, text: str, media_path: str = None):
-    """
-    The main service function to create a post on LinkedIn.
-    It orchestrates the entire process, including token refresh and media uploads.
+def _is_video(media_path: str) -> bool:
+    return _media_content_type(media_path).startswith('video/')
 
-    Args:
-        social_account: The SocialAccount instance for the target LinkedIn profile.
-        text: The text content of the post.
-        media_path (optional): The full local path to an image or video file to be attached.
 
-    Returns:
-        The JSON response from the LinkedIn API upon successful post creation.
+def _media_recipe(media_path: str) -> str:
+    return VIDEO_RECIPE if _is_video(media_path) else IMAGE_RECIPE
+
+
+def _media_category(media_path: str) -> str:
+    return "VIDEO" if _is_video(media_path) else "IMAGE"
+
+
+def _needs_multipart(media_path: str) -> bool:
+    return _is_video(media_path) and os.path.getsize(media_path) >= settings.LINKEDIN_MULTIPART_THRESHOLD
+
+
+def encode_payload(payload: dict) -> bytes:
+    """The ugcPosts request body, as sent."""
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+
+def validate_post(provider: str, text: str, media_name: str = None):
+    """
+    Checks a post against what LinkedIn accepts: a LinkedIn account, some
+    text within MAX_POST_LENGTH, and an image or video if media is attached.
 
     Raises:
-        ValueError: If the provided social_account is not for LinkedIn.
-        LinkedInAPIError: For any API-related failures.
+        LinkedInPostInvalid: Describing the first problem found.
     """
-    if social_account.provider != 'linkedin_oauth2':
-        raise ValueError("This function only supports 'linkedin_oauth2' social accounts.")
+    if provider not in LINKEDIN_PROVIDERS:
+        raise LinkedInPostInvalid("Posts can only be published to a LinkedIn account.")
+    if not text or not text.strip():
+        raise LinkedInPostInvalid("Post text is empty.")
+    if len(text) > MAX_POST_LENGTH:
+        raise LinkedInPostInvalid(f"Post text is {len(text)} characters; LinkedIn allows {MAX_POST_LENGTH}.")
+    if media_name and not _media_content_type(media_name).startswith(('image/', 'video/')):
+        raise LinkedInPostInvalid("Attached media must be an image or a video.")
 
-    author_urn = f"urn:li:person:{social_account.uid}"
-    asset_urn = None
 
-    # Step 1: Upload media if it exists
-    if media_path:
-        asset_urn = _upload_media_to_linkedin(social_account, media_path, author_urn)
-    
-    # Step 2: Construct the final post payload
-    headers = _get_linkedin_api_headers(social_account)
+def _build_post_payload(author_urn: str, text: str, asset_urn: str = None, media_category: str = "IMAGE") -> dict:
     post_payload = {
         "author": author_urn,
         "lifecycleState": "PUBLISHED",
@@ -164,15 +297,269 @@ def post_to_linkedin(social_account: SocialAccount, text: str, media_path: str =
     share_content = post_payload["specificContent"]["com.linkedin.ugc.ShareContent"]
     
     if asset_urn:
-        share_content["shareMediaCategory"] = "IMAGE" 
+        share_content["shareMediaCategory"] = media_category
         share_content["media"] = [{"status": "READY", "media": asset_urn}]
     else:
         share_content["shareMediaCategory"] = "NONE"
+    return post_payload
+
+
+def _check_auth(social_account: SocialAccount, response):
+    """Drops the cached token when LinkedIn rejects it, so the next call reloads it."""
+    if response.status_code == 401:
+        token_cache.invalidate(social_account.pk)
+
 
-    # Step 3: Create the post
-    response = requests.post(f"{LINKEDIN_API_BASE_URL}/ugcPosts", json=post_payload, headers=headers)
+def _asset_rejected(response) -> bool:
+    """Whether a ugcPosts failure may be LinkedIn refusing a (cached) media asset."""
+    return response.status_code in (400, 404, 422)
 
+
+def _parse_post_response(response) -> dict:
+    """
+    Returns:
+        The response body, with `id` set to the new post's URN (LinkedIn sends
+        it in the X-RestLi-Id header and may leave the body empty).
+    """
     if response.status_code != 201: # 201 Created is the success code
-        raise LinkedInAPIError(f"Failed to create LinkedIn post: {response.status_code} - {response.text}")
+        raise LinkedInAPIError(
+            f"Failed to create LinkedIn post: {response.status_code} - {response.text}",
+            status_code=response.status_code,
+        )
+    data = response.json() if response.content else {}
+    data.setdefault('id', response.headers.get('X-RestLi-Id'))
+    return data
+
+
+def _authored_posts_url(author_urn: str, count: int) -> str:
+    return _api_url(f"/ugcPosts?q=authors&authors=List({quote(author_urn, safe='')})&sortBy=CREATED&count={count}")
+
+
+def _match_published_post(response, text: str, since) -> str:
+    """
+    Returns the id of the first post in an authored-posts listing with this
+    exact text, created at or after `since`, or None.
+    """
+    if response.status_code != 200:
+        raise LinkedInAPIError(
+            f"Failed to list LinkedIn posts: {response.status_code} - {response.text}",
+            status_code=response.status_code,
+        )
+    since_ms = since.timestamp() * 1000
+    for element in response.json().get('elements', []):
+        content = element.get('specificContent', {}).get('com.linkedin.ugc.ShareContent', {})
+        created = element.get('created', {}).get('time', 0)
+        if content.get('shareCommentary', {}).get('text') == text and created >= since_ms:
+            return element.get('id')
+    return None
+
+
+def _refresh_linkedin_token(social_account: SocialAccount) -> SocialToken:
+    """
+    Checks if a token is expired and refreshes it using the refresh_token if necessary.
+    This is a critical function for long-term, automated posting.
+
+    Returns:
+        A SocialToken object with a guaranteed-valid access token.
+
+    Raises:
+        LinkedInAPIError: If the token cannot be refreshed.
+    """
+    try:
+        with span('token_read'):
+            social_token = SocialToken.objects.get(account=social_account)
+    except SocialToken.DoesNotExist:
+        raise LinkedInAPIError(f"No SocialToken found for account {social_account.uid}.")
+
+    if _token_needs_refresh(social_token):
+        with span('oauth_refresh'):
+            social_app = _get_social_app(social_account)
+            response = _send('POST', settings.LINKEDIN_OAUTH_TOKEN_URL, data=_refresh_request_data(social_token, social_app))
+            _apply_refresh_response(social_token, response)
+            social_token.save(update_fields=REFRESHED_TOKEN_FIELDS)
+
+    return social_token
+
+
+def _get_linkedin_api_headers(social_account: SocialAccount) -> dict:
+    """
+    Refreshes the token if needed and returns valid API headers.
+
+    Tokens are served from the token cache, so this only reads the database
+    (and refreshes, single-flight per account) when the cached token is
+    missing or about to expire.
+    """
+    valid_token = token_cache.get(social_account.pk, lambda: _refresh_linkedin_token(social_account))
+    return _api_headers(valid_token.access_token)
+
+
+def _upload_media_to_linkedin(social_account: SocialAccount, media_path: str, author_urn: str) -> str:
+    """
+    Handles the two-step process of uploading media to LinkedIn.
+
+    1. Registers the upload intent to get a temporary upload URL.
+    2. Uploads the actual media file to that URL.
+
+    Videos at or above LINKEDIN_MULTIPART_THRESHOLD bytes go through the
+    chunked, resumable multi-part engine in poster.media instead.
+
+    Returns:
+        The URN of the uploaded digital media asset (e.g., "urn:li:digitalmediaAsset:C5612AQG...").
+    """
+    if _needs_multipart(media_path):
+        from .media import upload_multipart
+        return upload_multipart(social_account, media_path, author_urn)
+
+    headers = _get_linkedin_api_headers(social_account)
+    
+    # 1. Register the upload
+    with span('register_upload'):
+        reg_response = _limited_send(social_account, 'POST', _api_url("/assets?action=registerUpload"), json=_register_upload_payload(author_urn, _media_recipe(media_path)), headers=headers)
+    _check_auth(social_account, reg_response)
+    upload_url, asset_urn = _parse_register_upload(reg_response)
+
+    # 2. Upload the media file
+    with span('media_put'), open(media_path, 'rb') as f:
+        upload_headers = {'Content-Type': _media_content_type(media_path)}
+        upload_response = _send('PUT', upload_url, data=f, headers=upload_headers)
+
+    _check_upload_response(upload_response)
+    return asset_urn
+
+
+def _get_or_upload_media(social_account: SocialAccount, media_path: str, author_urn: str) -> tuple:
+    """
+    Reuses the asset already uploaded for identical bytes by this member, or
+    uploads the file and remembers the result.
+
+    Returns:
+        (asset_urn, from_cache)
+    """
+    content_hash = file_digest(media_path)
+    asset_urn = lookup_asset(author_urn, content_hash)
+    if asset_urn:
+        return asset_urn, True
+
+    asset_urn = _upload_media_to_linkedin(social_account, media_path, author_urn)
+    remember_asset(author_urn, content_hash, asset_urn)
+    return asset_urn, False
+
+
+# --- Public-Facing Service Functions ---
+
+@dataclass
+class PreparedPost:
+    """A post whose media is uploaded, ready for the ugcPosts call."""
+    author_urn: str
+    text: str
+    media_path: str = None
+    asset_urn: str = None
+    media_category: str = "IMAGE"
+    # Whether asset_urn was reused rather than uploaded just now.
+    from_cache: bool = False
+    # Request body compiled when the post was scheduled (see poster.payloads).
+    compiled: bytes = None
+
+    def payload(self) -> dict:
+        return _build_post_payload(self.author_urn, self.text, self.asset_urn, self.media_category)
+
+    def body(self) -> bytes:
+        """The ugcPosts request body: the compiled one if there is one, else built now."""
+        return self.compiled if self.compiled is not None else encode_payload(self.payload())
+
+    def replace_asset(self, asset_urn: str, from_cache: bool):
+        """Swaps in a freshly uploaded asset; the compiled body named the old one."""
+        self.asset_urn, self.from_cache, self.compiled = asset_urn, from_cache, None
+
+
+def prepare_linkedin_post(
+    social_account: SocialAccount, text: str, media_path: str = None, asset_urn: str = None, compiled: bytes = None,
+) -> PreparedPost:
+    """
+    Everything before the post is created: checks the post and uploads the
+    media (or reuses an identical upload). Safe to repeat; nothing is visible
+    on the member's feed yet.
+
+    A `compiled` body (see poster.payloads) was checked when it was built and
+    is sent as is.
+
+    Raises:
+        LinkedInPostInvalid: If LinkedIn would reject the post.
+    """
+    if compiled is None:
+        validate_post(social_account.provider, text, media_path)
+    prepared = PreparedPost(_author_urn(social_account), text, media_path, asset_urn, from_cache=bool(asset_urn), compiled=compiled)
+    if media_path:
+        if not asset_urn:
+            prepared.asset_urn, prepared.from_cache = _get_or_upload_media(social_account, media_path, prepared.author_urn)
+        prepared.media_category = _media_category(media_path)
+    return prepared
+
+
+def send_linkedin_post(social_account: SocialAccount, prepared: PreparedPost) -> dict:
+    """
+    Creates the post on LinkedIn. Unlike prepare_linkedin_post this is not
+    safe to repeat blindly: see poster.ledger.
+
+    Returns:
+        The ugcPosts response, with the new post's URN in `id`.
+    """
+    headers = {**_get_linkedin_api_headers(social_account), 'Content-Type': 'application/json'}
+    with span('ugc_post'):
+        response = _limited_send(social_account, 'POST', _api_url("/ugcPosts"), data=prepared.body(), headers=headers)
+    _check_auth(social_account, response)
+
+    if prepared.from_cache and prepared.media_path and _asset_rejected(response):
+        # The cached asset may have expired on LinkedIn's side; upload afresh once.
+        forget_asset(prepared.author_urn, prepared.asset_urn)
+        prepared.replace_asset(*_get_or_upload_media(social_account, prepared.media_path, prepared.author_urn))
+        with span('ugc_post', retry=True):
+            response = _limited_send(social_account, 'POST', _api_url("/ugcPosts"), data=prepared.body(), headers=headers)
+        _check_auth(social_account, response)
+
+    return _parse_post_response(response)
+
+
+def find_published_post(social_account: SocialAccount, text: str, since) -> str:
+    """
+    Looks through the member's most recent posts for one with exactly this
+    text created since `since`, to settle whether an attempt whose outcome
+    was lost actually went out.
+
+    Returns:
+        The post's URN, or None if it is not there.
+    """
+    headers = _get_linkedin_api_headers(social_account)
+    url = _authored_posts_url(_author_urn(social_account), settings.LINKEDIN_RECONCILE_LOOKBACK)
+    with span('reconcile'):
+        response = _send('GET', url, headers=headers)
+    _check_auth(social_account, response)
+    return _match_published_post(response, text, since)
+
+
+def post_to_linkedin(social_account: SocialAccount, text: str, media_path: str = None, asset_urn: str = None):
+    """
+    The main service function to create a post on LinkedIn.
+    It orchestrates the entire process, including token refresh and media uploads.
+
+    Args:
+        social_account: The SocialAccount instance for the target LinkedIn profile.
+        text: The text content of the post.
+        media_path (optional): The full local path to an image or video file to be attached.
+        asset_urn (optional): An asset already uploaded for `media_path` (see poster.staging);
+            the upload step is skipped.
+
+    Returns:
+        The JSON response from the LinkedIn API upon successful post creation.
+
+    Raises:
+        ValueError: If the provided social_account is not for LinkedIn.
+        LinkedInRateLimited: If the account or app is out of quota for longer than
+            LINKEDIN_RATE_LIMIT_MAX_WAIT; nothing was published.
+        LinkedInAPIError: For any API-related failures.
+    """
+    # Step 1: Upload media if it exists (or reuse an identical upload)
+    prepared = prepare_linkedin_post(social_account, text, media_path, asset_urn)
 
-    return response.json()
+    # Step 2: Create the post
+    return send_linkedin_post(social_account, prepared)
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from allauth.socialaccount.models import SocialAccount, SocialToken
+
+from .accounts import invalidate_connected_accounts
+from .models import MediaStatus, SchedulePost, Status
+from .payloads import compile_post
+from .services import LinkedInPostInvalid
+from .timers import due_timer
+from .tokens import token_cache
+
+
+@receiver(pre_save, sender=SchedulePost)
+def queue_media_staging(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'media_file' not in update_fields:
+        return
+    replaced = False
+    if not instance._state.adding:
+        stored = SchedulePost.objects.filter(pk=instance.pk).values_list('media_file', flat=True).first()
+        replaced = (instance.media_file.name or None) != (stored or None)
+
+    if not instance.media_file:
+        instance.media_status = MediaStatus.NONE
+        instance.media_asset_urn = ''
+    elif replaced or instance.media_status == MediaStatus.NONE:
+        # The staged asset (if any) is of the previous file; stage the new one.
+        instance.media_status = MediaStatus.PENDING
+        instance.media_asset_urn = ''
+        instance.media_attempts = 0
+        instance.media_next_attempt_at = None
+    if replaced:
+        # Built around the previous asset; compile_payload rebuilds it.
+        instance.payload, instance.payload_hash = None, ''
+
+
+@receiver(pre_save, sender=SchedulePost)
+def compile_payload(sender, instance, update_fields=None, **kwargs):
+    # Runs after queue_media_staging, which settles media_status. Partial
+    # saves (claims, outcomes) leave content and media alone.
+    if update_fields is not None:
+        return
+    try:
+        compile_post(instance)
+    except LinkedInPostInvalid as e:
+        if instance.status == Status.SCHEDULED:
+            raise ValidationError(str(e))
+        # Drafts may be incomplete; they are checked again when scheduled.
+        instance.payload, instance.payload_hash = None, ''
+
+
+@receiver(post_save, sender=SchedulePost)
+def track_due_time(sender, instance, **kwargs):
+    if not due_timer.tracking:
+        return
+    if instance.status == Status.SCHEDULED:
+        due_timer.schedule(instance.pk, instance.due_at)
+    else:
+        due_timer.cancel(instance.pk)
+
+
+@receiver(post_delete, sender=SchedulePost)
+def forget_due_time(sender, instance, **kwargs):
+    if due_timer.tracking:
+        due_timer.cancel(instance.pk)
+
+
+@receiver(post_save, sender=SocialToken)
+@receiver(post_delete, sender=SocialToken)
+def invalidate_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.account_id)
+
+
+@receiver(post_save, sender=SocialAccount)
+@receiver(post_delete, sender=SocialAccount)
+def invalidate_account_list(sender, instance, **kwargs):
+    invalidate_connected_accounts(instance.user_id)
+
+
+@receiver(post_save, sender=SocialToken)
+@receiver(post_delete, sender=SocialToken)
+def invalidate_account_list_for_token(sender, instance, **kwargs):
+    try:
+        user_id = instance.account.user_id
+    except SocialAccount.DoesNotExist:
+        return
+    invalidate_connected_accounts(user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_account_list_for_user(sender, instance, update_fields=None, **kwargs):
+    # The payload carries the username; logins only touch last_login.
+    if update_fields is None or 'username' in update_fields:
+        invalidate_connected_accounts(instance.pk)
@@ -0,0 +1,124 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import MediaStatus, SchedulePost, Status
+from .payloads import compile_post
+from .retries import retry_backoff
+from .services import LinkedInPostInvalid, _author_urn, _get_or_upload_media
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed post is hidden from other stagers while its upload runs.
+STAGING_LEASE = timedelta(minutes=10)
+# Columns stage_post() writes.
+STAGED_FIELDS = [
+    'media_status', 'media_asset_urn', 'media_attempts', 'media_next_attempt_at', 'payload', 'payload_hash', 'updated_at',
+]
+
+
+@dataclass
+class StagingReport:
+    staged: int = 0
+    retrying: int = 0
+    failed: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.staged + self.retrying + self.failed
+
+    def __str__(self):
+        return f"{self.staged} staged, {self.retrying} will retry, {self.failed} gave up"
+
+
+def claim_posts_to_stage(batch_size: int, lead: timedelta, now=None) -> list:
+    """
+    Claims SCHEDULED posts due within `lead` whose media is still PENDING and
+    whose next attempt time has come. Claimed rows get a lease in
+    media_next_attempt_at so concurrent stagers skip them.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        ids = list(
+            SchedulePost.objects
+            .filter(
+                media_status=MediaStatus.PENDING,
+                status=Status.SCHEDULED,
+                scheduled_time__lte=now + lead,
+            )
+            .filter(Q(media_next_attempt_at__isnull=True) | Q(media_next_attempt_at__lte=now))
+            .order_by('scheduled_time')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        SchedulePost.objects.filter(id__in=ids).update(media_next_attempt_at=now + STAGING_LEASE)
+    return list(SchedulePost.objects.filter(id__in=ids).select_related('social_account'))
+
+
+def stage_post(post: SchedulePost) -> SchedulePost:
+    """
+    Uploads the post's media (reusing an identical earlier upload if there is
+    one) and records the asset URN. Failures are retried with backoff until
+    MEDIA_STAGING_MAX_ATTEMPTS, after which the publisher uploads inline.
+    """
+    close_old_connections()
+    author_urn = _author_urn(post.social_account)
+    try:
+        asset_urn, _ = _get_or_upload_media(post.social_account, post.media_file.path, author_urn)
+    except Exception as e:
+        post.media_attempts += 1
+        logger.warning("Staging media for post %s failed (attempt %d): %s", post.pk, post.media_attempts, e)
+        if post.media_attempts >= settings.MEDIA_STAGING_MAX_ATTEMPTS:
+            post.media_status = MediaStatus.FAILED
+            post.media_next_attempt_at = None
+        else:
+            delay = retry_backoff(
+                post.media_attempts, settings.MEDIA_STAGING_RETRY_BASE_DELAY, settings.MEDIA_STAGING_RETRY_MAX_DELAY,
+            )
+            post.media_next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    else:
+        post.media_status = MediaStatus.READY
+        post.media_asset_urn = asset_urn
+        post.media_next_attempt_at = None
+        try:
+            compile_post(post)
+        except LinkedInPostInvalid:
+            pass
+
+    # Compare-and-set: if the post was edited while its media uploaded, what
+    # was staged and compiled is stale and the edit's own save stands.
+    post.updated_at = timezone.now()
+    unchanged = SchedulePost.objects.filter(
+        pk=post.pk, social_account_id=post.social_account_id, content=post.content, media_file=post.media_file.name,
+    )
+    if not unchanged.update(**{field: getattr(post, field) for field in STAGED_FIELDS}):
+        logger.info("Post %s was edited while its media was staged; staging it again", post.pk)
+        SchedulePost.objects.filter(pk=post.pk, media_status=MediaStatus.PENDING).update(media_next_attempt_at=None)
+        post.media_status = MediaStatus.PENDING
+    return post
+
+
+def stage_media(batch_size: int = None, lead: timedelta = None, concurrency: int = None) -> StagingReport:
+    """
+    Uploads media for every post due within the lead time, `concurrency` at a time.
+    """
+    batch_size = batch_size or settings.MEDIA_STAGING_BATCH_SIZE
+    lead = lead or timedelta(seconds=settings.MEDIA_STAGING_LEAD_TIME)
+    concurrency = concurrency or settings.MEDIA_STAGING_CONCURRENCY
+    report = StagingReport()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='media-staging') as executor:
+        while posts := claim_posts_to_stage(batch_size, lead):
+            for post in executor.map(stage_post, posts):
+                if post.media_status == MediaStatus.READY:
+                    report.staged += 1
+                elif post.media_status == MediaStatus.FAILED:
+                    report.failed += 1
+                else:
+                    report.retrying += 1
+    return report
@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+from allauth.socialaccount.models import SocialToken
+
+from .models import SchedulePost, Status
+from .services import (
+    LINKEDIN_PROVIDERS,
+    LinkedInAPIError,
+    LinkedInReauthRequired,
+    _apply_refresh_response,
+    _get_social_app,
+    _refresh_request_data,
+    _send,
+)
+from .tokens import token_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SweepReport:
+    refreshed: int = 0
+    failed: int = 0
+    needs_reauth: int = 0
+
+    def __str__(self):
+        return f"{self.refreshed} refreshed, {self.failed} failed, {self.needs_reauth} need re-auth"
+
+
+class _Pacer:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def expiring_tokens(horizon: timedelta, now=None):
+    """
+    LinkedIn tokens that expire within `horizon`, ordered so accounts with the
+    soonest SCHEDULED post come first and accounts with nothing due come last.
+    """
+    now = now or timezone.now()
+    next_due = (
+        SchedulePost.objects
+        .filter(social_account=OuterRef('account'), status=Status.SCHEDULED)
+        .order_by('scheduled_time')
+        .values('scheduled_time')[:1]
+    )
+    return (
+        SocialToken.objects
+        .filter(account__provider__in=LINKEDIN_PROVIDERS, expires_at__lt=now + horizon)
+        .select_related('account', 'app')
+        .annotate(next_due=Subquery(next_due))
+        .order_by(F('next_due').asc(nulls_last=True), 'expires_at')
+    )
+
+
+def _refresh(social_token: SocialToken, pacer: _Pacer) -> SocialToken:
+    """Refreshes one token in memory; the caller saves it."""
+    close_old_connections()
+    social_app = social_token.app or _get_social_app(social_token.account)
+    data = _refresh_request_data(social_token, social_app)
+    pacer.wait()
+    response = _send('POST', settings.LINKEDIN_OAUTH_TOKEN_URL, data=data)
+    return _apply_refresh_response(social_token, response)
+
+
+def sweep_tokens(horizon: timedelta = None, batch_size: int = None, concurrency: int = None, rate: float = None) -> SweepReport:
+    """
+    Refreshes every LinkedIn token that expires within `horizon`, so the
+    publish path finds a fresh token in the cache instead of refreshing inline.
+
+    Tokens are refreshed `batch_size` at a time on `concurrency` threads, paced
+    to `rate` OAuth calls per second. Each batch is written back with a single
+    bulk_update and pushed into the token cache.
+    """
+    horizon = horizon or timedelta(seconds=settings.TOKEN_SWEEP_HORIZON)
+    batch_size = batch_size or settings.TOKEN_SWEEP_BATCH_SIZE
+    concurrency = concurrency or settings.TOKEN_SWEEP_CONCURRENCY
+    pacer = _Pacer(rate or settings.TOKEN_SWEEP_RATE)
+    report = SweepReport()
+
+    tokens = list(expiring_tokens(horizon))
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='token-sweeper') as executor:
+        for start in range(0, len(tokens), batch_size):
+            batch = tokens[start:start + batch_size]
+            futures = [(token, executor.submit(_refresh, token, pacer)) for token in batch]
+
+            refreshed = []
+            for token, future in futures:
+                try:
+                    refreshed.append(future.result())
+                except LinkedInReauthRequired as e:
+                    logger.warning("Account %s needs to reconnect LinkedIn: %s", token.account_id, e)
+                    report.needs_reauth += 1
+                except LinkedInAPIError as e:
+                    logger.warning("Refreshing token for account %s failed: %s", token.account_id, e)
+                    report.failed += 1
+
+            if refreshed:
+                SocialToken.objects.bulk_update(refreshed, ['token', 'token_secret', 'expires_at'])
+                for token in refreshed:
+                    token_cache.put(token.account_id, token.token, token.expires_at)
+                report.refreshed += len(refreshed)
+
+    return report
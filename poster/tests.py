@@ -1,3 +1,1243 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from allauth.socialaccount.models import SocialAccount, SocialApp, SocialToken
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from poster import media
+from poster.bulk import import_posts
+from poster.cluster import HashRing, Membership
+from poster.dispatcher import Dispatcher, claim_due_posts
+from poster.fake_linkedin import PART_SIZE, Faults, FakeLinkedIn
+from poster.fairness import DeficitRoundRobin, fair_candidates
+from poster.http_client import (
+    RETRY_STATUS_CODES, LinkedInRetry, build_session, parse_retry_after, retry_delay, should_retry,
+)
+from poster.ledger import AlreadyPublished, AttemptInProgress, begin_attempt, complete_posts, publish_once, settle_attempts
+from poster.models import AttemptState, DispatcherNode, MediaAsset, MediaStatus, MediaUpload, PublishAttempt, RecurringSchedule, SchedulePost, Status
+from poster.payloads import compile_post, compiled_payload
+from poster.ratelimit import Limit, RateLimiter
+from poster.recurrence import materialize_series, parse_rule
+from poster.results import ResultBuffer
+from poster.retries import is_retryable, retry_backoff
+from poster.services import (
+    LINKEDIN_PROVIDERS,
+    LinkedInAPIError,
+    LinkedInPostInvalid,
+    LinkedInReauthRequired,
+    find_published_post,
+    post_to_linkedin,
+    prepare_linkedin_post,
+    send_linkedin_post,
+    validate_post,
+)
+from poster.media import upload_multipart
+from poster.staging import STAGING_LEASE, claim_posts_to_stage, stage_post
+from poster.sweeper import expiring_tokens
+from poster.timers import due_timer
+from poster.tokens import REFRESH_MARGIN, TokenCache
+from poster.views import SchedulePostView
+from social_scheduler.metrics import CONTENT_TYPE, serve_metrics
+
+
+def _member(username):
+    user = get_user_model().objects.create(username=username)
+    return user, SocialAccount.objects.create(user=user, provider='linkedin_oauth2', uid=username)
+
+
+def _post(user, account, **fields):
+    fields.setdefault('status', Status.SCHEDULED)
+    fields.setdefault('scheduled_time', timezone.now())
+    return SchedulePost.objects.create(author=user, social_account=account, content=fields.pop('content', 'Hello'), **fields)
+
+
+def _list_posts(user, headers=None, **params):
+    request = APIRequestFactory().get('/api/me/posts', params, **(headers or {}))
+    force_authenticate(request, user=user)
+    response = SchedulePostView.as_view()(request)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+class LinkedInStandInMixin:
+    """
+    Runs each test against a FakeLinkedIn server (see poster.fake_linkedin),
+    with a connected account whose token is valid for a day.
+    """
+    faults = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = FakeLinkedIn(cls.faults).start()
+        cls.addClassCleanup(cls.fake.stop)
+        cls.enterClassContext(override_settings(**cls.fake.settings()))
+
+    def setUp(self):
+        self.fake.reset()
+        cache.clear()
+        self.user, self.account = _member('standin')
+        self.app = SocialApp.objects.create(provider='linkedin_oauth2', name='standin', client_id='id', secret='secret')
+        self.token = SocialToken.objects.create(
+            app=self.app, account=self.account, token='access', token_secret='refresh',
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+
+
+class LinkedInStandInTestCase(LinkedInStandInMixin, TestCase):
+    pass
+
+
+# --- Publish ledger ---
+
+class SettleAttemptsTests(TestCase):
+    def setUp(self):
+        user, account = _member('ledger')
+        self.post = _post(user, account, status=Status.PUBLISHING)
+
+    def test_succeeded_attempt_is_returned_without_asking_linkedin(self):
+        PublishAttempt.objects.create(post=self.post, state=AttemptState.SUCCEEDED, linkedin_post_urn='urn:li:share:1')
+        with mock.patch('poster.ledger.find_published_post') as find:
+            self.assertEqual(settle_attempts(self.post), 'urn:li:share:1')
+        find.assert_not_called()
+
+    def test_unknown_attempt_found_on_linkedin_is_settled_as_succeeded(self):
+        attempt = PublishAttempt.objects.create(post=self.post, state=AttemptState.UNKNOWN)
+        with mock.patch('poster.ledger.find_published_post', return_value='urn:li:share:2'):
+            self.assertEqual(settle_attempts(self.post), 'urn:li:share:2')
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.state, attempt.linkedin_post_urn), (AttemptState.SUCCEEDED, 'urn:li:share:2'))
+
+    def _stale(self, attempt):
+        PublishAttempt.objects.filter(pk=attempt.pk).update(started_at=timezone.now() - timedelta(hours=1))
+
+    def test_stale_pending_attempt_not_on_linkedin_is_settled_as_failed(self):
+        attempt = PublishAttempt.objects.create(post=self.post)
+        self._stale(attempt)
+        with mock.patch('poster.ledger.find_published_post', return_value=None):
+            self.assertIsNone(settle_attempts(self.post))
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.state, AttemptState.FAILED)
+        self.assertIsNotNone(attempt.finished_at)
+
+    def test_recent_pending_attempt_is_left_in_flight(self):
+        attempt = PublishAttempt.objects.create(post=self.post)
+        with mock.patch('poster.ledger.find_published_post') as find:
+            with self.assertRaises(AttemptInProgress):
+                settle_attempts(self.post)
+        find.assert_not_called()
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.state, AttemptState.PENDING)
+
+    def test_lookup_failure_leaves_the_attempt_unsettled(self):
+        attempt = PublishAttempt.objects.create(post=self.post, state=AttemptState.UNKNOWN)
+        with mock.patch('poster.ledger.find_published_post', side_effect=LinkedInAPIError("down", status_code=503)):
+            with self.assertRaises(LinkedInAPIError):
+                settle_attempts(self.post)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.state, AttemptState.UNKNOWN)
+
+
+class BeginAttemptTests(TestCase):
+    def setUp(self):
+        user, account = _member('begin')
+        self.post = _post(user, account, status=Status.PUBLISHING)
+
+    def test_second_attempt_while_one_is_pending_is_refused(self):
+        begin_attempt(self.post)
+        with self.assertRaises(AttemptInProgress):
+            begin_attempt(self.post)
+
+    def test_attempt_after_a_success_returns_its_urn(self):
+        PublishAttempt.objects.create(post=self.post, state=AttemptState.SUCCEEDED, linkedin_post_urn='urn:li:share:3')
+        with self.assertRaises(AlreadyPublished) as raised:
+            begin_attempt(self.post)
+        self.assertEqual(raised.exception.urn, 'urn:li:share:3')
+
+    def test_attempt_after_a_failure_is_allowed(self):
+        PublishAttempt.objects.create(post=self.post, state=AttemptState.FAILED)
+        self.assertEqual(begin_attempt(self.post).state, AttemptState.PENDING)
+
+
+class PublishOnceTests(TestCase):
+    def setUp(self):
+        user, account = _member('once')
+        self.post = _post(user, account, status=Status.PUBLISHING)
+
+    def test_success_elsewhere_during_prepare_sends_nothing(self):
+        def other_worker_publishes(*args, **kwargs):
+            PublishAttempt.objects.create(post=self.post, state=AttemptState.SUCCEEDED, linkedin_post_urn='urn:li:share:4')
+            return {}
+
+        with mock.patch('poster.ledger.prepare_linkedin_post', side_effect=other_worker_publishes), \
+                mock.patch('poster.ledger.send_linkedin_post') as send:
+            self.assertEqual(publish_once(self.post), 'urn:li:share:4')
+        send.assert_not_called()
+        self.assertEqual(self.post.attempts.count(), 1)
+
+    def test_pending_elsewhere_during_prepare_sends_nothing(self):
+        def other_worker_begins(*args, **kwargs):
+            PublishAttempt.objects.create(post=self.post)
+            return {}
+
+        with mock.patch('poster.ledger.prepare_linkedin_post', side_effect=other_worker_begins), \
+                mock.patch('poster.ledger.send_linkedin_post') as send:
+            with self.assertRaises(AttemptInProgress):
+                publish_once(self.post)
+        send.assert_not_called()
+
+    def test_success_is_recorded_on_the_attempt(self):
+        with mock.patch('poster.ledger.prepare_linkedin_post', return_value={}), \
+                mock.patch('poster.ledger.send_linkedin_post', return_value={'id': 'urn:li:share:5'}):
+            self.assertEqual(publish_once(self.post), 'urn:li:share:5')
+        attempt = self.post.attempts.get()
+        self.assertEqual((attempt.state, attempt.linkedin_post_urn), (AttemptState.SUCCEEDED, 'urn:li:share:5'))
+
+
+class CompletePostsTests(TestCase):
+    def setUp(self):
+        self.user, self.account = _member('complete')
+
+    def _claimed(self, node):
+        return _post(self.user, self.account, status=Status.PUBLISHING, claimed_by=node)
+
+    def test_records_outcomes_of_posts_still_claimed(self):
+        posts = [self._claimed('node-a'), self._claimed('node-a')]
+        for post in posts:
+            post.status, post.published_at = Status.PUBLISHED, timezone.now()
+        self.assertEqual(complete_posts(posts), 2)
+        self.assertEqual(SchedulePost.objects.filter(status=Status.PUBLISHED, claimed_by='').count(), 2)
+
+    def test_leaves_posts_taken_over_by_another_node_alone(self):
+        kept, lost = self._claimed('node-a'), self._claimed('node-a')
+        SchedulePost.objects.filter(pk=lost.pk).update(claimed_by='node-b')
+        for post in (kept, lost):
+            post.status = Status.PUBLISHED
+        with self.assertLogs('poster.ledger', 'WARNING'):
+            self.assertEqual(complete_posts([kept, lost]), 1)
+        lost.refresh_from_db()
+        self.assertEqual((lost.status, lost.claimed_by), (Status.PUBLISHING, 'node-b'))
+
+    def test_leaves_posts_no_longer_publishing_alone(self):
+        post = self._claimed('node-a')
+        SchedulePost.objects.filter(pk=post.pk).update(status=Status.SCHEDULED, claimed_by='')
+        post.status = Status.FAILED
+        with self.assertLogs('poster.ledger', 'WARNING'):
+            self.assertEqual(complete_posts([post]), 0)
+        post.refresh_from_db()
+        self.assertEqual(post.status, Status.SCHEDULED)
+
+
+# --- Retries ---
+
+class IsRetryableTests(TestCase):
+    def test_throttling_and_server_errors_are_retried(self):
+        for status_code in (408, 429, 500, 503):
+            self.assertTrue(is_retryable(LinkedInAPIError("", status_code=status_code)), status_code)
+
+    def test_client_errors_are_permanent(self):
+        for status_code in (400, 401, 403, 422):
+            self.assertFalse(is_retryable(LinkedInAPIError("", status_code=status_code)), status_code)
+
+    def test_transport_failures_are_retried(self):
+        try:
+            try:
+                raise requests.Timeout("read timed out")
+            except requests.Timeout as e:
+                raise LinkedInAPIError("timed out") from e
+        except LinkedInAPIError as error:
+            self.assertTrue(is_retryable(error))
+
+    def test_database_busy_is_retried(self):
+        self.assertTrue(is_retryable(OperationalError("database is locked")))
+
+    def test_reauth_and_non_linkedin_errors_are_permanent(self):
+        self.assertFalse(is_retryable(LinkedInReauthRequired("revoked", status_code=401)))
+        self.assertFalse(is_retryable(FileNotFoundError("media.png")))
+        self.assertFalse(is_retryable(LinkedInAPIError("no token")))
+
+
+@override_settings(SCHEDULER_RETRY_BASE_DELAY=60.0, SCHEDULER_RETRY_MAX_DELAY=600.0)
+class RetryBackoffTests(TestCase):
+    def test_doubles_with_up_to_half_jitter(self):
+        for failed_attempts, delay in ((1, 60), (2, 120), (3, 240)):
+            for _ in range(20):
+                self.assertTrue(delay / 2 <= retry_backoff(failed_attempts) <= delay)
+
+    def test_is_capped(self):
+        for _ in range(20):
+            self.assertTrue(300 <= retry_backoff(20) <= 600)
+
+    def test_takes_its_own_base_and_cap(self):
+        self.assertTrue(5 <= retry_backoff(1, 10, 100) <= 10)
+        self.assertTrue(50 <= retry_backoff(10, 10, 100) <= 100)
+
+
+# --- Fair dispatch ---
+
+class DeficitRoundRobinTests(TestCase):
+    def test_equal_weights_share_equally(self):
+        allocation = DeficitRoundRobin().allocate({1: 100, 2: 100}, {}, 10)
+        self.assertEqual(allocation, {1: 5, 2: 5})
+
+    def test_shares_follow_weights(self):
+        allocation = DeficitRoundRobin().allocate({1: 100, 2: 100}, {1: 3}, 8)
+        self.assertEqual(allocation, {1: 6, 2: 2})
+
+    def test_small_backlog_leaves_its_share_to_others(self):
+        allocation = DeficitRoundRobin().allocate({1: 100, 2: 2}, {}, 10)
+        self.assertEqual(allocation, {1: 8, 2: 2})
+
+    def test_credit_carries_into_the_next_batch(self):
+        scheduler = DeficitRoundRobin()
+        totals = scheduler.allocate({1: 100, 2: 100}, {1: 0.5}, 3) + scheduler.allocate({1: 100, 2: 100}, {1: 0.5}, 3)
+        self.assertEqual(totals, {1: 2, 2: 4})
+
+    def test_zero_weight_authors_are_skipped(self):
+        allocation = DeficitRoundRobin().allocate({1: 10, 2: 10}, {1: 0}, 5)
+        self.assertEqual(allocation, {2: 5})
+
+    def test_only_zero_weight_authors_get_nothing(self):
+        self.assertEqual(DeficitRoundRobin().allocate({1: 10}, {1: 0}, 5), {})
+        self.assertEqual(DeficitRoundRobin().allocate({1: 10, 2: 10}, {1: 0, 2: -1}, 5), {})
+
+
+class FairCandidatesTests(TestCase):
+    def test_light_author_is_not_stuck_behind_a_heavy_backlog(self):
+        heavy, heavy_account = _member('heavy')
+        light, light_account = _member('light')
+        now = timezone.now()
+        for i in range(30):
+            _post(heavy, heavy_account, scheduled_time=now - timedelta(hours=1, seconds=i))
+        light_posts = {_post(light, light_account, scheduled_time=now).pk for _ in range(2)}
+
+        picked = fair_candidates(SchedulePost.objects.filter(status=Status.SCHEDULED), 4, DeficitRoundRobin())
+        self.assertEqual(len(picked), 4)
+        self.assertEqual(light_posts & set(picked), light_posts)
+
+    def test_posts_of_an_account_are_picked_oldest_first(self):
+        user, account = _member('oldest')
+        now = timezone.now()
+        posts = [_post(user, account, scheduled_time=now - timedelta(minutes=i)) for i in range(5)]
+        picked = fair_candidates(SchedulePost.objects.filter(status=Status.SCHEDULED), 2, DeficitRoundRobin())
+        self.assertEqual(set(picked), {posts[4].pk, posts[3].pk})
+
+
+# --- Posts listing ---
+
+class KeysetPaginationTests(TestCase):
+    def test_pages_through_ties_on_scheduled_time(self):
+        user, account = _member('pages')
+        same_time = timezone.now()
+        posts = [_post(user, account, scheduled_time=same_time) for _ in range(7)]
+        posts.append(_post(user, account, scheduled_time=same_time - timedelta(minutes=1)))
+
+        seen, cursor = [], None
+        for _ in range(len(posts)):
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            response = _list_posts(user, **params)
+            self.assertEqual(response.status_code, 200)
+            seen += [post['id'] for post in response.data['results']]
+            if response.data['next'] is None:
+                break
+            cursor = parse_qs(urlparse(response.data['next']).query)['cursor'][0]
+
+        expected = sorted(posts, key=lambda post: (post.scheduled_time, post.pk), reverse=True)
+        self.assertEqual(seen, [post.pk for post in expected])
+
+    def test_rejects_a_bad_cursor(self):
+        user, _ = _member('cursor')
+        self.assertEqual(_list_posts(user, cursor='not-a-cursor').status_code, 400)
+
+
+class ConditionalListTests(TestCase):
+    def setUp(self):
+        self.user, self.account = _member('etag')
+        self.posts = [_post(self.user, self.account) for _ in range(3)]
+
+    def _revalidate(self, etag, **params):
+        return _list_posts(self.user, headers={'HTTP_IF_NONE_MATCH': etag}, **params)
+
+    def test_unchanged_listing_is_not_modified(self):
+        etag = _list_posts(self.user)['ETag']
+        response = self._revalidate(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_no_last_modified_validator(self):
+        response = _list_posts(self.user)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_delete_changes_the_etag(self):
+        etag = _list_posts(self.user)['ETag']
+        # Not the latest updated post, so the newest updated_at stays put.
+        self.posts[0].delete()
+        response = self._revalidate(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_post_leaving_the_filter_changes_the_etag(self):
+        etag = _list_posts(self.user, status=Status.SCHEDULED)['ETag']
+        SchedulePost.objects.filter(pk=self.posts[0].pk).update(status=Status.PUBLISHED)
+        response = self._revalidate(etag, status=Status.SCHEDULED)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_etag_differs_per_filter(self):
+        self.assertNotEqual(_list_posts(self.user)['ETag'], _list_posts(self.user, status=Status.DRAFT)['ETag'])
+
+
+# --- Bulk import ---
+
+class ImportPostsTests(TestCase):
+    def setUp(self):
+        self.user, self.account = _member('importer')
+        _, self.other_account = _member('someone-else')
+        self.when = (timezone.now() + timedelta(days=1)).isoformat()
+
+    def _row(self, **fields):
+        return {'social_account': self.account.pk, 'content': 'Hello', 'scheduled_time': self.when, **fields}
+
+    def test_creates_valid_rows(self):
+        report = import_posts(self.user, [self._row(), self._row(status=Status.DRAFT)])
+        self.assertEqual((report['created'], report['failed']), (2, 0))
+        self.assertEqual(
+            set(SchedulePost.objects.filter(author=self.user).values_list('status', flat=True)),
+            {Status.SCHEDULED, Status.DRAFT},
+        )
+
+    def test_rejects_accounts_of_other_users(self):
+        report = import_posts(self.user, [self._row(social_account=self.other_account.pk)])
+        self.assertEqual((report['created'], report['failed']), (0, 1))
+        self.assertIn('social_account', report['results'][0]['errors'])
+        self.assertFalse(SchedulePost.objects.exists())
+
+    def test_reports_each_invalid_row_by_number(self):
+        rows = [
+            self._row(),
+            self._row(content=''),
+            "not an object",
+            self._row(scheduled_time='tomorrow'),
+            self._row(status=Status.PUBLISHED),
+            self._row(content='x' * 1001),
+        ]
+        report = import_posts(self.user, rows, chunk_size=2)
+        self.assertEqual((report['created'], report['failed']), (1, 5))
+        results = report['results']
+        self.assertEqual([result['row'] for result in results], [1, 2, 3, 4, 5, 6])
+        self.assertIn('id', results[0])
+        self.assertIn('content', results[1]['errors'])
+        self.assertIn('non_field_errors', results[2]['errors'])
+        self.assertIn('scheduled_time', results[3]['errors'])
+        self.assertIn('status', results[4]['errors'])
+        self.assertIn('content', results[5]['errors'])
+
+    @override_settings(BULK_SCHEDULE_MAX_ROWS=2)
+    def test_stops_at_the_row_limit(self):
+        report = import_posts(self.user, [self._row() for _ in range(5)])
+        self.assertEqual(report['created'], 2)
+        self.assertIn('error', report)
+
+
+# --- Recurring series ---
+
+class ParseRuleTests(TestCase):
+    def test_keeps_the_count_and_time_zone(self):
+        dtstart = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        parsed = parse_rule('RRULE:FREQ=DAILY;COUNT=3', dtstart, 'Europe/London')
+        self.assertTrue(parsed.counted)
+        self.assertEqual(str(parsed.tz), 'Europe/London')
+        self.assertEqual(len(list(parsed.rule)), 3)
+        self.assertFalse(parse_rule('FREQ=WEEKLY', dtstart, 'UTC').counted)
+
+    def test_rejects_rules_more_frequent_than_hourly(self):
+        with self.assertRaises(ValueError):
+            parse_rule('FREQ=MINUTELY', timezone.now(), 'UTC')
+
+
+@override_settings(RECURRING_MAX_OCCURRENCES=500)
+class MaterializeSeriesTests(TestCase):
+    def setUp(self):
+        self.user, self.account = _member('series')
+        self.now = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        self.series = RecurringSchedule.objects.create(
+            author=self.user, social_account=self.account, content='Daily update',
+            rrule='FREQ=DAILY;BYHOUR=9;BYMINUTE=0', dtstart=self.now, tzname='Europe/London',
+        )
+
+    def _times(self):
+        return list(self.series.posts.order_by('scheduled_time').values_list('scheduled_time', flat=True))
+
+    def test_materializing_again_adds_nothing(self):
+        until = self.now + timedelta(days=5)
+        self.assertEqual(materialize_series(self.series, until=until, now=self.now), 5)
+        self.assertEqual(materialize_series(self.series, until=until, now=self.now), 0)
+        self.assertEqual(len(self._times()), 5)
+
+    def test_overlapping_runs_insert_each_occurrence_once(self):
+        until = self.now + timedelta(days=5)
+        stale = RecurringSchedule.objects.get(pk=self.series.pk)
+        materialize_series(self.series, until=until, now=self.now)
+        materialize_series(stale, until=until, now=self.now)
+        times = self._times()
+        self.assertEqual(len(times), len(set(times)))
+        self.assertEqual(len(times), 5)
+
+    def test_runs_in_steps_match_one_run(self):
+        for days in range(3, 40, 3):
+            materialize_series(self.series, until=self.now + timedelta(days=days), now=self.now)
+        stepped = self._times()
+
+        self.series.posts.all().delete()
+        RecurringSchedule.objects.filter(pk=self.series.pk).update(materialized_until=None, last_occurrence=None)
+        self.series.refresh_from_db()
+        materialize_series(self.series, until=self.now + timedelta(days=39), now=self.now)
+        self.assertEqual(stepped, self._times())
+        # 9am London, on both sides of the switch to summer time.
+        self.assertEqual({t.astimezone(dt_timezone.utc).hour for t in stepped}, {9, 8})
+
+    def test_count_is_kept_across_runs(self):
+        RecurringSchedule.objects.filter(pk=self.series.pk).update(rrule='FREQ=DAILY;COUNT=4;BYHOUR=9;BYMINUTE=0')
+        self.series.refresh_from_db()
+        for days in (2, 4, 10):
+            materialize_series(self.series, until=self.now + timedelta(days=days), now=self.now)
+        self.assertEqual(len(self._times()), 4)
+        self.series.refresh_from_db()
+        self.assertFalse(self.series.active)
+
+
+# --- Payload compilation ---
+
+class CompilePostTests(TestCase):
+    def setUp(self):
+        self.user, self.account = _member('compiler')
+
+    def test_post_is_compiled_on_save(self):
+        post = _post(self.user, self.account, content='Compiled')
+        share = json.loads(compiled_payload(post))['specificContent']['com.linkedin.ugc.ShareContent']
+        self.assertEqual(share['shareCommentary']['text'], 'Compiled')
+
+    def test_unchanged_post_is_not_rebuilt(self):
+        post = _post(self.user, self.account)
+        self.assertFalse(compile_post(post))
+        post.content = 'Edited'
+        self.assertTrue(compile_post(post))
+
+    def test_payload_of_an_older_version_is_ignored(self):
+        post = _post(self.user, self.account)
+        post.payload_hash = 'v1:' + post.payload_hash.split(':', 1)[1]
+        self.assertIsNone(compiled_payload(post))
+
+    def test_post_with_unstaged_media_has_no_payload(self):
+        post = _post(self.user, self.account, media_file='scheduled_media/photo.png')
+        self.assertEqual(post.media_status, MediaStatus.PENDING)
+        self.assertIsNone(compiled_payload(post))
+
+
+class ValidatePostTests(TestCase):
+    def test_accepts_accounts_of_both_linkedin_providers(self):
+        for provider in LINKEDIN_PROVIDERS:
+            validate_post(provider, 'Hello')
+
+    def test_accepts_accounts_from_the_connect_flow(self):
+        user = get_user_model().objects.create(username='connected')
+        account = SocialAccount.objects.create(user=user, provider='linkedin', uid='connected')
+        self.assertIsNotNone(compiled_payload(_post(user, account)))
+
+    def test_rejects_other_providers_and_bad_posts(self):
+        for args in (('google', 'Hello'), ('linkedin', ' '), ('linkedin', 'x' * 3001), ('linkedin', 'Hi', 'notes.txt')):
+            with self.assertRaises(LinkedInPostInvalid):
+                validate_post(*args)
+
+
+# --- Media staging ---
+
+@mock.patch('poster.staging.close_old_connections')
+class StagePostTests(TestCase):
+    ASSET = 'urn:li:digitalmediaAsset:1'
+
+    def setUp(self):
+        self.user, self.account = _member('stager')
+        self.post = _post(self.user, self.account, media_file='scheduled_media/photo.png')
+
+    def _stage(self, upload):
+        with mock.patch('poster.staging._get_or_upload_media', side_effect=upload):
+            stage_post(SchedulePost.objects.select_related('social_account').get(pk=self.post.pk))
+        self.post.refresh_from_db()
+
+    def test_staged_post_is_compiled_around_its_asset(self, _):
+        self._stage(lambda *args: (self.ASSET, False))
+        self.assertEqual((self.post.media_status, self.post.media_asset_urn), (MediaStatus.READY, self.ASSET))
+        self.assertIn(self.ASSET.encode(), compiled_payload(self.post))
+
+    def test_edit_during_upload_is_kept(self, _):
+        def edit_then_upload(*args):
+            edited = SchedulePost.objects.get(pk=self.post.pk)
+            edited.content = 'Edited meanwhile'
+            edited.save()
+            return self.ASSET, False
+
+        self._stage(edit_then_upload)
+        self.assertEqual(self.post.content, 'Edited meanwhile')
+        self.assertEqual(self.post.media_status, MediaStatus.PENDING)
+        self.assertIsNone(self.post.payload)
+        # Released, so the next staging run picks it up again.
+        self.assertIsNone(self.post.media_next_attempt_at)
+
+    def test_file_replaced_during_upload_is_staged_again(self, _):
+        def replace_then_upload(*args):
+            edited = SchedulePost.objects.get(pk=self.post.pk)
+            edited.media_file = 'scheduled_media/other.png'
+            edited.save()
+            return self.ASSET, False
+
+        self._stage(replace_then_upload)
+        self.assertEqual(self.post.media_file.name, 'scheduled_media/other.png')
+        self.assertEqual((self.post.media_status, self.post.media_asset_urn), (MediaStatus.PENDING, ''))
+
+    @override_settings(MEDIA_STAGING_RETRY_BASE_DELAY=60.0, MEDIA_STAGING_RETRY_MAX_DELAY=900.0)
+    def test_failed_upload_is_retried_minutes_later(self, _):
+        self._stage(LinkedInAPIError("down", status_code=503))
+        self.assertEqual((self.post.media_status, self.post.media_attempts), (MediaStatus.PENDING, 1))
+        delay = (self.post.media_next_attempt_at - timezone.now()).total_seconds()
+        self.assertTrue(25 <= delay <= 60, delay)
+
+    @override_settings(MEDIA_STAGING_MAX_ATTEMPTS=2)
+    def test_gives_up_after_max_attempts(self, _):
+        for _ in range(2):
+            self._stage(LinkedInAPIError("down", status_code=503))
+        self.assertEqual((self.post.media_status, self.post.media_attempts), (MediaStatus.FAILED, 2))
+        self.assertIsNone(self.post.media_next_attempt_at)
+
+    def test_replacing_a_staged_file_stages_it_again(self, _):
+        self._stage(lambda *args: (self.ASSET, False))
+        self.post.media_file = 'scheduled_media/other.png'
+        self.post.save()
+        self.assertEqual((self.post.media_status, self.post.media_asset_urn), (MediaStatus.PENDING, ''))
+        self.assertIsNone(compiled_payload(self.post))
+
+
+class ClaimPostsToStageTests(TestCase):
+    def setUp(self):
+        self.user, self.account = _member('claim-stage')
+
+    def _media_post(self, due_in):
+        return _post(self.user, self.account, media_file='scheduled_media/photo.png', scheduled_time=timezone.now() + due_in)
+
+    def test_claims_posts_due_within_the_lead_time(self):
+        soon = self._media_post(timedelta(minutes=30))
+        self._media_post(timedelta(hours=3))
+        _post(self.user, self.account, scheduled_time=timezone.now())
+        claimed = claim_posts_to_stage(10, timedelta(hours=1))
+        self.assertEqual([post.pk for post in claimed], [soon.pk])
+
+    def test_claimed_posts_are_leased(self):
+        self._media_post(timedelta(minutes=30))
+        self.assertEqual(len(claim_posts_to_stage(10, timedelta(hours=1))), 1)
+        self.assertEqual(claim_posts_to_stage(10, timedelta(hours=1)), [])
+        self.assertEqual(len(claim_posts_to_stage(10, timedelta(hours=1), now=timezone.now() + STAGING_LEASE)), 1)
+
+
+# --- Token sweeper ---
+
+class ExpiringTokensTests(TestCase):
+    def _token(self, username, provider='linkedin_oauth2', expires_in=timedelta(hours=1)):
+        user = get_user_model().objects.create(username=username)
+        account = SocialAccount.objects.create(user=user, provider=provider, uid=username)
+        SocialToken.objects.create(account=account, token=username, expires_at=timezone.now() + expires_in)
+        return user, account
+
+    def test_finds_tokens_of_both_linkedin_providers(self):
+        self._token('oauth2')
+        self._token('connected', provider='linkedin')
+        self._token('other', provider='google')
+        self._token('fresh', expires_in=timedelta(days=30))
+        tokens = expiring_tokens(timedelta(days=1))
+        self.assertEqual({token.token for token in tokens}, {'oauth2', 'connected'})
+
+    def test_accounts_with_a_post_due_soonest_come_first(self):
+        self._token('idle', expires_in=timedelta(minutes=10))
+        later = self._token('later')
+        sooner = self._token('sooner')
+        _post(*later, scheduled_time=timezone.now() + timedelta(hours=2))
+        _post(*sooner, scheduled_time=timezone.now() + timedelta(hours=1))
+        tokens = expiring_tokens(timedelta(days=1))
+        self.assertEqual([token.token for token in tokens], ['sooner', 'later', 'idle'])
+
+
+# --- Rate limiting ---
+
+class RateLimiterTests(TestCase):
+    LIMIT = Limit(per_day=86400, burst=3)
+
+    def setUp(self):
+        self.limiter = RateLimiter()
+        cache.clear()
+
+    def test_burst_goes_through_then_calls_are_spaced(self):
+        waits = [self.limiter.reserve({'member:1': self.LIMIT}, 10)[1] for _ in range(5)]
+        self.assertEqual([wait <= 0 for wait in waits], [True, True, True, False, False])
+        self.assertAlmostEqual(waits[4] - waits[3], self.LIMIT.interval, places=1)
+
+    def test_nothing_is_taken_beyond_max_wait(self):
+        for _ in range(3):
+            self.limiter.reserve({'member:1': self.LIMIT}, 0)
+        granted, wait = self.limiter.reserve({'member:1': self.LIMIT}, 0)
+        self.assertFalse(granted)
+        self.assertGreater(wait, 0)
+        self.assertTrue(self.limiter.reserve({'member:1': self.LIMIT}, 10)[0])
+
+    def test_throttling_holds_callers_until_retry_after(self):
+        self.limiter.throttled('member:1', self.LIMIT, retry_after=60)
+        granted, wait = self.limiter.reserve({'member:1': self.LIMIT}, 10)
+        self.assertFalse(granted)
+        self.assertGreater(wait, 55)
+
+    def test_a_lock_taken_over_on_timeout_is_left_to_its_holder(self):
+        lock_key = 'linkedin-rate:member:1:lock'
+        cache.add(lock_key, 'holder', 60)
+        with mock.patch('poster.ratelimit.LOCK_TIMEOUT', 0.01):
+            self.assertTrue(self.limiter.reserve({'member:1': self.LIMIT}, 10)[0])
+        self.assertEqual(cache.get(lock_key), 'holder')
+
+    def test_own_lock_is_released(self):
+        self.limiter.reserve({'member:1': self.LIMIT}, 10)
+        self.assertIsNone(cache.get('linkedin-rate:member:1:lock'))
+
+
+# --- Dispatching ---
+
+class RunOnceTests(TransactionTestCase):
+    """A pass keeps claiming while posts come due, rather than draining what it first saw."""
+
+    def setUp(self):
+        self.user, self.account = _member('dispatch')
+        _post(self.user, self.account, content='first')
+        self.dispatcher = Dispatcher(batch_size=10, max_workers=2)
+
+    def tearDown(self):
+        self.dispatcher.executor.shutdown(wait=True)
+        due_timer.load([])
+        due_timer.tracking = False
+
+    def _run_once(self, on_first):
+        def publish(post):
+            if post.content == 'first':
+                on_first()
+            return f"urn:li:share:{post.pk}"
+
+        with mock.patch('poster.dispatcher.publish_once', side_effect=publish):
+            return self.dispatcher.run_once()
+
+    def test_post_saved_during_the_pass_is_published_in_it(self):
+        stats = self._run_once(lambda: _post(self.user, self.account, content='second'))
+        self.assertEqual(stats.published, 2)
+        self.assertFalse(SchedulePost.objects.exclude(status=Status.PUBLISHED).exists())
+
+    @override_settings(SCHEDULER_POLL_INTERVAL=0)
+    def test_post_saved_by_another_process_is_found_by_polling(self):
+        def saved_elsewhere():
+            # bulk_create sends no signals, so the timer does not hear of it.
+            SchedulePost.objects.bulk_create([SchedulePost(
+                author=self.user, social_account=self.account, content='second',
+                status=Status.SCHEDULED, scheduled_time=timezone.now(),
+            )])
+
+        stats = self._run_once(saved_elsewhere)
+        self.assertEqual(stats.published, 2)
+
+
+class DueTimerTrackingTests(TestCase):
+    def setUp(self):
+        self.user, self.account = _member('timer')
+
+    def tearDown(self):
+        due_timer.load([])
+        due_timer.tracking = False
+
+    def test_saves_are_not_tracked_outside_a_dispatcher(self):
+        _post(self.user, self.account)
+        self.assertEqual(len(due_timer), 0)
+
+    def test_saves_are_tracked_in_a_dispatcher_process(self):
+        due_timer.tracking = True
+        post = _post(self.user, self.account, scheduled_time=timezone.now() + timedelta(hours=1))
+        self.assertEqual(due_timer.next_due(), post.scheduled_time)
+        post.delete()
+        self.assertIsNone(due_timer.next_due())
+
+
+# --- Metrics ---
+
+@override_settings(METRICS_TOKEN='scrape-secret')
+class ServeMetricsTests(TestCase):
+    def setUp(self):
+        self.server = serve_metrics(0)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        host, port = self.server.server_address
+        self.url = f"http://{host}:{port}/metrics"
+
+    def test_binds_to_localhost_by_default(self):
+        self.assertEqual(self.server.server_address[0], '127.0.0.1')
+
+    def test_scrape_needs_the_token(self):
+        self.assertEqual(requests.get(self.url, timeout=5).status_code, 401)
+        wrong = requests.get(self.url, headers={'Authorization': 'Bearer guess'}, timeout=5)
+        self.assertEqual(wrong.status_code, 401)
+        response = requests.get(self.url, headers={'Authorization': 'Bearer scrape-secret'}, timeout=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+
+
+# --- LinkedIn stand-in ---
+
+class PublishThroughStandInTests(LinkedInStandInTestCase):
+    def test_post_is_created_with_its_text(self):
+        result = post_to_linkedin(self.account, "Hello from the stand-in")
+        self.assertEqual([post['id'] for post in self.fake.posts], [result['id']])
+        share = self.fake.posts[0]['specificContent']['com.linkedin.ugc.ShareContent']
+        self.assertEqual(share['shareCommentary']['text'], "Hello from the stand-in")
+
+    def test_published_post_is_found_when_reconciling(self):
+        result = post_to_linkedin(self.account, "Reconcile me")
+        since = timezone.now() - timedelta(minutes=1)
+        self.assertEqual(find_published_post(self.account, "Reconcile me", since), result['id'])
+        self.assertIsNone(find_published_post(self.account, "Never sent", since))
+
+    def test_publishing_a_post_twice_sends_it_once(self):
+        post = _post(self.user, self.account, status=Status.PUBLISHING)
+        urn = publish_once(post)
+        self.assertEqual(publish_once(post), urn)
+        self.assertEqual(self.fake.calls['createPost'], 1)
+
+    def test_expired_token_is_refreshed(self):
+        SocialToken.objects.filter(pk=self.token.pk).update(expires_at=timezone.now() - timedelta(hours=1))
+        post_to_linkedin(self.account, "After a refresh")
+        self.assertEqual(self.fake.calls['accessToken'], 1)
+        self.token.refresh_from_db()
+        self.assertGreater(self.token.expires_at, timezone.now())
+
+
+# --- HTTP client ---
+
+class RetryPolicyTests(TestCase):
+    def setUp(self):
+        self.retry = LinkedInRetry(total=3, status_forcelist=RETRY_STATUS_CODES)
+
+    def test_idempotent_calls_are_retried_on_throttling_and_server_errors(self):
+        for method in ('GET', 'PUT'):
+            for status_code in (429, 500, 503):
+                self.assertTrue(self.retry.is_retry(method, status_code), (method, status_code))
+                self.assertTrue(should_retry(method, status_code), (method, status_code))
+
+    def test_post_is_retried_only_when_throttled(self):
+        self.assertTrue(self.retry.is_retry('POST', 429))
+        self.assertTrue(should_retry('POST', 429))
+        for status_code in (500, 503):
+            self.assertFalse(self.retry.is_retry('POST', status_code), status_code)
+            self.assertFalse(should_retry('POST', status_code), status_code)
+
+    def test_client_errors_are_not_retried(self):
+        self.assertFalse(self.retry.is_retry('GET', 400))
+        self.assertFalse(should_retry('GET', 404))
+
+    def test_retry_after_is_parsed_and_capped(self):
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        with override_settings(LINKEDIN_HTTP_MAX_RETRY_AFTER=60.0):
+            self.assertEqual(retry_delay(0, retry_after=3600), 60.0)
+
+    def test_session_applies_default_timeouts(self):
+        session = build_session()
+        with mock.patch('requests.Session.request') as request:
+            session.get('http://example.invalid/')
+        self.assertEqual(request.call_args.kwargs['timeout'], session.timeout)
+
+
+class ServerErrorOnCreateTests(LinkedInStandInTestCase):
+    faults = Faults(error_rate=1.0)
+
+    def test_create_is_not_retried_and_left_for_reconciling(self):
+        post = _post(self.user, self.account, status=Status.PUBLISHING)
+        with self.assertRaises(LinkedInAPIError):
+            publish_once(post)
+        self.assertEqual(self.fake.calls['createPost'], 1)
+        self.assertEqual(post.attempts.get().state, AttemptState.UNKNOWN)
+
+
+# --- Token cache ---
+
+@override_settings(LINKEDIN_TOKEN_CACHE_ALIAS='default')
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tokens = TokenCache()
+        self.loads = 0
+
+    def _loader(self, delay=0.0, lifetime=timedelta(hours=1)):
+        def load():
+            self.loads += 1
+            time.sleep(delay)
+            return mock.Mock(token=f"token-{self.loads}", expires_at=timezone.now() + lifetime)
+        return load
+
+    def test_concurrent_misses_load_once(self):
+        results = []
+        load = self._loader(delay=0.1)
+        threads = [threading.Thread(target=lambda: results.append(self.tokens.get(1, load))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loads, 1)
+        self.assertEqual({token.access_token for token in results}, {'token-1'})
+
+    def test_concurrent_async_misses_load_once(self):
+        load = self._loader(delay=0.05)
+
+        async def aload():
+            return load()
+
+        async def gather():
+            return await asyncio.gather(*(self.tokens.aget(1, aload) for _ in range(8)))
+
+        results = asyncio.run(gather())
+        self.assertEqual(self.loads, 1)
+        self.assertEqual({token.access_token for token in results}, {'token-1'})
+
+    def test_token_about_to_expire_is_loaded_again(self):
+        self.tokens.get(1, self._loader(lifetime=REFRESH_MARGIN / 2))
+        self.assertEqual(self.tokens.get(1, self._loader()).access_token, 'token-2')
+
+    def test_waits_for_a_refresh_in_another_process(self):
+        cache.add('linkedin-token:1:lock', 1, 30)
+
+        def other_process_refreshes():
+            time.sleep(0.1)
+            TokenCache().put(1, 'from-elsewhere', timezone.now() + timedelta(hours=1))
+
+        thread = threading.Thread(target=other_process_refreshes)
+        thread.start()
+        token = self.tokens.get(1, self._loader())
+        thread.join()
+        self.assertEqual((token.access_token, self.loads), ('from-elsewhere', 0))
+        self.assertIsNotNone(cache.get('linkedin-token:1:lock'))
+
+    def test_lock_waited_out_is_left_to_its_holder(self):
+        cache.add('linkedin-token:1:lock', 'holder', 30)
+        with mock.patch('poster.tokens.REFRESH_LOCK_TIMEOUT', 0.1):
+            self.tokens.get(1, self._loader())
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(cache.get('linkedin-token:1:lock'), 'holder')
+
+    def test_own_lock_is_released(self):
+        self.tokens.get(1, self._loader())
+        self.assertIsNone(cache.get('linkedin-token:1:lock'))
+
+
+# --- Multi-part upload ---
+
+@override_settings(LINKEDIN_UPLOAD_PARALLELISM=1)
+class MultipartUploadTests(LinkedInStandInMixin, TransactionTestCase):
+    """Part uploads record progress from pool threads, so this runs outside a test transaction."""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'clip.mp4')
+        with open(self.path, 'wb') as f:
+            f.write(os.urandom(2 * PART_SIZE + 1024))
+        self.author_urn = f"urn:li:person:{self.account.uid}"
+
+    def test_uploads_every_part_then_completes(self):
+        asset_urn = upload_multipart(self.account, self.path, self.author_urn)
+        self.assertEqual((self.fake.calls['upload'], self.fake.calls['completeMultiPartUpload']), (3, 1))
+        upload = MediaUpload.objects.get()
+        self.assertEqual((upload.asset_urn, len(upload.part_responses)), (asset_urn, 3))
+        self.assertIsNotNone(upload.completed_at)
+
+    def test_resumes_with_only_the_missing_parts(self):
+        upload_part = media._upload_part
+        failed = []
+
+        def last_part_fails_once(path, part):
+            if part['byteRange']['lastByte'] == os.path.getsize(path) - 1 and not failed:
+                failed.append(part)
+                raise LinkedInAPIError("connection reset")
+            return upload_part(path, part)
+
+        with mock.patch('poster.media._upload_part', side_effect=last_part_fails_once):
+            with self.assertRaises(LinkedInAPIError):
+                upload_multipart(self.account, self.path, self.author_urn)
+            self.assertEqual(len(MediaUpload.objects.get().part_responses), 2)
+            upload_multipart(self.account, self.path, self.author_urn)
+        self.assertEqual(self.fake.calls['registerUpload'], 1)
+        self.assertEqual(self.fake.calls['upload'], 3)
+        self.assertIsNotNone(MediaUpload.objects.get().completed_at)
+
+
+# --- Asset cache ---
+
+class AssetCacheTests(LinkedInStandInTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.paths = []
+        for name, data in (('a.png', b'first image'), ('copy.png', b'first image'), ('b.png', b'second image')):
+            path = os.path.join(directory, name)
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.paths.append(path)
+
+    def _prepare(self, path):
+        return prepare_linkedin_post(self.account, "With media", media_path=path)
+
+    def test_identical_bytes_are_uploaded_once(self):
+        first, copy = self._prepare(self.paths[0]), self._prepare(self.paths[1])
+        self.assertEqual(copy.asset_urn, first.asset_urn)
+        self.assertEqual((first.from_cache, copy.from_cache), (False, True))
+        self.assertEqual(self.fake.calls['registerUpload'], 1)
+
+    def test_different_bytes_are_uploaded(self):
+        self.assertNotEqual(self._prepare(self.paths[0]).asset_urn, self._prepare(self.paths[2]).asset_urn)
+        self.assertEqual(self.fake.calls['registerUpload'], 2)
+
+    def test_expired_entry_is_uploaded_again(self):
+        self._prepare(self.paths[0])
+        MediaAsset.objects.update(uploaded_at=timezone.now() - timedelta(days=30))
+        with override_settings(LINKEDIN_ASSET_CACHE_TTL=3600):
+            self.assertFalse(self._prepare(self.paths[0]).from_cache)
+        self.assertEqual(self.fake.calls['registerUpload'], 2)
+
+    def test_rejected_cached_asset_is_forgotten_and_replaced(self):
+        stale = self._prepare(self.paths[0]).asset_urn
+        prepared = self._prepare(self.paths[0])
+        with mock.patch('poster.services._asset_rejected', side_effect=[True, False]):
+            send_linkedin_post(self.account, prepared)
+        self.assertNotEqual(prepared.asset_urn, stale)
+        self.assertEqual(list(MediaAsset.objects.values_list('asset_urn', flat=True)), [prepared.asset_urn])
+        self.assertIn(prepared.asset_urn, json.dumps(self.fake.posts[-1]))
+
+
+# --- Dispatcher cluster ---
+
+class HashRingTests(TestCase):
+    def test_a_joining_node_takes_about_its_share(self):
+        before = HashRing(['a', 'b', 'c'])
+        after = HashRing(['a', 'b', 'c', 'd'])
+        moved = [key for key in range(4000) if before.owner(key) != after.owner(key)]
+        self.assertTrue(all(after.owner(key) == 'd' for key in moved))
+        self.assertAlmostEqual(len(moved) / 4000, 1 / 4, delta=0.1)
+
+    def test_empty_ring_has_no_owner(self):
+        self.assertIsNone(HashRing([]).owner(1))
+
+
+@override_settings(SCHEDULER_PARTITIONS=64, SCHEDULER_LEASE_TTL=120.0)
+class MembershipTests(TestCase):
+    def test_live_nodes_split_the_partitions(self):
+        a, b = Membership('node-a'), Membership('node-b')
+        a.heartbeat()
+        b.heartbeat()
+        a.heartbeat()
+        self.assertEqual(a.partitions | b.partitions, frozenset(range(64)))
+        self.assertFalse(a.partitions & b.partitions)
+
+    def test_rebalance_only_moves_partitions_to_the_new_node(self):
+        a = Membership('node-a')
+        a.heartbeat()
+        alone = a.partitions
+        Membership('node-b').heartbeat()
+        a.heartbeat()
+        self.assertLess(a.partitions, alone)
+
+    def test_expired_lease_is_reaped_and_its_posts_handed_back(self):
+        user, account = _member('reaped')
+        dead = _post(user, account, status=Status.PUBLISHING, claimed_by='node-dead')
+        alive = _post(user, account, status=Status.PUBLISHING, claimed_by='node-alive')
+        now = timezone.now()
+        DispatcherNode.objects.create(name='node-dead', heartbeat_at=now - timedelta(minutes=5))
+        DispatcherNode.objects.create(name='node-alive', heartbeat_at=now)
+
+        self.assertEqual(Membership('node-reaper').reap(now), 1)
+        self.assertEqual(list(DispatcherNode.objects.values_list('name', flat=True)), ['node-alive'])
+        dead.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((dead.status, dead.claimed_by), (Status.SCHEDULED, ''))
+        self.assertEqual((alive.status, alive.claimed_by), (Status.PUBLISHING, 'node-alive'))
+
+    def test_leaving_hands_the_partitions_over(self):
+        a, b = Membership('node-a'), Membership('node-b')
+        a.heartbeat()
+        b.heartbeat()
+        a.leave()
+        b.heartbeat()
+        self.assertEqual(b.partitions, frozenset(range(64)))
+
+    def test_nodes_claim_only_their_partitions(self):
+        user, _ = _member('partitioned')
+        for i in range(8):
+            _post(user, SocialAccount.objects.create(user=user, provider='linkedin_oauth2', uid=f"partitioned-{i}"))
+        a = Membership('node-a')
+        a.heartbeat()
+        Membership('node-b').heartbeat()
+        a.heartbeat()
+        claim_due_posts(100, fair=False, partitions=a.partitions, node=a.name)
+        for post in SchedulePost.objects.all():
+            mine = post.social_account_id % 64 in a.partitions
+            self.assertEqual((post.status, post.claimed_by), (Status.PUBLISHING, 'node-a') if mine else (Status.SCHEDULED, ''))
+
+
+# --- Write-behind results ---
+
+class ResultBufferTests(TestCase):
+    def setUp(self):
+        self.user, self.account = _member('buffered')
+
+    def tearDown(self):
+        due_timer.load([])
+
+    def _published(self, node='node-a'):
+        post = _post(self.user, self.account, status=Status.PUBLISHING, claimed_by=node)
+        post.status, post.published_at = Status.PUBLISHED, timezone.now()
+        return post
+
+    def test_due_once_full(self):
+        buffer = ResultBuffer(max_size=2, max_delay=60)
+        self.assertFalse(buffer.add(self._published()))
+        self.assertTrue(buffer.add(self._published()))
+
+    def test_due_once_the_oldest_has_waited(self):
+        buffer = ResultBuffer(max_size=100, max_delay=0)
+        self.assertTrue(buffer.add(self._published()))
+
+    def test_flush_records_outcomes_of_every_node(self):
+        buffer = ResultBuffer(max_size=100, max_delay=60)
+        for node in ('node-a', 'node-a', 'node-b'):
+            buffer.add(self._published(node))
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(SchedulePost.objects.filter(status=Status.PUBLISHED, claimed_by='').count(), 3)
+
+    def test_failed_flush_keeps_its_posts_for_the_next(self):
+        buffer = ResultBuffer(max_size=100, max_delay=60)
+        buffer.add(self._published())
+        with mock.patch('poster.results.complete_posts', side_effect=OperationalError("database is locked")):
+            with self.assertLogs('poster.results', 'WARNING'):
+                self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(buffer.flush(), 1)
+
+    def test_deferred_posts_go_back_on_the_timer(self):
+        post = _post(self.user, self.account, status=Status.PUBLISHING, claimed_by='node-a')
+        post.status, post.next_attempt_at = Status.SCHEDULED, timezone.now() + timedelta(minutes=5)
+        buffer = ResultBuffer(max_size=100, max_delay=60)
+        buffer.add(post)
+        buffer.flush()
+        self.assertEqual(due_timer.next_due(), post.next_attempt_at)
+
+
+# --- Database concurrency ---
+
+class ReadsDuringWritesTests(TransactionTestCase):
+    """The posts listing keeps answering while dispatchers claim and complete posts."""
+
+    # Well under SQLITE_BUSY_TIMEOUT: a read that waited for the writer would take that long.
+    MAX_READ_SECONDS = 1.0
+
+    def setUp(self):
+        self.user, account = _member('reader')
+        SchedulePost.objects.bulk_create(
+            SchedulePost(
+                author=self.user, social_account=account, content=f"post {i}",
+                status=Status.SCHEDULED, scheduled_time=timezone.now(),
+            )
+            for i in range(200)
+        )
+
+    def _in_thread(self, target, *args):
+        errors = []
+
+        def run():
+            try:
+                target(*args)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread, errors
+
+    def test_read_while_claim_is_open(self):
+        holding, release = threading.Event(), threading.Event()
+
+        def claim_and_hold():
+            with transaction.atomic():
+                claim_due_posts(50, fair=False)
+                holding.set()
+                release.wait(5)
+
+        thread, errors = self._in_thread(claim_and_hold)
+        try:
+            self.assertTrue(holding.wait(5))
+            started = time.perf_counter()
+            response = _list_posts(self.user, limit=50)
+            elapsed = time.perf_counter() - started
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, self.MAX_READ_SECONDS)
+
+    def test_reads_alongside_claim_complete_writers(self):
+        stop = threading.Event()
+
+        def write():
+            while not stop.is_set():
+                posts = claim_due_posts(10, fair=False)
+                if not posts:
+                    return
+                for post in posts:
+                    post.status = Status.PUBLISHED
+                    post.published_at = timezone.now()
+                complete_posts(posts)
+
+        writers = [self._in_thread(write) for _ in range(2)]
+        slowest = 0.0
+        try:
+            for _ in range(20):
+                started = time.perf_counter()
+                response = _list_posts(self.user, limit=50)
+                slowest = max(slowest, time.perf_counter() - started)
+                self.assertEqual(response.status_code, 200)
+        except OperationalError as e:
+            self.fail(f"Read failed under write load: {e}")
+        finally:
+            stop.set()
+            for thread, _ in writers:
+                thread.join()
+        self.assertEqual([e for _, errors in writers for e in errors], [])
+        self.assertLess(slowest, self.MAX_READ_SECONDS)
@@ -0,0 +1,86 @@
+import heapq
+import threading
+from datetime import datetime
+
+from django.utils import timezone
+
+
+class NextDueTimer:
+    """
+    Min-heap of upcoming scheduled times, keyed by post id.
+
+    Reschedules and cancellations are applied lazily: the heap may hold stale
+    entries, which are discarded when they reach the top. `wait()` sleeps until
+    the earliest entry is due, and wakes early when an earlier one is added.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}
+        self._cond = threading.Condition()
+        # Set by a dispatcher running in this process. Elsewhere (web workers)
+        # nothing reads the timer, so saves are not tracked.
+        self.tracking = False
+
+    def __len__(self):
+        return len(self._due)
+
+    def schedule(self, post_id: int, due_at: datetime):
+        """Adds or reschedules a post."""
+        with self._cond:
+            current = self._next_due()
+            self._due[post_id] = due_at
+            heapq.heappush(self._heap, (due_at, post_id))
+            if current is None or due_at < current:
+                self._cond.notify_all()
+
+    def cancel(self, post_id: int):
+        """Forgets a post; its heap entry is dropped when it surfaces."""
+        with self._cond:
+            self._due.pop(post_id, None)
+
+    def load(self, entries):
+        """Replaces the contents with `(post_id, due_at)` pairs, e.g. from the database."""
+        with self._cond:
+            self._due = dict(entries)
+            self._heap = [(due_at, post_id) for post_id, due_at in self._due.items()]
+            heapq.heapify(self._heap)
+            self._cond.notify_all()
+
+    def discard_due(self, now: datetime = None):
+        """Drops every entry due at or before `now`, once those posts have been claimed."""
+        now = now or timezone.now()
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                due_at, post_id = heapq.heappop(self._heap)
+                if self._due.get(post_id) == due_at:
+                    del self._due[post_id]
+
+    def next_due(self):
+        """Returns the earliest scheduled time, or None when nothing is pending."""
+        with self._cond:
+            return self._next_due()
+
+    def wait(self, timeout: float):
+        """
+        Blocks until the next post is due or `timeout` seconds pass, whichever
+        comes first. Returns early if an earlier post is scheduled meanwhile.
+        """
+        with self._cond:
+            next_due = self._next_due()
+            if next_due is not None:
+                timeout = min(timeout, (next_due - timezone.now()).total_seconds())
+            if timeout > 0:
+                self._cond.wait(timeout)
+
+    def _next_due(self):
+        while self._heap:
+            due_at, post_id = self._heap[0]
+            if self._due.get(post_id) == due_at:
+                return due_at
+            heapq.heappop(self._heap)
+        return None
+
+
+# Shared by the signal handlers and the dispatcher running in this process.
+due_timer = NextDueTimer()
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+# A token this close to expiry is treated as expired and refreshed.
+REFRESH_MARGIN = timedelta(seconds=60)
+# How long a refresh may hold the cross-process lock before others give up waiting.
+REFRESH_LOCK_TIMEOUT = 30
+_POLL_INTERVAL = 0.05
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    access_token: str
+    expires_at: datetime
+
+    def is_fresh(self) -> bool:
+        return self.expires_at is not None and self.expires_at > timezone.now() + REFRESH_MARGIN
+
+
+class TokenCache:
+    """
+    Access tokens keyed by social account id, kept until shortly before they expire.
+
+    Entries live in process memory and, when LINKEDIN_TOKEN_CACHE_ALIAS names a
+    Django cache, in that shared cache too. On a miss, get()/aget() run the
+    loader single-flight: one caller per account refreshes while the others
+    wait for its result. With a shared cache this also holds across processes.
+    """
+
+    def __init__(self):
+        self._tokens = {}
+        self._locks = {}
+        self._async_locks = weakref.WeakKeyDictionary()
+        self._guard = threading.Lock()
+
+    # --- storage ---
+
+    def _shared(self):
+        alias = settings.LINKEDIN_TOKEN_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _key(account_id) -> str:
+        return f"linkedin-token:{account_id}"
+
+    def _fresh(self, token):
+        return token if token is not None and token.is_fresh() else None
+
+    def peek(self, account_id):
+        """Returns the cached token if it is still fresh, without loading anything."""
+        token = self._fresh(self._tokens.get(account_id))
+        if token is None and (shared := self._shared()) is not None:
+            token = self._fresh(shared.get(self._key(account_id)))
+            if token is not None:
+                self._tokens[account_id] = token
+        return token
+
+    async def apeek(self, account_id):
+        token = self._fresh(self._tokens.get(account_id))
+        if token is None and (shared := self._shared()) is not None:
+            token = self._fresh(await shared.aget(self._key(account_id)))
+            if token is not None:
+                self._tokens[account_id] = token
+        return token
+
+    def put(self, account_id, access_token: str, expires_at: datetime) -> CachedToken:
+        token = CachedToken(access_token, expires_at)
+        if not token.is_fresh():
+            return token
+        self._tokens[account_id] = token
+        if (shared := self._shared()) is not None:
+            ttl = (expires_at - REFRESH_MARGIN - timezone.now()).total_seconds()
+            shared.set(self._key(account_id), token, timeout=int(ttl))
+        return token
+
+    def invalidate(self, account_id):
+        self._tokens.pop(account_id, None)
+        if (shared := self._shared()) is not None:
+            shared.delete(self._key(account_id))
+
+    # --- single-flight loading ---
+
+    def _lock_for(self, account_id) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(account_id, threading.Lock())
+
+    def _async_lock_for(self, account_id) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._guard:
+            locks = self._async_locks.setdefault(loop, {})
+            return locks.setdefault(account_id, asyncio.Lock())
+
+    def get(self, account_id, loader) -> CachedToken:
+        """
+        Returns a fresh token for the account, calling `loader()` on a miss.
+        `loader` must return an object with `token` and `expires_at`.
+        """
+        token = self.peek(account_id)
+        if token is not None:
+            return token
+        with self._lock_for(account_id):
+            token = self.peek(account_id)
+            if token is not None:
+                return token
+
+            shared = self._shared()
+            lock_key = self._key(account_id) + ":lock"
+            deadline = time.monotonic() + REFRESH_LOCK_TIMEOUT
+            acquired = False
+            while shared is not None and not (acquired := shared.add(lock_key, 1, REFRESH_LOCK_TIMEOUT)):
+                # Another process is refreshing this account; use its result.
+                time.sleep(_POLL_INTERVAL)
+                token = self.peek(account_id)
+                if token is not None:
+                    return token
+                if time.monotonic() > deadline:
+                    break
+            try:
+                loaded = loader()
+                return self.put(account_id, loaded.token, loaded.expires_at)
+            finally:
+                # Past the deadline we load without the lock: it is still
+                # the other process's to release.
+                if acquired:
+                    shared.delete(lock_key)
+
+    async def aget(self, account_id, aloader) -> CachedToken:
+        """
+        Async variant of get(); `aloader` is a coroutine function.
+        """
+        token = await self.apeek(account_id)
+        if token is not None:
+            return token
+        async with self._async_lock_for(account_id):
+            token = await self.apeek(account_id)
+            if token is not None:
+                return token
+
+            shared = self._shared()
+            lock_key = self._key(account_id) + ":lock"
+            deadline = time.monotonic() + REFRESH_LOCK_TIMEOUT
+            acquired = False
+            while shared is not None and not (acquired := await shared.aadd(lock_key, 1, REFRESH_LOCK_TIMEOUT)):
+                await asyncio.sleep(_POLL_INTERVAL)
+                token = await self.apeek(account_id)
+                if token is not None:
+                    return token
+                if time.monotonic() > deadline:
+                    break
+            try:
+                loaded = await aloader()
+                return self.put(account_id, loaded.token, loaded.expires_at)
+            finally:
+                if acquired:
+                    await shared.adelete(lock_key)
+
+
+token_cache = TokenCache()
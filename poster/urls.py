@@ -1,6 +1,16 @@
 from django.urls import path
-from .views import ConnectedAccountList
+from .views import (
+    BulkSchedulePostView,
+    ConnectedAccountList,
+    RecurringScheduleDetailView,
+    RecurringScheduleView,
+    SchedulePostView,
+)
 
 urlpatterns= [
- path('connected-accounts',ConnectedAccountList.as_view(),name="connected-account")
+ path('connected-accounts',ConnectedAccountList.as_view(),name="connected-account"),
+ path('posts',SchedulePostView.as_view(),name="scheduled-posts"),
+ path('posts/bulk',BulkSchedulePostView.as_view(),name="bulk-schedule-posts"),
+ path('recurring',RecurringScheduleView.as_view(),name="recurring-schedules"),
+ path('recurring/<int:pk>',RecurringScheduleDetailView.as_view(),name="recurring-schedule"),
 ]
\ No newline at end of file
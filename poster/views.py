@@ -3,30 +3,112 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import status
-from allauth.socialaccount.models import SocialAccount
-from .models import SchedulePost
-from .searialisers import SchedulePostSerializer, SocialAccountSerializer
+from django.db.models import Count, Max
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from social_scheduler.conditional import conditional_get, etag_for
+from social_scheduler.db import replica_reads
+from .accounts import connected_accounts, connected_accounts_etag
+from .bulk import import_posts, iter_rows
+from .models import RecurringSchedule, SchedulePost, Status
+from .pagination import KeysetPagination
+from .recurrence import discard_pending, materialize_series, rematerialize
+from .searialisers import RecurringScheduleSerializer, SchedulePostSerializer
 from rest_framework.permissions import IsAuthenticated
 # Create your views here.
 
 
 class SchedulePostView(APIView):
+    """
+    Lists the user's posts newest first, a page at a time.
+
+    Query params: status, social_account, scheduled_after, scheduled_before
+    (ISO 8601), limit and the cursor from the previous page's `next` link.
+    Served from the read replica when one is configured.
+    """
     permission_classes = [IsAuthenticated]
-    
+
+    # Exactly what SchedulePostSerializer reads, so each page is one query
+    # with no per-row lookups and no unused columns.
+    LIST_FIELDS = [
+        'id', 'content', 'media_file', 'status', 'scheduled_time', 'published_at', 'created_at',
+        'social_account_id', 'social_account__provider', 'author__username',
+    ]
+
+    def _filter(self, request, posts):
+        params = request.query_params
+
+        if 'status' in params:
+            if params['status'] not in Status.values:
+                raise ValidationError({'status': f"Must be one of {', '.join(Status.values)}."})
+            posts = posts.filter(status=params['status'])
+
+        if 'social_account' in params:
+            try:
+                posts = posts.filter(social_account_id=int(params['social_account']))
+            except ValueError:
+                raise ValidationError({'social_account': "Must be an integer."})
+
+        for param, lookup in (('scheduled_after', 'scheduled_time__gte'), ('scheduled_before', 'scheduled_time__lt')):
+            if param in params:
+                try:
+                    value = parse_datetime(params[param])
+                except ValueError:
+                    value = None
+                if value is None:
+                    raise ValidationError({param: "Must be an ISO 8601 datetime."})
+                posts = posts.filter(**{lookup: value})
+
+        return posts
+
+    def _stamp(self, request):
+        """
+        (latest updated_at, row count) of the filtered posts: one aggregate
+        query that changes whenever a post is added, edited, published or deleted.
+
+        Only good for an ETag: a delete, or a post leaving the filter, can
+        leave the latest updated_at as it was, so it is no Last-Modified.
+        """
+        if not hasattr(self, '_version'):
+            posts = self._filter(request, SchedulePost.objects.filter(author=request.user))
+            self._version = posts.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+        return self._version
+
+    def get_etag(self, request, *args, **kwargs):
+        version = self._stamp(request)
+        return etag_for(request.user.pk, request.user.username, request.get_full_path(), version['last_modified'], version['count'])
+
+    @replica_reads
+    @conditional_get
     def get(self,request):
-        post = SchedulePost.objects.filter(author=request.user).filter()
-        
+        posts = (
+            SchedulePost.objects
+            .filter(author=request.user)
+            .select_related('author', 'social_account')
+            .only(*self.LIST_FIELDS)
+        )
+        posts = self._filter(request, posts)
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(posts, request, view=self)
+        serializer = SchedulePostSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
 
 class ConnectedAccountList(APIView):
     permission_classes = [IsAuthenticated]
 
+    def get_etag(self, request, *args, **kwargs):
+        return connected_accounts_etag(request.user)
+
+    @conditional_get
     def get(self,request,*args,**kwargs):
-        
-        ConnectedAccountList = SocialAccount.objects.filter(user=request.user)
 
-        social_accounts = SocialAccountSerializer(ConnectedAccountList,many=True)
+        social_accounts = connected_accounts(request.user)
 
-        return Response(data=social_accounts.data,status=status.HTTP_200_OK)
+        return Response(data=social_accounts,status=status.HTTP_200_OK)
 
 
         
@@ -37,4 +119,100 @@ class ConnectedAccountList(APIView):
     
         
         
-        
\ No newline at end of file
+        
+
+
+class BulkSchedulePostView(APIView):
+    """
+    Schedules many posts from one CSV or NDJSON upload, sent either as the
+    `file` field of a multipart form or as the raw request body.
+
+    The upload is parsed as a stream and imported in chunks; the response
+    reports the created post id or the validation errors for every row.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    FORMATS = {
+        'csv': 'csv',
+        'text/csv': 'csv',
+        'ndjson': 'ndjson',
+        'jsonl': 'ndjson',
+        'application/x-ndjson': 'ndjson',
+        'application/jsonl': 'ndjson',
+    }
+
+    def _upload(self, request):
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type == 'multipart/form-data':
+            upload = request.FILES.get('file')
+            if upload is None:
+                return None, None
+            extension = upload.name.rsplit('.', 1)[-1].lower()
+            fmt = self.FORMATS.get(extension) or self.FORMATS.get(upload.content_type)
+            return upload, fmt
+        # Read the body straight off the wire instead of through a parser.
+        return request._request, self.FORMATS.get(content_type)
+
+    def post(self,request,*args,**kwargs):
+        source, fmt = self._upload(request)
+        if source is None:
+            return Response(data={'detail': "No file was uploaded."},status=status.HTTP_400_BAD_REQUEST)
+        if fmt is None:
+            return Response(data={'detail': "Upload a .csv or .ndjson file."},status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_posts(request.user, iter_rows(source, fmt))
+
+        response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(data=report,status=response_status)
+
+
+class RecurringScheduleView(APIView):
+    """
+    Lists the user's recurring series, or creates one. A new series is
+    materialized up to the horizon right away, so its first posts show up
+    in api/me/posts.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self,request,*args,**kwargs):
+        series = RecurringSchedule.objects.filter(author=request.user)
+        serializer = RecurringScheduleSerializer(series, many=True, context={'request': request})
+        return Response(data=serializer.data,status=status.HTTP_200_OK)
+
+    def post(self,request,*args,**kwargs):
+        serializer = RecurringScheduleSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        series = serializer.save(author=request.user)
+        materialize_series(series)
+        return Response(data=serializer.data,status=status.HTTP_201_CREATED)
+
+
+class RecurringScheduleDetailView(APIView):
+    """
+    Reads, edits or deletes one series. An edit replaces the posts already
+    materialized for later occurrences; deleting the series deletes those
+    posts and keeps the ones already published.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def _series(self, request, pk):
+        return get_object_or_404(RecurringSchedule, pk=pk, author=request.user)
+
+    def get(self,request,pk,*args,**kwargs):
+        serializer = RecurringScheduleSerializer(self._series(request, pk), context={'request': request})
+        return Response(data=serializer.data,status=status.HTTP_200_OK)
+
+    def patch(self,request,pk,*args,**kwargs):
+        serializer = RecurringScheduleSerializer(
+            self._series(request, pk), data=request.data, partial=True, context={'request': request},
+        )
+        serializer.is_valid(raise_exception=True)
+        rematerialize(serializer.save())
+        return Response(data=serializer.data,status=status.HTTP_200_OK)
+
+    def delete(self,request,pk,*args,**kwargs):
+        series = self._series(request, pk)
+        discard_pending(series)
+        series.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+
+import requests
+import urllib3
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from allauth.socialaccount.models import SocialAccount
+
+from .async_services import _aget_linkedin_api_headers, get_async_client
+from .http_client import get_session
+from .models import SchedulePost
+from .services import _get_linkedin_api_headers
+
+logger = logging.getLogger(__name__)
+
+# Longest a warm-up step waits on LinkedIn, so a slow API delays startup only so much.
+WARMUP_TIMEOUT = 5.0
+
+
+@dataclass
+class WarmupReport:
+    database: int = 0
+    http: int = 0
+    tokens: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self):
+        return (
+            f"Warmed {self.database} database connections, {self.http} LinkedIn connections "
+            f"and {self.tokens} tokens in {self.elapsed:.2f}s"
+        )
+
+
+# --- Connections ---
+
+def warm_database() -> bool:
+    """Opens this thread's database connection, if it has none yet."""
+    try:
+        close_old_connections()
+        # Any query will do; this one also loads the schema (SQLite) and
+        # the ORM's lazily imported query machinery.
+        SchedulePost.objects.filter(pk=0).exists()
+    except DatabaseError as e:
+        logger.warning("Warming the database connection failed: %s", e)
+        return False
+    return True
+
+
+def _open_connection():
+    """
+    Opens one keep-alive connection in the LinkedIn session's pool. Goes
+    through the session's adapter, so it lands in the pool publishes use,
+    but without its retries: warming gives up on the first error.
+    """
+    session = get_session()
+    request = requests.Request('GET', settings.LINKEDIN_API_BASE_URL).prepare()
+    # Resolved as session.request() does, since the pool is keyed by them.
+    options = session.merge_environment_settings(request.url, {}, None, None, None)
+    pool = session.get_adapter(request.url).get_connection_with_tls_context(
+        request, options['verify'], proxies=options['proxies'], cert=options['cert'],
+    )
+    # Unauthenticated, so LinkedIn answers 401 without touching any quota; the
+    # body is read, which hands the connection back to the pool.
+    pool.urlopen('GET', request.path_url, retries=False, timeout=WARMUP_TIMEOUT)
+
+
+def _warm_thread(barrier: threading.Barrier, http: bool) -> tuple:
+    database = warm_database()
+    try:
+        # Hold every thread here so the executor starts all of them and
+        # the connects overlap, each opening a connection of its own.
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    if not http:
+        return database, None
+    try:
+        _open_connection()
+    except urllib3.exceptions.HTTPError as e:
+        return database, e
+    return database, None
+
+
+def warm_threads(executor, workers: int) -> tuple:
+    """
+    Starts the executor's `workers` threads and opens, on each, the database
+    connection it will publish with and one connection to LinkedIn, up to
+    LINKEDIN_HTTP_POOL_MAXSIZE (the pool would discard any more).
+
+    Returns:
+        (database connections, LinkedIn connections) opened.
+    """
+    barrier = threading.Barrier(workers, timeout=WARMUP_TIMEOUT)
+    http = min(workers, settings.LINKEDIN_HTTP_POOL_MAXSIZE)
+    futures = [executor.submit(_warm_thread, barrier, i < http) for i in range(workers)]
+    results = [future.result() for future in futures]
+    errors = [error for _, error in results if error is not None]
+    if errors:
+        logger.warning("Could not open %d of %d LinkedIn connections: %s", len(errors), http, errors[-1])
+    return sum(database for database, _ in results), http - len(errors)
+
+
+async def awarm_http(connections: int) -> int:
+    """
+    Opens up to `connections` keep-alive connections in the running loop's
+    async client.
+
+    Returns:
+        How many were opened.
+    """
+    client = get_async_client()
+    connections = min(connections, settings.LINKEDIN_HTTP_POOL_MAXSIZE)
+    results = await asyncio.gather(
+        *(client.get(settings.LINKEDIN_API_BASE_URL, timeout=WARMUP_TIMEOUT) for _ in range(connections)),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        logger.warning("Could not open %d of %d LinkedIn connections: %r", len(errors), connections, errors[-1])
+    return connections - len(errors)
+
+
+# --- Tokens ---
+
+def accounts_due_soon(scheduled, until) -> list:
+    """
+    Accounts of posts in `scheduled` (a queryset of SCHEDULED posts) that are
+    due by `until`, at most SCHEDULER_WARMUP_MAX_TOKENS of them, soonest first.
+    """
+    due = (
+        scheduled
+        .filter(scheduled_time__lte=until)
+        .order_by('scheduled_time')
+        .values_list('social_account_id', flat=True)[:settings.SCHEDULER_WARMUP_MAX_TOKENS]
+    )
+    return list(SocialAccount.objects.filter(pk__in=set(due)))
+
+
+def _warm_token(account: SocialAccount) -> bool:
+    try:
+        _get_linkedin_api_headers(account)
+    except Exception as e:
+        # The publish reports it; warming is best effort.
+        logger.warning("Loading the token of account %s failed: %s", account.pk, e)
+        return False
+    return True
+
+
+def warm_tokens(executor, accounts: list) -> int:
+    """
+    Loads the accounts' access tokens into the token cache on the executor's
+    threads, refreshing those about to expire.
+
+    Returns:
+        How many tokens are cached.
+    """
+    return sum(executor.map(_warm_token, accounts))
+
+
+async def awarm_tokens(accounts: list) -> int:
+    """Async variant of warm_tokens."""
+    async def warm(account):
+        try:
+            await _aget_linkedin_api_headers(account)
+        except Exception as e:
+            logger.warning("Loading the token of account %s failed: %s", account.pk, e)
+            return False
+        return True
+
+    return sum(await asyncio.gather(*(warm(account) for account in accounts)))
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def _replica_alias() -> str:
+    alias = settings.DATABASE_READ_ALIAS
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def reading_from_replica():
+    """Routes reads made inside the block to the replica alias, if one is configured."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_reads(method):
+    """
+    Decorates an APIView handler so its queries read from the replica.
+
+    Only for endpoints that can show data a moment old: a replica may lag
+    the primary, so a post saved just now can be missing from the response.
+    Apply it above conditional_get so the ETag query is routed as well.
+    """
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with reading_from_replica():
+            return method(*args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends every write, and every read by default, to the primary.
+
+    Reads made under reading_from_replica() (the listing endpoints) go to
+    DATABASE_READ_ALIAS instead. The dispatcher never opts in, so its claim
+    transactions read and write the primary only.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return _replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives the schema through replication.
+        return db == DEFAULT_DB_ALIAS
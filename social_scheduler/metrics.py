@@ -0,0 +1,266 @@
+import hmac
+import json
+import logging
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+LAG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+_NOOP = nullcontext()
+_trace = ContextVar('metrics_trace', default=None)
+
+
+# --- Registry ---
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}_total{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._bounds = tuple(f"{bound:g}" for bound in buckets) + ('+Inf',)
+        # {labels: [per-bucket counts (last is +Inf), sum]}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ('le',)
+        with self._lock:
+            for labels, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self._bounds, counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total:g}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+stage_seconds = Histogram(
+    'scheduler_stage_seconds', "Time spent in one stage of publishing a post.", ('stage',),
+)
+publish_seconds = Histogram(
+    'scheduler_publish_seconds', "Time to publish one post, all stages included.", ('outcome',),
+)
+publish_queries = Histogram(
+    'scheduler_publish_queries', "Database queries made while publishing one post.", buckets=QUERY_BUCKETS,
+)
+schedule_lag_seconds = Histogram(
+    'scheduler_schedule_lag_seconds', "Delay between a post's scheduled_time and its publication.", buckets=LAG_BUCKETS,
+)
+http_request_seconds = Histogram(
+    'http_request_seconds', "Time to answer an HTTP request.", ('view', 'method', 'status'),
+)
+http_request_queries = Histogram(
+    'http_request_queries', "Database queries made while answering an HTTP request.", ('view',), buckets=QUERY_BUCKETS,
+)
+http_requests = Counter(
+    'http_requests', "HTTP requests answered.", ('view', 'method', 'status'),
+)
+
+REGISTRY = [
+    stage_seconds, publish_seconds, publish_queries, schedule_lag_seconds,
+    http_request_seconds, http_request_queries, http_requests,
+]
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return '\n'.join(line for metric in REGISTRY for line in metric.render()) + '\n'
+
+
+# --- Spans ---
+
+def _log(event: str, **fields):
+    if settings.METRICS_LOG_SPANS:
+        logger.info(json.dumps({'event': event, 'trace': _trace.get(), **fields}, default=str))
+
+
+@contextmanager
+def _span(stage: str, fields: dict):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, stage)
+        _log('span', stage=stage, seconds=round(elapsed, 6), **fields)
+
+
+def span(stage: str, **fields):
+    """
+    Times a stage of the publish path into scheduler_stage_seconds{stage=...}
+    and, with METRICS_LOG_SPANS, logs it as a JSON line tagged with the
+    enclosing trace. A shared no-op when METRICS_ENABLED is off.
+    """
+    if not settings.METRICS_ENABLED:
+        return _NOOP
+    return _span(stage, fields)
+
+
+class QueryCounter:
+    """connection.execute_wrapper() hook counting the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def _traced(name: str, fields: dict, count_queries: bool):
+    token = _trace.set(uuid.uuid4().hex[:16])
+    counter = QueryCounter() if count_queries else None
+    info = {}
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(counter) if counter else nullcontext():
+            yield info
+    finally:
+        info['seconds'] = time.perf_counter() - started
+        if counter:
+            info['queries'] = counter.count
+        _log(name, **{**fields, **info, 'seconds': round(info['seconds'], 6)})
+        _trace.reset(token)
+
+
+def trace(name: str, count_queries: bool = True, **fields):
+    """
+    Groups the spans of one unit of work (a request, a publish) under a trace
+    id and counts the database queries it makes on this thread.
+
+    Yields a dict the caller may add fields to (e.g. `outcome`); on exit it
+    also holds `seconds` and, with `count_queries`, `queries`. Pass
+    count_queries=False for async code, whose queries run on other threads.
+    Yields None when METRICS_ENABLED is off.
+    """
+    if not settings.METRICS_ENABLED:
+        return _NOOP
+    return _traced(name, fields, count_queries)
+
+
+# --- Export ---
+
+class MetricsMiddleware:
+    """
+    Times every request and counts its queries, labelled by the resolved
+    view name. Removed from the stack at startup when METRICS_ENABLED is off.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with _traced('request', {'method': request.method, 'path': request.path}, True) as info:
+            response = self.get_response(request)
+            match = request.resolver_match
+            view = match.view_name if match else 'unresolved'
+            info.update(view=view, status=response.status_code)
+        status = str(response.status_code)
+        http_request_seconds.observe(info['seconds'], view, request.method, status)
+        http_request_queries.observe(info['queries'], view)
+        http_requests.inc(view, request.method, status)
+        return response
+
+
+def _authorized(authorization: str) -> bool:
+    """Whether a scrape's Authorization header carries METRICS_TOKEN, when one is set."""
+    if not settings.METRICS_TOKEN:
+        return True
+    return hmac.compare_digest((authorization or '').encode(), f"Bearer {settings.METRICS_TOKEN}".encode())
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint. Requires `Authorization: Bearer <METRICS_TOKEN>` when one is set."""
+    if not _authorized(request.headers.get('Authorization')):
+        return HttpResponse(status=401)
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+class _ScrapeHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if not _authorized(self.headers.get('Authorization')):
+            self.send_response(401)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """
+    Serves the metrics from a background thread, for processes without a web
+    server (the dispatcher). Local only unless `host` says otherwise; scrapes
+    need METRICS_TOKEN like /metrics does.
+    """
+    server = ThreadingHTTPServer((host, port), _ScrapeHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
@@ -68,6 +68,8 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the request timings include every other middleware.
+    'social_scheduler.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -102,11 +104,50 @@ WSGI_APPLICATION = 'social_scheduler.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DATABASE_URL selects the backend (SQLite by default). DATABASE_REPLICA_URL adds a
+# read replica that the listing endpoints read from (see social_scheduler.db);
+# everything else, the dispatcher included, uses the primary.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': env.db('DATABASE_URL', default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+}
+if env.str('DATABASE_REPLICA_URL', default=''):
+    DATABASES['replica'] = env.db('DATABASE_REPLICA_URL')
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_READ_ALIAS = 'replica'
+DATABASE_ROUTERS = ['social_scheduler.db.PrimaryReplicaRouter']
+
+# Keep connections open between requests (seconds; 0 closes after each request)
+# and check them before reuse so a dropped connection is replaced, not raised.
+DATABASE_CONN_MAX_AGE = env.int('DATABASE_CONN_MAX_AGE', default=600)
+# SQLite: seconds a writer waits for the lock before "database is locked".
+SQLITE_BUSY_TIMEOUT = env.float('SQLITE_BUSY_TIMEOUT', default=20.0)
+
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = DATABASE_CONN_MAX_AGE
+    database['CONN_HEALTH_CHECKS'] = True
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        database.setdefault('OPTIONS', {}).update({
+            # Take the write lock at BEGIN so the dispatcher's claim transaction
+            # waits for concurrent writers instead of failing with "database is locked".
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            # Run on every new connection. WAL lets readers proceed while a write
+            # is in progress; with WAL, synchronous=NORMAL only syncs at checkpoints
+            # and stays crash-safe.
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY',
+        })
+        # Test against a file too: an in-memory database has no WAL, and its
+        # shared cache locks whole tables between threads.
+        database.setdefault('TEST', {}).setdefault('NAME', str(BASE_DIR / 'test_db.sqlite3'))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory unless CACHE_URL points at a shared backend (e.g. redis://...).
+# With several web processes use a shared backend, so that invalidation in one
+# process is seen by all of them.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
 }
 
 REST_AUTH = {
@@ -159,6 +200,9 @@ REST_FRAMEWORK = {
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -195,3 +239,160 @@ ACCOUNT_LOGIN_METHODS = ['email','username']
 ACCOUNT_SIGNUP_FIELDS = ['email*', 'username*', 'password1*', 'password2*']
 ACCOUNT_UNIQUE_EMAIL = True
 SOCIALACCOUNT_EMAIL_AUTHENTICATION_AUTO_CONNECT = True
+
+
+# Scheduler / dispatcher
+SCHEDULER_BATCH_SIZE = env.int('SCHEDULER_BATCH_SIZE', default=100)
+SCHEDULER_MAX_WORKERS = env.int('SCHEDULER_MAX_WORKERS', default=16)
+# Posts kept in flight at once by the asyncio dispatcher (dispatch_posts --async).
+SCHEDULER_ASYNC_CONCURRENCY = env.int('SCHEDULER_ASYNC_CONCURRENCY', default=200)
+# Upper bound on idle sleep; the dispatcher otherwise sleeps until the next post is due.
+SCHEDULER_RESYNC_INTERVAL = env.float('SCHEDULER_RESYNC_INTERVAL', default=120.0)
+# How often an idle dispatcher checks the table for due posts the timer does not
+# know of (saved by the web process); the most they can be published late by.
+SCHEDULER_POLL_INTERVAL = env.float('SCHEDULER_POLL_INTERVAL', default=5.0)
+# How many upcoming due times are loaded into the in-memory timer per resync.
+SCHEDULER_TIMER_PRELOAD = env.int('SCHEDULER_TIMER_PRELOAD', default=1000)
+# Share each claimed batch between authors by deficit round-robin instead of
+# strict scheduled_time order, with per-tier weights keyed by auth group name,
+# e.g. SCHEDULER_TIER_WEIGHTS="pro=4;enterprise=8" (authors in no tier weigh 1).
+SCHEDULER_FAIR_DISPATCH = env.bool('SCHEDULER_FAIR_DISPATCH', default=True)
+SCHEDULER_TIER_WEIGHTS = env.dict('SCHEDULER_TIER_WEIGHTS', cast={'value': float}, default={})
+# Several dispatcher nodes on one database: each node holds a lease renewed every
+# HEARTBEAT_INTERVAL seconds and dispatches only the account partitions the hash
+# ring gives it. A lease not renewed within LEASE_TTL is reaped and its in-flight
+# posts handed to the survivors; keep the TTL above the longest publish call.
+SCHEDULER_CLUSTERED = env.bool('SCHEDULER_CLUSTERED', default=False)
+SCHEDULER_NODE_NAME = env.str('SCHEDULER_NODE_NAME', default='')
+SCHEDULER_PARTITIONS = env.int('SCHEDULER_PARTITIONS', default=1024)
+SCHEDULER_VNODES = env.int('SCHEDULER_VNODES', default=256)
+SCHEDULER_HEARTBEAT_INTERVAL = env.float('SCHEDULER_HEARTBEAT_INTERVAL', default=10.0)
+SCHEDULER_LEASE_TTL = env.float('SCHEDULER_LEASE_TTL', default=120.0)
+# Publish outcomes are written behind in batches: one bulk UPDATE once this many are
+# pending or the oldest has waited FLUSH_INTERVAL seconds. Without a cluster, posts
+# left PUBLISHING for LEASE_TTL (a dispatcher died mid-batch) are handed back.
+SCHEDULER_RESULT_BATCH_SIZE = env.int('SCHEDULER_RESULT_BATCH_SIZE', default=100)
+SCHEDULER_RESULT_FLUSH_INTERVAL = env.float('SCHEDULER_RESULT_FLUSH_INTERVAL', default=1.0)
+# Retryable publish failures (429, 5xx, timeouts) are retried after a backoff that
+# doubles from BASE_DELAY up to MAX_DELAY seconds, with jitter; after MAX_ATTEMPTS
+# failures the post is dead-lettered (status DEAD) until re-driven from the admin.
+SCHEDULER_RETRY_MAX_ATTEMPTS = env.int('SCHEDULER_RETRY_MAX_ATTEMPTS', default=5)
+SCHEDULER_RETRY_BASE_DELAY = env.float('SCHEDULER_RETRY_BASE_DELAY', default=60.0)
+SCHEDULER_RETRY_MAX_DELAY = env.float('SCHEDULER_RETRY_MAX_DELAY', default=3600.0)
+# Before claiming work a dispatcher opens its database and LinkedIn connections and
+# loads the tokens of up to MAX_TOKENS accounts with posts due within LOOKAHEAD seconds.
+SCHEDULER_WARMUP_LOOKAHEAD = env.int('SCHEDULER_WARMUP_LOOKAHEAD', default=300)
+SCHEDULER_WARMUP_MAX_TOKENS = env.int('SCHEDULER_WARMUP_MAX_TOKENS', default=100)
+
+
+# Django cache alias shared by all workers for LinkedIn access tokens; unset keeps
+# the token cache in process memory only.
+LINKEDIN_TOKEN_CACHE_ALIAS = env('LINKEDIN_TOKEN_CACHE_ALIAS', default=None)
+
+# Cache alias and lifetime (seconds) for the per-user connected-accounts payload.
+# Entries are dropped by signals when an account or token changes; the TTL is a backstop.
+CONNECTED_ACCOUNTS_CACHE_ALIAS = env('CONNECTED_ACCOUNTS_CACHE_ALIAS', default='default')
+CONNECTED_ACCOUNTS_CACHE_TTL = env.int('CONNECTED_ACCOUNTS_CACHE_TTL', default=24 * 60 * 60)
+
+# LinkedIn endpoints; point them at a stand-in (see poster.fake_linkedin) to load-test.
+LINKEDIN_API_BASE_URL = env.str('LINKEDIN_API_BASE_URL', default='https://api.linkedin.com/v2')
+LINKEDIN_OAUTH_TOKEN_URL = env.str('LINKEDIN_OAUTH_TOKEN_URL', default='https://www.linkedin.com/oauth/v2/accessToken')
+
+# LinkedIn HTTP client: pooled keep-alive connections, timeouts and retries
+LINKEDIN_HTTP_POOL_CONNECTIONS = env.int('LINKEDIN_HTTP_POOL_CONNECTIONS', default=4)
+LINKEDIN_HTTP_POOL_MAXSIZE = env.int('LINKEDIN_HTTP_POOL_MAXSIZE', default=32)
+LINKEDIN_HTTP_CONNECT_TIMEOUT = env.float('LINKEDIN_HTTP_CONNECT_TIMEOUT', default=5.0)
+LINKEDIN_HTTP_READ_TIMEOUT = env.float('LINKEDIN_HTTP_READ_TIMEOUT', default=30.0)
+LINKEDIN_HTTP_MAX_RETRIES = env.int('LINKEDIN_HTTP_MAX_RETRIES', default=3)
+LINKEDIN_HTTP_BACKOFF_FACTOR = env.float('LINKEDIN_HTTP_BACKOFF_FACTOR', default=0.5)
+LINKEDIN_HTTP_BACKOFF_JITTER = env.float('LINKEDIN_HTTP_BACKOFF_JITTER', default=0.5)
+# Longest Retry-After (seconds) a worker will sleep on before retrying.
+LINKEDIN_HTTP_MAX_RETRY_AFTER = env.float('LINKEDIN_HTTP_MAX_RETRY_AFTER', default=120.0)
+
+# Background token sweeper (manage.py refresh_tokens)
+# Tokens expiring within this many seconds are refreshed ahead of time.
+TOKEN_SWEEP_HORIZON = env.int('TOKEN_SWEEP_HORIZON', default=24 * 60 * 60)
+TOKEN_SWEEP_INTERVAL = env.float('TOKEN_SWEEP_INTERVAL', default=15 * 60)
+TOKEN_SWEEP_BATCH_SIZE = env.int('TOKEN_SWEEP_BATCH_SIZE', default=50)
+TOKEN_SWEEP_CONCURRENCY = env.int('TOKEN_SWEEP_CONCURRENCY', default=8)
+# Refresh calls per second against LinkedIn's OAuth endpoint.
+TOKEN_SWEEP_RATE = env.float('TOKEN_SWEEP_RATE', default=5.0)
+
+# Media uploads
+# Videos at least this large (bytes) use LinkedIn's chunked multi-part upload.
+LINKEDIN_MULTIPART_THRESHOLD = env.int('LINKEDIN_MULTIPART_THRESHOLD', default=200 * 1024 * 1024)
+# Parts of one file uploaded concurrently, and retries per failed part.
+LINKEDIN_UPLOAD_PARALLELISM = env.int('LINKEDIN_UPLOAD_PARALLELISM', default=4)
+LINKEDIN_UPLOAD_PART_RETRIES = env.int('LINKEDIN_UPLOAD_PART_RETRIES', default=3)
+# Seconds an uploaded asset is reused for identical files from the same member.
+LINKEDIN_ASSET_CACHE_TTL = env.int('LINKEDIN_ASSET_CACHE_TTL', default=7 * 24 * 60 * 60)
+# How many of the member's latest posts are searched when settling whether an
+# attempt with a lost outcome (timeout, 5xx) was published after all.
+LINKEDIN_RECONCILE_LOOKBACK = env.int('LINKEDIN_RECONCILE_LOOKBACK', default=20)
+
+# LinkedIn quotas enforced before publish/upload calls: calls per day and
+# back-to-back burst, per member (SocialAccount) and per application (SocialApp).
+# Buckets live in LINKEDIN_RATE_LIMIT_CACHE_ALIAS, which must be a shared backend
+# for several workers to respect one budget.
+LINKEDIN_MEMBER_DAILY_LIMIT = env.int('LINKEDIN_MEMBER_DAILY_LIMIT', default=150)
+LINKEDIN_MEMBER_BURST = env.int('LINKEDIN_MEMBER_BURST', default=20)
+LINKEDIN_APP_DAILY_LIMIT = env.int('LINKEDIN_APP_DAILY_LIMIT', default=100000)
+LINKEDIN_APP_BURST = env.int('LINKEDIN_APP_BURST', default=200)
+LINKEDIN_RATE_LIMIT_CACHE_ALIAS = env('LINKEDIN_RATE_LIMIT_CACHE_ALIAS', default='default')
+# Longest a call waits for quota; beyond that the post is deferred and retried later.
+LINKEDIN_RATE_LIMIT_MAX_WAIT = env.float('LINKEDIN_RATE_LIMIT_MAX_WAIT', default=30.0)
+
+# Media staging (manage.py stage_media): upload attached media this many
+# seconds before scheduled_time so publishing is a single ugcPosts call.
+MEDIA_STAGING_LEAD_TIME = env.int('MEDIA_STAGING_LEAD_TIME', default=60 * 60)
+MEDIA_STAGING_INTERVAL = env.float('MEDIA_STAGING_INTERVAL', default=30.0)
+MEDIA_STAGING_BATCH_SIZE = env.int('MEDIA_STAGING_BATCH_SIZE', default=50)
+MEDIA_STAGING_CONCURRENCY = env.int('MEDIA_STAGING_CONCURRENCY', default=4)
+# After this many failed attempts the post falls back to uploading at publish time;
+# between attempts the job backs off from RETRY_BASE_DELAY up to RETRY_MAX_DELAY
+# seconds, doubling, so the attempts span an outage rather than a few seconds.
+MEDIA_STAGING_MAX_ATTEMPTS = env.int('MEDIA_STAGING_MAX_ATTEMPTS', default=5)
+MEDIA_STAGING_RETRY_BASE_DELAY = env.float('MEDIA_STAGING_RETRY_BASE_DELAY', default=60.0)
+MEDIA_STAGING_RETRY_MAX_DELAY = env.float('MEDIA_STAGING_RETRY_MAX_DELAY', default=900.0)
+
+# Recurring series (api/me/recurring, manage.py materialize_recurring): occurrences
+# become posts only this many seconds ahead; the job runs every INTERVAL seconds
+# (keep it well under the horizon), reading BATCH_SIZE series at a time and
+# materializing at most MAX_OCCURRENCES per series per run.
+RECURRING_HORIZON = env.int('RECURRING_HORIZON', default=48 * 60 * 60)
+RECURRING_INTERVAL = env.float('RECURRING_INTERVAL', default=300.0)
+RECURRING_BATCH_SIZE = env.int('RECURRING_BATCH_SIZE', default=200)
+RECURRING_MAX_OCCURRENCES = env.int('RECURRING_MAX_OCCURRENCES', default=500)
+
+# Bulk scheduling (POST api/me/posts/bulk): rows validated and inserted per chunk,
+# and the most rows read from a single upload.
+BULK_SCHEDULE_CHUNK_SIZE = env.int('BULK_SCHEDULE_CHUNK_SIZE', default=500)
+BULK_SCHEDULE_MAX_ROWS = env.int('BULK_SCHEDULE_MAX_ROWS', default=50000)
+
+# Page size for api/me/posts when the client does not pass `limit`, and the cap on `limit`.
+POSTS_PAGE_SIZE = env.int('POSTS_PAGE_SIZE', default=50)
+POSTS_MAX_PAGE_SIZE = env.int('POSTS_MAX_PAGE_SIZE', default=200)
+
+# Metrics (social_scheduler.metrics): per-stage publish timings, per-request timings
+# and query counts, served in the Prometheus text format at /metrics (and by
+# dispatch_posts --metrics-port). Off by default; disabled instrumentation is a no-op.
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=False)
+# Bearer token required to scrape /metrics; empty leaves it open.
+METRICS_TOKEN = env.str('METRICS_TOKEN', default='')
+# Also log every span, publish and request as a JSON line (logger social_scheduler.metrics).
+METRICS_LOG_SPANS = env.bool('METRICS_LOG_SPANS', default=False)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': env.str('LOG_LEVEL', default='WARNING'),
+    },
+    'loggers': {
+        'social_scheduler.metrics': {'level': 'INFO'},
+    },
+}
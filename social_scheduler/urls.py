@@ -19,6 +19,7 @@ from django.urls import path,include
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView)
+from social_scheduler.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -30,4 +31,5 @@ urlpatterns = [
     path('api/me/',include('poster.urls')),
     path('',include('customauth.urls')),
     path('linkedin/',include('linkedinposter.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,29 @@
+"""
+Settings for scheduler workers (see worker.py).
+
+Everything from social_scheduler.settings, minus what only the web API needs:
+the admin, sessions, messages, static files, allauth's account flows,
+dj_rest_auth, DRF, CORS, templates and all middleware. A worker then starts
+without importing those, and only loads the apps whose models publishing
+reads.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    # SocialApp is linked to sites.
+    'django.contrib.sites',
+    'allauth',
+    'allauth.socialaccount',
+    'poster',
+]
+
+MIDDLEWARE = []
+
+TEMPLATES = []
+
+# Workers serve no requests; `dispatch_posts --metrics-port` exports metrics.
+ROOT_URLCONF = None
+WSGI_APPLICATION = None
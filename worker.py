@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+"""
+Entrypoint for scheduler workers: runs `dispatch_posts` (same arguments)
+with the trimmed social_scheduler.worker_settings, so a new worker loads
+only what publishing needs and is claiming posts sooner than through
+manage.py. Compare the two with `manage.py bench_startup`.
+"""
+import os
+import sys
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_scheduler.worker_settings')
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('dispatch_posts', *sys.argv[1:])
+
+
+if __name__ == '__main__':
+    main()